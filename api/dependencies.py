@@ -0,0 +1,40 @@
+import hashlib
+from typing import AsyncGenerator, Generator, Optional
+
+from fastapi import Request
+
+from db.utils import database
+
+# Read-your-writes: a client that just sent one of these is routed to the
+# primary for its next reads (see DB_READ_YOUR_WRITES_SECONDS).
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def token_writer_key(token: str) -> str:
+    """Read-your-writes identity of a client by its bearer token, however the token was sent"""
+    return hashlib.sha1(token.encode()).hexdigest()
+
+
+def writer_key(request: Request) -> Optional[str]:
+    """Identify a client for read-your-writes stickiness (by its credentials)"""
+    _, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if not credentials:
+        return None
+    return token_writer_key(credentials)
+
+
+def get_db(request: Request) -> Generator:
+    """Primary session for the request; write methods make the client sticky to the primary"""
+    yield from database.get_db(writer_key(request) if request.method in WRITE_METHODS else None)
+
+
+def get_read_db(request: Request) -> Generator:
+    """Session for read-only routes: replica, or primary right after this client wrote"""
+    yield from database.get_read_db(writer_key(request))
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    """Async session for read-only routes, routed like get_read_db"""
+    session = database.get_async_read_session(writer_key(request))
+    async with database.async_session_scope(session, "read") as db:
+        yield db
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
@@ -8,8 +9,10 @@ from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 
-from db.utils.database import get_db
+from api.dependencies import get_db
 from models.user import User
+from services.cache.ttl_cache import TTLCache
+from services.security.password_hasher import PasswordHasher, HashingOverloaded
 
 load_dotenv()
 
@@ -18,8 +21,27 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing
+# Principal cache: avoids a users SELECT on every authenticated request.
+# A TTL of 0 disables the cache. In stateless mode the signed token claims are
+# trusted as-is and the database is never consulted.
+# The cache is per process: invalidate_principal only clears this worker's
+# copy, so after a password or is_active change other workers keep serving the
+# old principal for up to the TTL. Keep the TTL short when that matters.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "False").lower() == "true"
+
+# Usernames allowed to use operational endpoints (exports, diagnostics)
+ADMIN_USERNAMES = {name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()}
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS, name="auth_principal")
+
+# Password hashing (bcrypt runs on a dedicated pool, never on the event loop)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(pwd_context, max_workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -43,12 +65,41 @@ class UserInDB(BaseModel):
     class Config:
         from_attributes = True
 
+class Principal(BaseModel):
+    """Authenticated user as seen by the endpoints (detached from any session)"""
+    id: int
+    username: str
+    email: str
+    is_active: bool = True
+    
+    class Config:
+        from_attributes = True
+
 # Helper functions
+def hashing_overloaded_exception(exc: HashingOverloaded):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify_blocking(plain_password, hashed_password)
+    except HashingOverloaded as e:
+        raise hashing_overloaded_exception(e)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    try:
+        return password_hasher.hash_blocking(password)
+    except HashingOverloaded as e:
+        raise hashing_overloaded_exception(e)
+
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HashingOverloaded as e:
+        raise hashing_overloaded_exception(e)
 
 def get_user(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
@@ -71,29 +122,74 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def invalidate_principal(username: str):
+    """Drop a cached principal, call after the user row changes (this process only)"""
+    principal_cache.pop(username)
+
+def principal_from_claims(payload: dict):
+    """Build a principal from signed claims, None if the token predates them"""
+    if "uid" not in payload or "email" not in payload:
+        return None
+    return Principal(id=payload["uid"], username=payload["sub"], email=payload["email"])
+
+def load_principal(db: Session, username: str):
+    """Read the principal from the database and cache it; callers check the cache first"""
+    user = get_user(db, username=username)
+    if user is None:
+        return None
+    
+    principal = Principal.model_validate(user)
+    if PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        principal_cache.set(username, principal)
+    return principal
+
+async def principal_from_token(token: str, db: Session):
+    """The principal a bearer token identifies, None if the token is invalid or the user is gone"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    user = get_user(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
-    return user
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    token_data = TokenData(username=username)
+    
+    if AUTH_STATELESS:
+        principal = principal_from_claims(payload)
+        if principal is not None:
+            return principal
+    
+    principal = principal_cache.get(token_data.username) if PRINCIPAL_CACHE_TTL_SECONDS > 0 else None
+    if principal is None:
+        # Cache miss: run the users SELECT in the threadpool, not on the event loop
+        principal = await run_in_threadpool(load_principal, db, token_data.username)
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    principal = await principal_from_token(token, db)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+def is_admin(user) -> bool:
+    return user.username in ADMIN_USERNAMES
+
+async def get_current_admin(current_user: User = Depends(get_current_user)):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
 
 # Endpoints
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Keep the DB lookup and bcrypt off the event loop
+    user = await run_in_threadpool(get_user, db, form_data.username)
+    if user and not await verify_password_async(form_data.password, user.hashed_password):
+        user = None
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,7 +198,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id, "email": user.email},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -0,0 +1,272 @@
+"""WebSocket chat: one connection per conversation, many turns.
+
+``/conversations/{id}/ws`` authenticates once (``?token=`` or an
+``Authorization: Bearer`` header), checks ownership once and pins the
+conversation's ConversationChain for the lifetime of the connection, so a
+turn costs the LLM call and the message write only.
+
+Frames are JSON objects:
+
+    client  {"type": "message", "content": "..."}   start a turn
+            {"type": "pong"}                        optional heartbeat reply
+    server  {"type": "ready", "conversation_id": N}
+            {"type": "token", "content": "..."}     reply text as it streams
+            {"type": "done", "user_message": {...}, "assistant_message": {...}}
+            {"type": "error", "detail": "..."}      the connection stays open
+            {"type": "ping"}                        after CHAT_WS_HEARTBEAT_SECONDS without a frame
+
+Frames must be text; a binary frame closes the connection with code 1003.
+
+Backpressure: LLM chunks collect in a per-turn buffer that the sender drains
+into one frame per send, so a slow reader gets fewer, larger frames and never
+stalls the LLM stream. A client that does not accept a frame within
+CHAT_WS_SEND_TIMEOUT_SECONDS is disconnected with code 1013. Turns run one at
+a time; messages sent while a reply streams wait for it to finish.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+
+from api.dependencies import token_writer_key
+from api.endpoints.auth import principal_from_token
+from api.endpoints.conversations import get_conversation_chain, save_conversation_embeddings
+from db.utils.database import SessionLocal, mark_recent_write
+from models.conversation import Conversation
+from services.ai.llm_gateway import LLMOverloaded
+from services.conversations.turn_writer import persist_turn
+from services.observability import metrics
+
+CHAT_WS_HEARTBEAT_SECONDS = float(os.getenv("CHAT_WS_HEARTBEAT_SECONDS", "20"))
+CHAT_WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("CHAT_WS_IDLE_TIMEOUT_SECONDS", "600"))
+CHAT_WS_SEND_TIMEOUT_SECONDS = float(os.getenv("CHAT_WS_SEND_TIMEOUT_SECONDS", "10"))
+CHAT_WS_MAX_MESSAGE_CHARS = int(os.getenv("CHAT_WS_MAX_MESSAGE_CHARS", "16000"))
+
+WS_CONNECTIONS = metrics.gauge("chat_ws_connections", "Open chat WebSocket connections")
+WS_TURNS = metrics.counter("chat_ws_turns_total", "Chat turns served over WebSocket", ["result"])
+WS_CHUNKS_PER_FRAME = metrics.histogram(
+    "chat_ws_chunks_per_frame", "LLM chunks coalesced into one token frame",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+WS_SLOW_CLIENTS = metrics.counter("chat_ws_slow_client_disconnects_total", "Connections closed because the client stopped reading")
+
+router = APIRouter()
+
+# Unhandled errors on REST routes are reported by uvicorn on this logger
+logger = logging.getLogger("uvicorn.error")
+
+
+class SlowClient(Exception):
+    """The client did not accept a frame within CHAT_WS_SEND_TIMEOUT_SECONDS"""
+
+
+class BinaryFrame(Exception):
+    """The client sent a binary frame; the protocol is JSON text only"""
+
+
+def bearer_token(websocket: WebSocket) -> Optional[str]:
+    # Browsers cannot set headers on a WebSocket handshake, hence the query parameter
+    token = websocket.query_params.get("token")
+    if token:
+        return token
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else None
+
+
+async def authorize(token: str, conversation_id: int) -> Optional[Conversation]:
+    """The conversation if ``token`` is valid and its user owns it; loaded once per connection"""
+    with SessionLocal() as db:
+        principal = await principal_from_token(token, db)
+        if principal is None:
+            return None
+        
+        def load():
+            conversation = (
+                db.query(Conversation)
+                .filter(Conversation.id == conversation_id, Conversation.user_id == principal.id)
+                .first()
+            )
+            if conversation is not None:
+                # Detached with its columns loaded; turns only read id and user_id
+                db.expunge(conversation)
+            return conversation
+        
+        return await run_in_threadpool(load)
+
+
+def complete_turn(chain, conversation: Conversation, content: str, on_token, writer_key: Optional[str] = None):
+    """LLM call and message write, run in the threadpool; finishes even if the client goes away"""
+    turn = chain.respond(content, on_token=on_token)
+    with SessionLocal() as db:
+        messages = persist_turn(db, conversation, content, turn.content, turn.model, turn.latency_ms)
+    # The client's REST reads (GET .../messages) go to the primary for a while, as after a POST
+    mark_recent_write(writer_key)
+    return messages
+
+
+class ChatSocket:
+    """Serialized, time-limited sends plus the heartbeat for one connection"""
+    
+    def __init__(self, websocket: WebSocket, writer_key: Optional[str] = None):
+        self.websocket = websocket
+        self.writer_key = writer_key
+        self.last_sent = time.monotonic()
+        self._send_lock = asyncio.Lock()
+    
+    async def send(self, frame: dict):
+        async with self._send_lock:
+            try:
+                await asyncio.wait_for(self.websocket.send_json(frame), CHAT_WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                raise SlowClient()
+            except WebSocketDisconnect:
+                raise
+            except Exception:
+                # Transport closed under us (e.g. the client vanished mid-reply)
+                raise WebSocketDisconnect(status.WS_1006_ABNORMAL_CLOSURE)
+            self.last_sent = time.monotonic()
+    
+    async def heartbeat(self):
+        try:
+            while True:
+                await asyncio.sleep(max(0.0, self.last_sent + CHAT_WS_HEARTBEAT_SECONDS - time.monotonic()))
+                if time.monotonic() - self.last_sent >= CHAT_WS_HEARTBEAT_SECONDS:
+                    await self.send({"type": "ping"})
+        except SlowClient:
+            WS_SLOW_CLIENTS.inc()
+            await self.close(status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass  # the connection is gone; the receive loop notices
+    
+    async def close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+    
+    async def stream_turn(self, chain, conversation: Conversation, content: str):
+        """Relay the reply as token frames while the turn runs; returns the saved (user, assistant) messages"""
+        loop = asyncio.get_running_loop()
+        chunks: List[str] = []
+        arrived = asyncio.Event()
+        
+        def on_token(text: str):
+            # LLM thread: list.append is atomic, the event is set on the loop
+            chunks.append(text)
+            loop.call_soon_threadsafe(arrived.set)
+        
+        turn = asyncio.ensure_future(
+            run_in_threadpool(complete_turn, chain, conversation, content, on_token, self.writer_key)
+        )
+        while True:
+            waiter = asyncio.ensure_future(arrived.wait())
+            await asyncio.wait({turn, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            arrived.clear()
+            if chunks:
+                # Everything that arrived while the previous frame was being sent goes out as one frame
+                pending = chunks[:]
+                del chunks[:len(pending)]
+                WS_CHUNKS_PER_FRAME.observe(len(pending))
+                await self.send({"type": "token", "content": "".join(pending)})
+            elif turn.done():
+                return turn.result()
+
+
+async def receive_text(websocket: WebSocket) -> str:
+    """Next text frame; a bare ``receive_text`` raises KeyError on binary frames"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+    if message.get("text") is None:
+        raise BinaryFrame()
+    return message["text"]
+
+
+def parse_message(raw: str) -> tuple:
+    """(frame type, content or None, error detail or None) for a client frame"""
+    try:
+        frame = json.loads(raw)
+    except ValueError:
+        return None, None, "Frames must be JSON objects"
+    if not isinstance(frame, dict):
+        return None, None, "Frames must be JSON objects"
+    
+    frame_type = frame.get("type", "message")
+    if frame_type != "message":
+        return frame_type, None, None if frame_type == "pong" else f"Unknown frame type: {frame_type}"
+    content = frame.get("content")
+    if not isinstance(content, str) or not content.strip():
+        return frame_type, None, "A message frame needs non-empty content"
+    if len(content) > CHAT_WS_MAX_MESSAGE_CHARS:
+        return frame_type, None, f"Messages are limited to {CHAT_WS_MAX_MESSAGE_CHARS} characters"
+    return frame_type, content, None
+
+
+@router.websocket("/{conversation_id}/ws")
+async def conversation_socket(websocket: WebSocket, conversation_id: int):
+    token = bearer_token(websocket)
+    conversation = await authorize(token, conversation_id) if token else None
+    if conversation is None:
+        # Closing before accept rejects the handshake
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    WS_CONNECTIONS.inc()
+    socket = ChatSocket(websocket, token_writer_key(token))
+    heartbeat = asyncio.create_task(socket.heartbeat())
+    # Pinned for the connection; REST turns look it up on every request
+    chain = get_conversation_chain(conversation_id)
+    embedding = None
+    try:
+        await socket.send({"type": "ready", "conversation_id": conversation_id})
+        while True:
+            raw = await asyncio.wait_for(receive_text(websocket), CHAT_WS_IDLE_TIMEOUT_SECONDS)
+            frame_type, content, error = parse_message(raw)
+            if error:
+                await socket.send({"type": "error", "detail": error})
+                continue
+            if frame_type == "pong":
+                continue
+            
+            try:
+                user_message, ai_message = await socket.stream_turn(chain, conversation, content)
+            except LLMOverloaded as exc:
+                WS_TURNS.inc(result="overloaded")
+                await socket.send({
+                    "type": "error",
+                    "detail": "The assistant is busy, please retry shortly",
+                    "retry_after": int(exc.retry_after),
+                })
+                continue
+            except (SlowClient, WebSocketDisconnect):
+                raise
+            except Exception:
+                WS_TURNS.inc(result="error")
+                logger.exception("WebSocket turn failed for conversation %s", conversation_id)
+                await socket.send({"type": "error", "detail": "The assistant could not answer"})
+                continue
+            
+            WS_TURNS.inc(result="ok")
+            await socket.send({"type": "done", "user_message": user_message, "assistant_message": ai_message})
+            # At most one embedding refresh in flight per connection; later turns catch up on the next one
+            if embedding is None or embedding.done():
+                embedding = asyncio.ensure_future(run_in_threadpool(save_conversation_embeddings, conversation_id))
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        await socket.close(status.WS_1001_GOING_AWAY)
+    except BinaryFrame:
+        await socket.close(status.WS_1003_UNSUPPORTED_DATA)
+    except SlowClient:
+        WS_SLOW_CLIENTS.inc()
+        await socket.close(status.WS_1013_TRY_AGAIN_LATER)
+    finally:
+        heartbeat.cancel()
+        WS_CONNECTIONS.dec()
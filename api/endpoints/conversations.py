@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 from pydantic import BaseModel
+import asyncio
+import os
 import uuid
 
-from db.utils.database import get_db
+from api.dependencies import get_async_read_db, get_db, get_read_db
+from db.utils.database import SessionLocal
 from models.user import User
 from models.conversation import Conversation
-from models.conversation_message import ConversationMessage, MessageRole
-from api.endpoints.auth import get_current_user
-from chatbot.chains.conversation import ConversationChain
-from vector_db.qdrant_client import get_qdrant_client
+from models.conversation_message import ConversationMessage
+from models.conversation_archive import ConversationArchive
+from api.endpoints.auth import get_current_user, is_admin
+from api.pagination import MAX_PAGE_SIZE, NULLABLE_DATETIME, decode_cursor, set_next_cursor
+from vector_db.qdrant_client import get_qdrant_client, upsert_conversation
 from vector_db.utils.embeddings import get_conversation_embedding
+from services.conversations.archive import conversation_messages, unpack_messages
+from services.conversations.deletion import delete_conversation_vectors, delete_conversations
+from services.conversations.turn_writer import persist_turn
+from services.cache.idempotency import IdempotencyKeyMismatch, message_idempotency, request_fingerprint
+from services.export.transcripts import stream_transcripts
 
 router = APIRouter()
 
@@ -24,10 +38,16 @@ class MessageResponse(BaseModel):
     conversation_id: int
     role: str
     content: str
+    model: Optional[str] = None
+    latency_ms: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+class TurnResponse(BaseModel):
+    user_message: MessageResponse
+    assistant_message: MessageResponse
+
 class ConversationCreate(BaseModel):
     title: Optional[str] = None
 
@@ -40,39 +60,65 @@ class ConversationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ConversationSummary(BaseModel):
+    """List projection: conversation columns only, no messages"""
+    id: int
+    user_id: int
+    title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 # Store active conversation chains
 active_conversations = {}
 
 # Helper function to get or create conversation chain
 def get_conversation_chain(conversation_id):
     if conversation_id not in active_conversations:
+        # LangChain is imported on the first chat turn, not at worker boot
+        from chatbot.chains.conversation import ConversationChain
+        
         active_conversations[conversation_id] = ConversationChain(conversation_id=conversation_id)
     return active_conversations[conversation_id]
 
+# A repeat that arrives while the original turn still runs waits for it on the
+# event loop (no threadpool worker is held) for up to IDEMPOTENCY_WAIT_SECONDS,
+# then is told to come back (409 + Retry-After)
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_RETRY_AFTER_SECONDS = int(os.getenv("IDEMPOTENCY_RETRY_AFTER_SECONDS", "2"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+def message_sort_key(created_at: Optional[datetime], message_id: int) -> tuple:
+    """(created_at, id) ordering as the database applies it: NULL timestamps first"""
+    return (created_at is not None, created_at or datetime.min, message_id)
+
 # Background task to save embeddings
-def save_conversation_embeddings(conversation_id: int, db: Session):
-    # Get conversation messages
-    messages = (
-        db.query(ConversationMessage)
-        .filter(ConversationMessage.conversation_id == conversation_id)
-        .order_by(ConversationMessage.created_at)
-        .all()
-    )
+def save_conversation_embeddings(conversation_id: int):
+    # Runs after the response is sent, when the request session is already closed
+    with SessionLocal() as db:
+        _save_conversation_embeddings(conversation_id, db)
+
+def _save_conversation_embeddings(conversation_id: int, db: Session):
+    conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    if conversation is None:
+        return  # deleted before the task ran
+    
+    # Get conversation messages, archived ones included, so the vector covers the whole conversation
+    messages = conversation_messages(db, conversation)
     
     # Convert to format for embedding
     formatted_messages = [
-        {"role": msg.role, "content": msg.content} for msg in messages
+        {"role": msg["role"], "content": msg["content"]} for msg in messages
     ]
     
     # Generate embedding
     embedding = get_conversation_embedding(formatted_messages)
     
-    # Generate a stable ID for the vector
+    # Qdrant point ids must be unsigned integers or UUIDs; the conversation id is stable
     vector_id = str(conversation_id)
     
-    # Get conversation metadata
-    conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-    
     # Create metadata
     metadata = {
         "conversation_id": conversation_id,
@@ -82,15 +128,7 @@ def save_conversation_embeddings(conversation_id: int, db: Session):
     }
     
     # Save to vector database
-    client = get_qdrant_client()
-    client.upsert(
-        collection_name="conversation_embeddings",
-        points=[{
-            "id": vector_id,
-            "vector": embedding,
-            "payload": metadata
-        }]
-    )
+    upsert_conversation(get_qdrant_client(), conversation_id, embedding, metadata)
     
     # Update conversation with vector ID
     conversation.vector_id = vector_id
@@ -118,26 +156,69 @@ def create_conversation(
     
     return db_conversation
 
-@router.get("/", response_model=List[ConversationResponse])
-def get_conversations(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+@router.get("/", response_model=List[ConversationSummary])
+async def get_conversations(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    # Column projection keyset-paginated on (user_id, id); messages are never loaded.
+    # Served from the async engine, so the query does not hold a threadpool worker.
+    statement = (
+        select(
+            Conversation.id,
+            Conversation.user_id,
+            Conversation.title,
+            Conversation.created_at,
+            Conversation.updated_at,
+        )
+        .where(Conversation.user_id == current_user.id)
     )
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        statement = statement.where(Conversation.id > last_id)
+    
+    conversations = (await db.execute(statement.order_by(Conversation.id).limit(limit))).all()
+    set_next_cursor(response, conversations, limit, "id")
     return conversations
 
+@router.get("/export")
+def export_transcripts(
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    from_conversation_id: Optional[int] = None,
+    to_conversation_id: Optional[int] = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream transcripts as NDJSON, one message per line; admins may export any user"""
+    if not is_admin(current_user):
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to export these conversations")
+        user_id = current_user.id
+    
+    stream = stream_transcripts(
+        compress=gzip,
+        user_id=user_id,
+        since=since,
+        until=until,
+        from_conversation_id=from_conversation_id,
+        to_conversation_id=to_conversation_id,
+    )
+    filename = "transcripts.ndjson.gz" if gzip else "transcripts.ndjson"
+    return StreamingResponse(
+        stream,
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 def get_conversation(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     conversation = (
@@ -149,15 +230,130 @@ def get_conversation(
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
+    if conversation.archived_at:
+        # Older messages live compressed in conversation_archives
+        return {
+            "id": conversation.id,
+            "user_id": conversation.user_id,
+            "title": conversation.title,
+            "messages": conversation_messages(db, conversation),
+        }
     return conversation
 
-@router.post("/{conversation_id}/messages", response_model=MessageResponse)
-def add_message(
+@router.get("/{conversation_id}/messages", response_model=List[MessageResponse])
+def get_messages(
+    conversation_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    owned = (
+        db.query(Conversation.id, Conversation.archived_at)
+        .filter(Conversation.id == conversation_id, Conversation.user_id == current_user.id)
+        .first()
+    )
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    last_created_at = last_id = None
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, NULLABLE_DATETIME, int)
+    
+    # Archived messages all predate the hot ones, so they form the first pages
+    archived = []
+    if owned.archived_at:
+        archive = db.get(ConversationArchive, conversation_id)
+        after = message_sort_key(last_created_at, last_id) if cursor else None
+        archived = [
+            message for message in (unpack_messages(archive) if archive else [])
+            if after is None or message_sort_key(message["created_at"], message["id"]) > after
+        ][:limit]
+        if len(archived) == limit:
+            set_next_cursor(response, archived, limit, "created_at", "id")
+            return archived
+    
+    # Keyset-paginated on the (conversation_id, created_at, id) index
+    query = db.query(ConversationMessage).filter(ConversationMessage.conversation_id == conversation_id)
+    if cursor and not archived and last_created_at is None:
+        query = query.filter(
+            or_(
+                ConversationMessage.created_at.isnot(None),
+                and_(ConversationMessage.created_at.is_(None), ConversationMessage.id > last_id),
+            )
+        )
+    elif cursor and not archived:
+        query = query.filter(
+            or_(
+                ConversationMessage.created_at > last_created_at,
+                and_(ConversationMessage.created_at == last_created_at, ConversationMessage.id > last_id),
+            )
+        )
+    
+    messages = archived + (
+        query.order_by(ConversationMessage.created_at, ConversationMessage.id)
+        .limit(limit - len(archived))
+        .all()
+    )
+    set_next_cursor(response, messages, limit, "created_at", "id")
+    return messages
+
+@router.post("/{conversation_id}/messages", response_model=TurnResponse)
+async def add_message(
     conversation_id: int,
     message: MessageCreate,
     background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
+):
+    if idempotency_key is None:
+        return await run_in_threadpool(create_turn, conversation_id, message, background_tasks, db, current_user)
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    
+    key = (current_user.id, conversation_id, idempotency_key)
+    try:
+        is_owner, future = message_idempotency.begin(key, request_fingerprint(message.content))
+    except IdempotencyKeyMismatch:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    
+    if not is_owner:
+        # Repeats get the original's outcome, waiting for it while it is still in flight
+        if not future.done():
+            # asyncio.wait does not cancel the owner's future when it times out
+            await asyncio.wait({asyncio.wrap_future(future)}, timeout=IDEMPOTENCY_WAIT_SECONDS)
+        if not future.done():
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": str(IDEMPOTENCY_RETRY_AFTER_SECONDS)},
+            )
+        response.headers["Idempotent-Replayed"] = "true"
+        return future.result()
+    
+    return await run_in_threadpool(
+        create_owned_turn, key, future, conversation_id, message, background_tasks, db, current_user
+    )
+
+def create_owned_turn(key, future, conversation_id, message, background_tasks, db, current_user):
+    """create_turn for the owner of an idempotency key; resolves the key in the worker thread"""
+    try:
+        turn = create_turn(conversation_id, message, background_tasks, db, current_user)
+    except BaseException as exc:
+        message_idempotency.fail(key, future, exc)
+        raise
+    message_idempotency.complete(future, turn)
+    return turn
+
+def create_turn(
+    conversation_id: int,
+    message: MessageCreate,
+    background_tasks: BackgroundTasks,
+    db: Session,
+    current_user: User
 ):
     # Check if conversation exists and belongs to user
     conversation = (
@@ -169,49 +365,30 @@ def add_message(
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    # Create user message
-    db_message = ConversationMessage(
-        conversation_id=conversation_id,
-        role=MessageRole.USER,
-        content=message.content
-    )
-    
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    
-    # Get AI response
+    # Get AI response before writing, so no transaction is held open across the LLM call;
+    # respond() also adds both messages to the conversation memory
     chain = get_conversation_chain(conversation_id)
-    chain.add_message("user", message.content)
-    response = chain.get_response(message.content)
-    
-    # Save AI response
-    ai_message = ConversationMessage(
-        conversation_id=conversation_id,
-        role=MessageRole.ASSISTANT,
-        content=response
-    )
-    
-    db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
+    turn = chain.respond(message.content)
     
-    # Add to conversation memory
-    chain.add_message("assistant", response)
+    # Save both messages (and their CRM outbox rows) in one unit of work
+    user_message, ai_message = persist_turn(
+        db, conversation, message.content, turn.content, turn.model, turn.latency_ms
+    )
     
     # Schedule background task to save embeddings
-    background_tasks.add_task(save_conversation_embeddings, conversation_id, db)
+    background_tasks.add_task(save_conversation_embeddings, conversation_id)
     
-    return db_message
+    return {"user_message": user_message, "assistant_message": ai_message}
 
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_conversation(
     conversation_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     conversation = (
-        db.query(Conversation)
+        db.query(Conversation.id, Conversation.vector_id)
         .filter(Conversation.id == conversation_id, Conversation.user_id == current_user.id)
         .first()
     )
@@ -220,23 +397,14 @@ def delete_conversation(
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     # Delete conversation chain if exists
-    if conversation_id in active_conversations:
-        del active_conversations[conversation_id]
+    active_conversations.pop(conversation_id, None)
     
-    # Delete from database
-    db.delete(conversation)
+    # Bulk deletes: messages are never loaded, however long the conversation was
+    delete_conversations(db, Conversation.id == conversation_id)
     db.commit()
     
-    # Delete from vector database if it exists
+    # Delete from vector database after the response is sent
     if conversation.vector_id:
-        try:
-            client = get_qdrant_client()
-            client.delete(
-                collection_name="conversation_embeddings",
-                points_selector=[conversation.vector_id]
-            )
-        except Exception as e:
-            # Log the error but continue with deletion
-            print(f"Error deleting from vector DB: {e}")
+        background_tasks.add_task(delete_conversation_vectors, [conversation_id])
     
     return None
\ No newline at end of file
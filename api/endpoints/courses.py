@@ -1,21 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+from pydantic import BaseModel, Field, TypeAdapter
+import asyncio
+import codecs
+import os
+import queue
+import threading
 
-from db.utils.database import get_db
+from api.dependencies import get_db, get_read_db
+from db.utils.database import SessionLocal
 from models.course import Course
 from models.user import User
 from api.endpoints.auth import get_current_user
+from api.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, NUMBER, decode_cursor, next_cursor
+from services.cache.catalog_cache import course_catalog_cache
+from services.search.course_search import search_courses
+from services.catalog.bulk_import import CSV, NDJSON, import_courses
+from services.catalog.course_embeddings import embed_courses
+
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("COURSE_BULK_IMPORT_CHUNK_SIZE", "1000"))
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("COURSE_BULK_IMPORT_MAX_ERRORS", "1000"))
 
 router = APIRouter()
 
 # Pydantic models
+# String limits match the column lengths in models/course.py, so over-long
+# values are rejected as validation errors instead of failing the INSERT
 class CourseBase(BaseModel):
-    title: str
+    title: str = Field(max_length=255)
     description: str
-    category: str
-    difficulty_level: str
+    category: str = Field(max_length=100)
+    difficulty_level: str = Field(max_length=50)
     duration_hours: float
     price: float
 
@@ -24,19 +41,105 @@ class CourseCreate(CourseBase):
 
 class CourseResponse(CourseBase):
     id: int
-    instructor_id: int
+    # None once the instructor's account has been deleted
+    instructor_id: Optional[int] = None
     
     class Config:
         from_attributes = True
 
 class CourseUpdate(BaseModel):
-    title: Optional[str] = None
+    title: Optional[str] = Field(None, max_length=255)
     description: Optional[str] = None
-    category: Optional[str] = None
-    difficulty_level: Optional[str] = None
+    category: Optional[str] = Field(None, max_length=100)
+    difficulty_level: Optional[str] = Field(None, max_length=50)
     duration_hours: Optional[float] = None
     price: Optional[float] = None
 
+class CourseSearchResult(CourseResponse):
+    score: float
+
+class BulkRowError(BaseModel):
+    line: int
+    errors: Any
+
+class BulkImportResponse(BaseModel):
+    rows: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+    elapsed_seconds: float
+    rows_per_second: float
+    embeddings_queued: int
+
+course_adapter = TypeAdapter(CourseResponse)
+course_list_adapter = TypeAdapter(List[CourseResponse])
+search_result_adapter = TypeAdapter(List[CourseSearchResult])
+
+# Helper functions
+def to_json(adapter: TypeAdapter, value) -> bytes:
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+def cached_catalog_response(
+    request: Request,
+    db: Session,
+    key: Hashable,
+    loader: Callable[[Session], Tuple[bytes, Dict[str, str]]],
+):
+    """Serve a catalog read from the versioned cache, honouring If-None-Match"""
+    version = course_catalog_cache.current_version()
+    etag = course_catalog_cache.etag(version, key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    def build():
+        # A replica that has not applied this version yet would cache a pre-write body under it
+        if course_catalog_cache.version_in(db) >= version:
+            return loader(db)
+        with SessionLocal() as primary:
+            return loader(primary)
+    
+    body, extra_headers = course_catalog_cache.get_or_load(version, key, build)
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
+
+async def iter_body_lines(request: Request) -> AsyncIterator[List[str]]:
+    """Yield the request body as batches of complete lines (newline kept)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        parts = buffer.split("\n")
+        buffer = parts.pop()
+        if parts:
+            yield [part + "\n" for part in parts]
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield [buffer]
+
+def iter_queued_lines(lines_queue: queue.Queue) -> Iterator[str]:
+    while True:
+        batch = lines_queue.get()
+        if batch is None:
+            return
+        yield from batch
+
+def put_lines(lines_queue: queue.Queue, batch, consumer_done: threading.Event):
+    """Blocking put that gives up once the consumer has stopped reading"""
+    while not consumer_done.is_set():
+        try:
+            lines_queue.put(batch, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+def catalog_changed(db: Session):
+    """Commit a catalog write together with a version bump"""
+    version = course_catalog_cache.bump(db)
+    db.commit()
+    course_catalog_cache.advance(version)
+
 # Endpoints
 @router.post("/", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
 def create_course(
@@ -50,36 +153,122 @@ def create_course(
     )
     
     db.add(db_course)
-    db.commit()
+    catalog_changed(db)
     db.refresh(db_course)
     
     return db_course
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_courses(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    body_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Import courses from a streamed NDJSON (default) or CSV body"""
+    fmt = body_format or (CSV if "csv" in request.headers.get("content-type", "") else NDJSON)
+    
+    # The body is read on the event loop and handed to the importer thread
+    # through a bounded queue, so memory stays flat for large uploads
+    lines_queue: queue.Queue = queue.Queue(maxsize=16)
+    consumer_done = threading.Event()
+    
+    def consume():
+        try:
+            return import_courses(
+                db,
+                iter_queued_lines(lines_queue),
+                fmt,
+                instructor_id=current_user.id,
+                row_model=CourseCreate,
+                chunk_size=BULK_IMPORT_CHUNK_SIZE,
+                max_errors=BULK_IMPORT_MAX_ERRORS,
+            )
+        finally:
+            consumer_done.set()
+    
+    consumer = asyncio.ensure_future(run_in_threadpool(consume))
+    try:
+        async for lines in iter_body_lines(request):
+            if consumer_done.is_set():
+                break
+            await run_in_threadpool(put_lines, lines_queue, lines, consumer_done)
+    finally:
+        await run_in_threadpool(put_lines, lines_queue, None, consumer_done)
+    result = await consumer
+    
+    if result.inserted:
+        await run_in_threadpool(catalog_changed, db)
+        background_tasks.add_task(embed_courses, result.course_ids)
+    
+    return BulkImportResponse(
+        rows=result.rows,
+        inserted=result.inserted,
+        failed=result.failed,
+        errors=result.errors,
+        elapsed_seconds=round(result.elapsed, 3),
+        rows_per_second=round(result.rows_per_second, 1),
+        embeddings_queued=len(result.course_ids),
+    )
+
 @router.get("/", response_model=List[CourseResponse])
 def get_courses(
-    skip: int = 0, 
-    limit: int = 100,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     category: Optional[str] = None,
     difficulty: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Course)
+    def load(session: Session):
+        query = session.query(Course)
+        
+        # Apply filters if provided
+        if category:
+            query = query.filter(Course.category == category)
+        if difficulty:
+            query = query.filter(Course.difficulty_level == difficulty)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.filter(Course.id > last_id)
+        
+        courses = query.order_by(Course.id).limit(limit).all()
+        page_cursor = next_cursor(courses, limit, "id")
+        headers = {NEXT_CURSOR_HEADER: page_cursor} if page_cursor else {}
+        return to_json(course_list_adapter, courses), headers
     
-    # Apply filters if provided
-    if category:
-        query = query.filter(Course.category == category)
-    if difficulty:
-        query = query.filter(Course.difficulty_level == difficulty)
+    return cached_catalog_response(request, db, ("list", category, difficulty, cursor, limit), load)
+
+@router.get("/search", response_model=List[CourseSearchResult])
+def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Ranked full-text search over course titles and descriptions"""
+    def load(session: Session):
+        after = tuple(decode_cursor(cursor, NUMBER, int)) if cursor else None
+        results = search_courses(session, q, category=category, difficulty=difficulty, after=after, limit=limit)
+        page_cursor = next_cursor(results, limit, "score", "id")
+        headers = {NEXT_CURSOR_HEADER: page_cursor} if page_cursor else {}
+        return to_json(search_result_adapter, results), headers
     
-    courses = query.offset(skip).limit(limit).all()
-    return courses
+    return cached_catalog_response(request, db, ("search", q, category, difficulty, cursor, limit), load)
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def get_course_by_id(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if course is None:
-        raise HTTPException(status_code=404, detail="Course not found")
-    return course
+def get_course_by_id(course_id: int, request: Request, db: Session = Depends(get_read_db)):
+    def load(session: Session):
+        course = session.query(Course).filter(Course.id == course_id).first()
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        return to_json(course_adapter, course), {}
+    
+    return cached_catalog_response(request, db, ("course", course_id), load)
 
 @router.patch("/{course_id}", response_model=CourseResponse)
 def update_course(
@@ -101,7 +290,7 @@ def update_course(
     for key, value in update_data.items():
         setattr(db_course, key, value)
     
-    db.commit()
+    catalog_changed(db)
     db.refresh(db_course)
     
     return db_course
@@ -121,14 +310,18 @@ def delete_course(
         raise HTTPException(status_code=403, detail="Not authorized to delete this course")
     
     db.delete(db_course)
-    db.commit()
+    catalog_changed(db)
     
     return None
 
 @router.get("/instructor/{instructor_id}", response_model=List[CourseResponse])
 def get_instructor_courses(
     instructor_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_read_db)
 ):
-    courses = db.query(Course).filter(Course.instructor_id == instructor_id).all()
-    return courses
\ No newline at end of file
+    def load(session: Session):
+        courses = session.query(Course).filter(Course.instructor_id == instructor_id).order_by(Course.id).all()
+        return to_json(course_list_adapter, courses), {}
+    
+    return cached_catalog_response(request, db, ("instructor", instructor_id), load)
\ No newline at end of file
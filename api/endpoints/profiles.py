@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+from models.user import User
+from api.endpoints.auth import get_current_admin
+from services.observability.profiler import request_profiler
+
+router = APIRouter()
+
+# Pydantic models
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: str
+    status: Optional[int] = None
+    started_at: str
+    duration_ms: float
+    trigger: Optional[str] = None
+    samples: int
+    span_totals: Dict[str, float]
+
+# Helper functions
+def load_profile(profile_id: str) -> dict:
+    profile = request_profiler.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+# Endpoints
+@router.get("/", response_model=List[ProfileSummary])
+def list_profiles(
+    route: Optional[str] = None,
+    min_duration_ms: float = 0,
+    limit: int = 50,
+    current_user: User = Depends(get_current_admin)
+):
+    """Stored request profiles, newest first"""
+    profiles = [
+        profile for profile in request_profiler.store.list()
+        if (route is None or profile["route"] == route) and profile["duration_ms"] >= min_duration_ms
+    ]
+    return profiles[:limit]
+
+@router.get("/{profile_id}")
+def get_profile(profile_id: str, current_user: User = Depends(get_current_admin)):
+    """Full profile: span tree, per-kind totals and folded stacks"""
+    return load_profile(profile_id)
+
+@router.get("/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str, current_user: User = Depends(get_current_admin)):
+    """Stack samples in the folded format (flamegraph.pl, speedscope, inferno)"""
+    folded = load_profile(profile_id)["folded"]
+    return PlainTextResponse("".join(f"{stack} {count}\n" for stack, count in folded.items()))
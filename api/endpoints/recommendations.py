@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+from api.dependencies import get_read_db
+from models.user import User
+from models.course_recommendation import CourseRecommendation
+from api.endpoints.auth import get_current_user
+
+router = APIRouter()
+
+# Pydantic models
+class RecommendationResponse(BaseModel):
+    user_id: int
+    run_id: str
+    query: str
+    recommendations: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Helper functions
+def get_precomputed_recommendation(db: Session, user_id: int):
+    recommendation = (
+        db.query(CourseRecommendation)
+        .filter(CourseRecommendation.user_id == user_id)
+        .first()
+    )
+    if recommendation is None:
+        raise HTTPException(status_code=404, detail="No precomputed recommendations for this user")
+    return recommendation
+
+# Endpoints
+@router.get("/me", response_model=RecommendationResponse)
+def get_my_recommendations(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    return get_precomputed_recommendation(db, current_user.id)
+
+@router.get("/{user_id}", response_model=RecommendationResponse)
+def get_user_recommendations(
+    user_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Only allow users to read their own recommendations
+    if user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view these recommendations")
+    
+    return get_precomputed_recommendation(db, user_id)
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
-from db.utils.database import get_db
+from api.dependencies import get_db, get_read_db
 from models.user import User
-from api.endpoints.auth import get_password_hash, get_current_user
+from models.conversation import Conversation
+from api.endpoints.auth import get_password_hash, get_current_user, invalidate_principal
+from api.endpoints.conversations import active_conversations
+from api.pagination import MAX_PAGE_SIZE, decode_cursor, set_next_cursor
+from services.cache.catalog_cache import course_catalog_cache
+from services.conversations.deletion import delete_user_footprint, delete_user_vectors
 
 router = APIRouter()
 
@@ -54,18 +59,25 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[UserResponse])
 def get_users(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    query = db.query(User)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(User.id > last_id)
+    
+    users = query.order_by(User.id).limit(limit).all()
+    set_next_cursor(response, users, limit, "id")
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user_by_id(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -89,17 +101,22 @@ def update_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update user fields
+    previous_username = db_user.username
     for key, value in user_data.dict().items():
         setattr(db_user, key, value)
     
     db.commit()
     db.refresh(db_user)
     
+    invalidate_principal(previous_username)
+    invalidate_principal(db_user.username)
+    
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -107,11 +124,23 @@ def delete_user(
     if user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this user")
     
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = db.query(User.id, User.username).filter(User.id == user_id).first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.delete(db_user)
+    conversation_ids = [
+        conversation_id for (conversation_id,) in db.query(Conversation.id).filter(Conversation.user_id == user_id)
+    ]
+    # Conversations, messages, archives, CRM outbox rows and recommendations in a few bulk deletes
+    deleted = delete_user_footprint(db, user_id)
+    version = course_catalog_cache.bump(db) if deleted["courses"] else None
     db.commit()
+    if version:
+        course_catalog_cache.advance(version)
+    
+    for conversation_id in conversation_ids:
+        active_conversations.pop(conversation_id, None)
+    invalidate_principal(db_user.username)
+    background_tasks.add_task(delete_user_vectors, user_id)
     
     return None
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Startup, shutdown and readiness for the API process.
+
+The lifespan handler returns immediately so the worker can serve liveness
+checks while slow dependencies come up: the Qdrant collection check and the
+LLM client warm-up (which also imports LangChain) run concurrently in
+background threads, each with a timeout and retried until they succeed.
+``/health/ready`` reports ready only once every required component is.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from db.utils.database import engine
+from services.conversations.archive import CONVERSATION_ARCHIVE_ENABLED, ConversationArchiver
+from services.conversations.turn_writer import turn_writer
+from services.crm.outbox_flusher import CRM_OUTBOX_FLUSHER_ENABLED, OutboxFlusher
+from vector_db.utils.embeddings import close_embedding_provider
+
+load_dotenv()
+
+QDRANT_INIT_TIMEOUT = float(os.getenv("QDRANT_INIT_TIMEOUT", "10"))
+LLM_INIT_TIMEOUT = float(os.getenv("LLM_INIT_TIMEOUT", "30"))
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "15"))
+READINESS_DB_TIMEOUT = float(os.getenv("READINESS_DB_TIMEOUT", "2"))
+LLM_WARMUP_ENABLED = os.getenv("LLM_WARMUP_ENABLED", "True").lower() == "true"
+READINESS_REQUIRED = [
+    name.strip() for name in os.getenv("READINESS_REQUIRED", "database,qdrant,llm").split(",") if name.strip()
+]
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+outbox_flusher = OutboxFlusher()
+conversation_archiver = ConversationArchiver()
+
+# Component name -> {"status": ..., plus details}
+components: Dict[str, dict] = {}
+
+
+def init_qdrant():
+    from vector_db.qdrant_client import initialize_collection
+    
+    initialize_collection()
+
+
+def init_llm():
+    from chatbot.llm import warm_up
+    
+    if LLM_WARMUP_ENABLED:
+        timings = warm_up()
+        print(f"LLM clients warmed up: {', '.join(f'{step} {seconds:.2f}s' for step, seconds in timings.items())}")
+
+
+async def init_component(name: str, init, timeout: float):
+    """Run a blocking initializer off the event loop until it succeeds within ``timeout``"""
+    while True:
+        components[name] = {"status": STARTING}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(init), timeout)
+        except asyncio.TimeoutError:
+            components[name] = {"status": FAILED, "error": f"timed out after {timeout:.0f}s"}
+        except Exception as e:
+            components[name] = {"status": FAILED, "error": str(e)}
+        else:
+            components[name] = {"status": READY, "seconds": round(time.perf_counter() - started, 3)}
+            return
+        print(f"Startup of {name} failed ({components[name]['error']}), retrying in {STARTUP_RETRY_SECONDS:.0f}s")
+        await asyncio.sleep(STARTUP_RETRY_SECONDS)
+
+
+def ping_database():
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def check_database() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(ping_database), READINESS_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": FAILED, "error": f"timed out after {READINESS_DB_TIMEOUT:.0f}s"}
+    except Exception as e:
+        return {"status": FAILED, "error": str(e)}
+    return {"status": READY, "seconds": round(time.perf_counter() - started, 3)}
+
+
+async def readiness() -> tuple:
+    """(is_ready, component states) for the readiness probe"""
+    states = dict(components)
+    states["database"] = await check_database()
+    ready = all(states.get(name, {}).get("status") == READY for name in READINESS_REQUIRED)
+    return ready, states
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if CRM_OUTBOX_FLUSHER_ENABLED:
+        outbox_flusher.start()
+    if CONVERSATION_ARCHIVE_ENABLED:
+        conversation_archiver.start()
+    init_tasks = [
+        asyncio.create_task(init_component("qdrant", init_qdrant, QDRANT_INIT_TIMEOUT)),
+        asyncio.create_task(init_component("llm", init_llm, LLM_INIT_TIMEOUT)),
+    ]
+    
+    yield
+    
+    for task in init_tasks:
+        task.cancel()
+    outbox_flusher.stop()
+    conversation_archiver.stop()
+    close_embedding_provider()
+    # Commit turns still waiting for a group commit
+    turn_writer.stop()
@@ -1,5 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import os
 from dotenv import load_dotenv
 
@@ -7,14 +8,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import routers
-from api.endpoints import users, courses, conversations, aut
-from vector_db.qdrant_client import initialize_collection
+from api.endpoints import users, courses, conversations, conversation_socket, auth, recommendations, profiles
+from api.lifecycle import lifespan, readiness
+from services.observability import metrics
+from services.observability.profiler import PROFILER_ENABLED, ProfilerMiddleware
+from services.ai.llm_gateway import LLMOverloaded
 
 # Create FastAPI app
 app = FastAPI(
     title="Educational AI Agent API",
     description="API for AI agent integration with Laravel-based CRM",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -26,26 +31,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in: profile requests slower than PROFILER_THRESHOLD_MS or a PROFILER_SAMPLE_RATE fraction
+if PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(courses.router, prefix="/courses", tags=["Courses"])
 app.include_router(conversations.router, prefix="/conversations", tags=["Conversations"])
+app.include_router(conversation_socket.router, prefix="/conversations", tags=["Conversations"])
+app.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
+app.include_router(profiles.router, prefix="/admin/profiles", tags=["Admin"])
 
-@app.on_event("startup")
-def startup_db_client():
-    """Initialize vector database on startup"""
-    initialize_collection()
+@app.exception_handler(LLMOverloaded)
+def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    """Shed load quickly when the LLM gateway cannot admit a call"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "The assistant is busy, please retry shortly"},
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Educational AI Agent API"}
 
 @app.get("/health")
+@app.get("/health/live")
 def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up and serving; no dependency checks"""
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: database reachable and Qdrant / LLM clients initialized"""
+    ready, components = await readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "components": components},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+# Keyset pagination: list endpoints return at most `limit` rows ordered by an
+# indexed sort key and, when more rows may follow, an opaque cursor in this
+# header. Pass it back as `?cursor=` to fetch the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+# Sort-key types for ``decode_cursor``
+NULLABLE_DATETIME = (datetime, type(None))
+NUMBER = (int, float)
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value)!r} in a cursor")
+
+
+def _object_hook(value: dict):
+    if "__dt__" in value:
+        parsed = datetime.fromisoformat(value["__dt__"])
+        # Stored timestamps are naive UTC; an aware value would not compare with them
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> List[Any]:
+    """Decode a cursor produced by ``encode_cursor``; one ``isinstance`` type spec per sort-key value
+    
+    Clients can send anything, so a cursor whose values do not have the
+    expected types is rejected with 400 rather than reaching a comparison.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()), object_hook=_object_hook)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass but never a sort key
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def next_cursor(rows: Sequence, limit: int, *keys: str) -> Optional[str]:
+    """Cursor for the page after ``rows``, None if the page was not full"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(*(last[key] for key in keys))
+    return encode_cursor(*(getattr(last, key) for key in keys))
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, *keys: str):
+    """Expose the cursor for the page after ``rows`` if the page was full"""
+    cursor = next_cursor(rows, limit, *keys)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,64 @@
+"""Authenticated endpoint throughput with and without the principal cache.
+
+Usage:
+    python -m benchmarks.bench_auth_cache [--requests 2000] [--concurrency 8]
+"""
+import argparse
+
+from benchmarks.common import configure_sqlite, create_schema, measure, print_result
+
+configure_sqlite("auth_cache")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.endpoints import auth
+from db.utils.database import SessionLocal
+from models.user import User
+
+
+def build_client():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    return TestClient(app)
+
+
+def create_user():
+    with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", hashed_password="unused")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return auth.create_access_token({"sub": user.username, "uid": user.id, "email": user.email})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    
+    create_schema()
+    token = create_user()
+    client = build_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    def call():
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 200, response.text
+    
+    modes = [
+        ("no cache (SELECT per request)", 0, False),
+        ("principal cache", 30, False),
+        ("stateless claims", 0, True),
+    ]
+    for label, ttl, stateless in modes:
+        auth.PRINCIPAL_CACHE_TTL_SECONDS = ttl
+        auth.AUTH_STATELESS = stateless
+        auth.principal_cache.clear()
+        call()  # warm up
+        print_result(label, measure(call, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Per-turn server overhead: REST chat turns vs the conversation WebSocket.
+
+Boots uvicorn (SQLite, embedded Qdrant, the OpenAI and CRM stubs) and has
+``--concurrency`` clients each run ``--turns`` sequential turns in their own
+conversation, once as POST /conversations/{id}/messages on a keep-alive
+connection and once over /conversations/{id}/ws. With the stub answering
+instantly, turn latency is almost entirely server overhead (auth, ownership
+query, chain lookup, message write). The WebSocket run also reports time to
+the first token frame; use --tokens-per-second to see streaming matter.
+
+Usage:
+    python -m benchmarks.bench_chat_websocket [--turns 200] [--concurrency 8] [--tokens-per-second 0]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.bench_startup import free_port, wait_for
+from benchmarks.common import configure_sqlite, create_schema, print_result, summarize
+
+configure_sqlite("chat_websocket")
+
+import httpx
+from websockets.sync.client import connect
+
+from api.endpoints.auth import create_access_token
+from benchmarks.fakes.crm_stub import StubCRM
+from benchmarks.fakes.openai_stub import StubOpenAI
+from db.utils.database import SessionLocal
+from models.conversation import Conversation
+from models.user import User
+
+
+def seed(clients: int):
+    with SessionLocal() as db:
+        db.bulk_insert_mappings(User, [
+            {"id": i, "username": f"ws{i}", "email": f"ws{i}@example.com", "hashed_password": "x", "is_active": True}
+            for i in range(1, clients + 1)
+        ])
+        # Two conversations per user: one for each transport
+        db.bulk_insert_mappings(Conversation, [
+            {"id": i, "user_id": (i - 1) % clients + 1, "title": f"Chat {i}"} for i in range(1, 2 * clients + 1)
+        ])
+        db.commit()
+
+
+def token_for(user_id: int) -> str:
+    return create_access_token({"sub": f"ws{user_id}"})
+
+
+def rest_client(base_url: str, user_id: int, conversation_id: int, turns: int, latencies: list):
+    with httpx.Client(base_url=base_url, timeout=60, headers={"Authorization": f"Bearer {token_for(user_id)}"}) as http:
+        for turn in range(turns):
+            started = time.perf_counter()
+            response = http.post(f"/conversations/{conversation_id}/messages", json={"content": f"Question {turn}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+
+def ws_client(ws_url: str, user_id: int, conversation_id: int, turns: int, latencies: list, first_tokens: list):
+    with connect(f"{ws_url}/conversations/{conversation_id}/ws?token={token_for(user_id)}") as socket:
+        assert json.loads(socket.recv())["type"] == "ready"
+        for turn in range(turns):
+            started = time.perf_counter()
+            first_token = None
+            socket.send(json.dumps({"type": "message", "content": f"Question {turn}"}))
+            while True:
+                frame = json.loads(socket.recv())
+                if frame["type"] == "token" and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif frame["type"] == "done":
+                    break
+                elif frame["type"] == "error":
+                    raise RuntimeError(frame["detail"])
+            latencies.append(time.perf_counter() - started)
+            first_tokens.append(first_token or latencies[-1])
+
+
+def run(target, clients: list) -> float:
+    threads = [threading.Thread(target=target, args=args) for args in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="REST vs WebSocket chat turn overhead")
+    parser.add_argument("--turns", type=int, default=200, help="Turns per client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub streaming speed (0 = instant)")
+    args = parser.parse_args()
+
+    create_schema()
+    seed(args.concurrency)
+    openai_stub = StubOpenAI(tokens_per_second=args.tokens_per_second).start()
+    crm_stub = StubCRM().start()
+    env = dict(
+        os.environ,
+        QDRANT_LOCATION=":memory:",
+        OPENAI_BASE_URL=openai_stub.base_url,
+        LARAVEL_CRM_BASE_URL=crm_stub.base_url,
+        LLM_GATEWAY_TOKENS_PER_MINUTE="0",
+    )
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base_url}/health/ready", time.perf_counter() + 120)
+        # Warm both paths (chains, pooled LLM connections, principal cache)
+        rest_client(base_url, 1, 1, 5, [])
+        ws_client(f"ws://127.0.0.1:{port}", 1, args.concurrency + 1, 5, [], [])
+
+        rest_latencies = []
+        elapsed = run(rest_client, [
+            (base_url, user_id, user_id, args.turns, rest_latencies) for user_id in range(1, args.concurrency + 1)
+        ])
+        print_result("REST POST /messages", summarize(rest_latencies, elapsed))
+
+        ws_latencies, first_tokens = [], []
+        elapsed = run(ws_client, [
+            (f"ws://127.0.0.1:{port}", user_id, args.concurrency + user_id, args.turns, ws_latencies, first_tokens)
+            for user_id in range(1, args.concurrency + 1)
+        ])
+        print_result("WebSocket turn", summarize(ws_latencies, elapsed))
+        print_result("WebSocket first token", summarize(first_tokens, elapsed))
+    finally:
+        server.terminate()
+        server.wait(10)
+        openai_stub.stop()
+        crm_stub.stop()
+    print(f"LLM requests served by the stub: {openai_stub.requests}")
+
+
+if __name__ == "__main__":
+    main()
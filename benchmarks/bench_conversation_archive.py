@@ -0,0 +1,229 @@
+"""Hot-table footprint and read latency before and after archiving idle conversations.
+
+Seeds ``--messages`` messages, most of them in conversations idle for longer
+than the archive threshold, then runs one archive pass. Reports the size of
+``conversation_messages`` and its indexes (SQLite dbstat), the archive size
+and compression ratio, and read latency for recent and archived
+conversations before and after.
+
+On MySQL (set BENCH_DATABASE_URL) the InnoDB buffer-pool hit rate over each
+read phase is read from Innodb_buffer_pool_read_requests / _reads. SQLite has
+no equivalent counter, so the share of the hot table and indexes that fits in
+its page cache is printed instead, labelled as a proxy.
+
+Usage:
+    python -m benchmarks.bench_conversation_archive [--messages 10000000] [--per-conversation 20]
+        [--recent-fraction 0.1] [--reads 2000]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_sqlite, create_schema, print_result, summarize
+
+if os.getenv("BENCH_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+else:
+    configure_sqlite("conversation_archive")
+
+from sqlalchemy import func, insert, text
+
+from db.utils.database import SessionLocal, engine
+from models.conversation import Conversation
+from models.conversation_archive import ConversationArchive
+from models.conversation_message import ConversationMessage, MessageRole
+from models.user import User
+from services.conversations.archive import archive_idle_conversations, conversation_messages
+
+IDLE_DAYS = 90
+INSERT_BATCH = 20000
+WORDS = (
+    "course enrollment schedule tuition deadline module assignment credit transcript advisor "
+    "semester prerequisite certificate online campus lecture exam grade refund scholarship "
+    "python data science marketing finance design leadership project management cloud"
+).split()
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 40))).capitalize() + "."
+
+
+def seed(messages: int, per_conversation: int, recent_fraction: float, users: int = 100) -> tuple:
+    """Insert the dataset; returns (recent conversation ids, idle conversation ids)"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    conversations = max(1, messages // per_conversation)
+    recent_every = max(1, round(1 / recent_fraction)) if recent_fraction else 0
+    recent, idle = [], []
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": i, "email": f"archive{i}@example.com", "username": f"archive{i}", "hashed_password": "x"}
+            for i in range(1, users + 1)
+        ])
+        connection.execute(insert(Conversation), [
+            {"id": i, "user_id": i % users + 1, "title": f"Conversation {i}"}
+            for i in range(1, conversations + 1)
+        ])
+
+    rows = []
+    message_id = 0
+    for conversation_id in range(1, conversations + 1):
+        is_recent = recent_every and conversation_id % recent_every == 0
+        (recent if is_recent else idle).append(conversation_id)
+        age = timedelta(days=rng.uniform(0, 10) if is_recent else rng.uniform(IDLE_DAYS + 10, 720))
+        started_at = now - age
+        for turn in range(per_conversation):
+            message_id += 1
+            rows.append({
+                "id": message_id,
+                "conversation_id": conversation_id,
+                "role": MessageRole.USER if turn % 2 == 0 else MessageRole.ASSISTANT,
+                "content": sentence(rng),
+                "model": None if turn % 2 == 0 else "gpt-4o-mini",
+                "latency_ms": None if turn % 2 == 0 else rng.randint(300, 4000),
+                "created_at": started_at + timedelta(seconds=30 * turn),
+            })
+            if len(rows) >= INSERT_BATCH:
+                with engine.begin() as connection:
+                    connection.execute(insert(ConversationMessage), rows)
+                rows = []
+    if rows:
+        with engine.begin() as connection:
+            connection.execute(insert(ConversationMessage), rows)
+    return recent, idle
+
+
+def table_sizes() -> dict:
+    """Bytes per table/index touching conversation messages, plus the freelist"""
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            sizes = dict(connection.execute(text(
+                "SELECT dbstat.name, SUM(dbstat.pgsize) FROM dbstat "
+                "JOIN sqlite_master ON sqlite_master.name = dbstat.name "
+                "WHERE sqlite_master.tbl_name IN ('conversation_messages', 'conversation_archives') "
+                "GROUP BY dbstat.name"
+            )).all())
+            page_size = connection.execute(text("PRAGMA page_size")).scalar()
+            sizes["(freelist)"] = connection.execute(text("PRAGMA freelist_count")).scalar() * page_size
+            return sizes
+        if engine.dialect.name == "mysql":
+            rows = connection.execute(text(
+                "SELECT table_name, data_length, index_length FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() "
+                "AND table_name IN ('conversation_messages', 'conversation_archives')"
+            )).all()
+            sizes = {}
+            for name, data_length, index_length in rows:
+                sizes[name] = data_length
+                sizes[f"{name} (indexes)"] = index_length
+            return sizes
+    return {}
+
+
+def hot_bytes(sizes: dict) -> int:
+    return sum(size for name, size in sizes.items() if "archive" not in name and name != "(freelist)")
+
+
+def print_sizes(label: str, sizes: dict):
+    print(f"\n{label}")
+    for name, size in sorted(sizes.items()):
+        print(f"  {name:<58} {size / 1024 / 1024:>10.1f} MiB")
+    print(f"  {'hot table + indexes':<58} {hot_bytes(sizes) / 1024 / 1024:>10.1f} MiB")
+
+
+def buffer_pool_counters():
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as connection:
+        status = dict(connection.execute(text(
+            "SHOW GLOBAL STATUS WHERE Variable_name IN "
+            "('Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_reads')"
+        )).all())
+    return int(status["Innodb_buffer_pool_read_requests"]), int(status["Innodb_buffer_pool_reads"])
+
+
+def print_cache_fit(sizes: dict):
+    if engine.dialect.name == "mysql":
+        return
+    with engine.connect() as connection:
+        cache_size = connection.execute(text("PRAGMA cache_size")).scalar()
+        page_size = connection.execute(text("PRAGMA page_size")).scalar()
+    cache_bytes = -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+    share = min(1.0, cache_bytes / hot_bytes(sizes)) if hot_bytes(sizes) else 1.0
+    print(f"  page-cache fit (proxy for buffer-pool hit rate, {cache_bytes / 1024 / 1024:.0f} MiB cache): "
+          f"{share:.1%} of the hot table and indexes")
+
+
+def read_phase(label: str, conversation_ids: list, reads: int):
+    rng = random.Random(7)
+    latencies = []
+    before = buffer_pool_counters()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        for _ in range(reads):
+            conversation_id = rng.choice(conversation_ids)
+            read_started = time.perf_counter()
+            conversation = db.get(Conversation, conversation_id)
+            assert conversation_messages(db, conversation)
+            latencies.append(time.perf_counter() - read_started)
+            db.expunge_all()
+    print_result(label, summarize(latencies, time.perf_counter() - started))
+    after = buffer_pool_counters()
+    if before and after:
+        requests, disk_reads = after[0] - before[0], after[1] - before[1]
+        print(f"  buffer-pool hit rate {1 - disk_reads / requests if requests else 1:.4%} "
+              f"({requests} read requests, {disk_reads} from disk)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation archiving footprint and read latency")
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--per-conversation", type=int, default=20)
+    parser.add_argument("--recent-fraction", type=float, default=0.1)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    create_schema()
+    started = time.perf_counter()
+    recent, idle = seed(args.messages, args.per_conversation, args.recent_fraction)
+    print(f"seeded {args.messages} messages in {len(recent) + len(idle)} conversations "
+          f"({len(recent)} recent, {len(idle)} idle > {IDLE_DAYS} days) in {time.perf_counter() - started:.1f}s")
+
+    sizes = table_sizes()
+    print_sizes("before archiving", sizes)
+    print_cache_fit(sizes)
+    print()
+    if recent:
+        read_phase("recent conversation, all hot", recent, args.reads)
+    if idle:
+        read_phase("idle conversation, all hot", idle, args.reads)
+
+    started = time.perf_counter()
+    stats = archive_idle_conversations(idle_days=IDLE_DAYS)
+    elapsed = time.perf_counter() - started
+    print(f"\narchive pass: {stats['conversations']} conversations, {stats['messages']} messages "
+          f"in {elapsed:.1f}s ({stats['messages'] / elapsed if elapsed else 0:,.0f} messages/s)")
+
+    with SessionLocal() as db:
+        raw, compressed = db.query(
+            func.sum(ConversationArchive.raw_bytes), func.sum(func.length(ConversationArchive.payload))
+        ).one()
+    if compressed:
+        print(f"archived payload: {raw / 1024 / 1024:.1f} MiB JSON -> {compressed / 1024 / 1024:.1f} MiB zlib "
+              f"(ratio {raw / compressed:.2f}x)")
+
+    sizes = table_sizes()
+    print_sizes("after archiving", sizes)
+    print_cache_fit(sizes)
+    print()
+    if recent:
+        read_phase("recent conversation, hot", recent, args.reads)
+    if idle:
+        read_phase("idle conversation, archived", idle, args.reads)
+
+
+if __name__ == "__main__":
+    main()
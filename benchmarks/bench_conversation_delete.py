@@ -0,0 +1,130 @@
+"""DELETE /conversations/{id} and DELETE /users/{id}: ORM cascade vs bulk deletes.
+
+For conversations of growing length, times the previous path (``db.delete``
+with the ORM cascade, which loads every message and deletes them row by row)
+against the set-based ``delete_conversations``, and counts the statements
+each issues. Then deletes a user with many conversations through
+``delete_user_footprint``.
+
+Usage:
+    python -m benchmarks.bench_conversation_delete [--sizes 100,1000,10000] [--user-conversations 500]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, insert
+
+from benchmarks.common import configure_sqlite, create_schema
+
+configure_sqlite("conversation_delete")
+
+from db.utils.database import SessionLocal, engine
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from models.crm_outbox import CrmOutbox
+from models.user import User
+from services.conversations.deletion import delete_conversations, delete_user_footprint
+
+statements = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+class Seeder:
+    def __init__(self):
+        self.conversation_id = 0
+        self.message_id = 0
+
+    def conversation(self, user_id: int, messages: int) -> int:
+        self.conversation_id += 1
+        started_at = datetime.utcnow() - timedelta(days=1)
+        rows = []
+        for turn in range(messages):
+            self.message_id += 1
+            rows.append({
+                "id": self.message_id,
+                "conversation_id": self.conversation_id,
+                "role": MessageRole.USER if turn % 2 == 0 else MessageRole.ASSISTANT,
+                "content": f"Message {turn} about course enrollment and schedules",
+                "created_at": started_at + timedelta(seconds=turn),
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(Conversation), [{"id": self.conversation_id, "user_id": user_id, "title": "t"}])
+            if rows:
+                connection.execute(insert(ConversationMessage), rows)
+                # A few messages still waiting for the CRM, as in production
+                connection.execute(insert(CrmOutbox), [
+                    {"message_id": row["id"], "conversation_id": self.conversation_id, "payload": "{}"}
+                    for row in rows[-4:]
+                ])
+        return self.conversation_id
+
+
+def timed(fn) -> tuple:
+    global statements
+    statements = 0
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000, statements
+
+
+def orm_delete(conversation_id: int):
+    with SessionLocal() as db:
+        db.delete(db.get(Conversation, conversation_id))
+        db.query(CrmOutbox).filter(CrmOutbox.conversation_id == conversation_id).delete()
+        db.commit()
+
+
+def bulk_delete(conversation_id: int):
+    with SessionLocal() as db:
+        delete_conversations(db, Conversation.id == conversation_id)
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation and user deletion cost")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Messages per deleted conversation")
+    parser.add_argument("--user-conversations", type=int, default=500)
+    parser.add_argument("--messages-per-conversation", type=int, default=20)
+    args = parser.parse_args()
+
+    create_schema()
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": i, "email": f"delete{i}@example.com", "username": f"delete{i}", "hashed_password": "x"}
+            for i in (1, 2)
+        ])
+    seeder = Seeder()
+    # Unrelated rows so the deletes run against a non-trivial table
+    for _ in range(200):
+        seeder.conversation(1, 50)
+
+    print(f"{'messages':>9} {'ORM cascade':>14} {'stmts':>7} {'bulk delete':>14} {'stmts':>7}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        orm_ms, orm_statements = timed(lambda: orm_delete(seeder.conversation(1, size)))
+        conversation_id = seeder.conversation(1, size)
+        bulk_ms, bulk_statements = timed(lambda: bulk_delete(conversation_id))
+        print(f"{size:>9} {orm_ms:>11.1f} ms {orm_statements:>7} {bulk_ms:>11.1f} ms {bulk_statements:>7}")
+
+    for _ in range(args.user_conversations):
+        seeder.conversation(2, args.messages_per_conversation)
+    with SessionLocal() as db:
+        deleted = {}
+
+        def delete_user():
+            deleted.update(delete_user_footprint(db, 2))
+            db.commit()
+
+        elapsed_ms, user_statements = timed(delete_user)
+        remaining = db.query(func.count(ConversationMessage.id)).scalar()
+    print(f"\ndelete_user_footprint: {elapsed_ms:.1f} ms, {user_statements} statements, deleted {deleted}")
+    print(f"messages left from other users: {remaining}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Throughput of POST /courses/bulk for streamed NDJSON and CSV bodies.
+
+Embedding is replaced by a no-op so the run stays offline.
+
+Usage:
+    python -m benchmarks.bench_course_bulk_import [--rows 50000]
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from benchmarks.common import configure_sqlite, create_schema
+
+configure_sqlite("course_bulk_import")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.endpoints import auth, courses
+from db.utils.database import SessionLocal
+from models.user import User
+
+FIELDS = ["title", "description", "category", "difficulty_level", "duration_hours", "price"]
+
+
+def make_rows(count: int, invalid_every: int):
+    for i in range(count):
+        row = {
+            "title": f"Partner course {i}",
+            "description": f"Imported partner course number {i} with a reasonably long description.",
+            "category": ("data", "web", "business")[i % 3],
+            "difficulty_level": ("beginner", "advanced")[i % 2],
+            "duration_hours": 12.5,
+            "price": 49.0,
+        }
+        if invalid_every and i % invalid_every == 0:
+            row["price"] = "not-a-number"
+        yield row
+
+
+def ndjson_body(rows):
+    for row in rows:
+        yield (json.dumps(row) + "\n").encode()
+
+
+def csv_body(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk course import throughput")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--invalid-every", type=int, default=1000, help="Make every Nth row invalid (0 = none)")
+    args = parser.parse_args()
+    
+    create_schema()
+    with SessionLocal() as db:
+        db.add(User(id=1, username="partner", email="partner@example.com", hashed_password="x"))
+        db.commit()
+    
+    courses.embed_courses = lambda course_ids: None
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+    client = TestClient(app)
+    token = auth.create_access_token({"sub": "partner", "uid": 1, "email": "partner@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    for label, body, content_type in [
+        ("ndjson", ndjson_body, "application/x-ndjson"),
+        ("csv", csv_body, "text/csv"),
+    ]:
+        started = time.perf_counter()
+        response = client.post(
+            "/courses/bulk",
+            content=body(make_rows(args.rows, args.invalid_every)),
+            headers={**headers, "Content-Type": content_type},
+        )
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.text
+        result = response.json()
+        print(f"{label:<8} {result['inserted']} inserted, {result['failed']} rejected, "
+              f"server {result['rows_per_second']:.0f} rows/s, end-to-end {args.rows / elapsed:.0f} rows/s")
+        if result["errors"]:
+            print(f"         first error: {result['errors'][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Course endpoint throughput with and without the versioned catalog cache.
+
+Usage:
+    python -m benchmarks.bench_course_catalog [--requests 2000] [--courses 5000]
+"""
+import argparse
+
+from benchmarks.common import configure_sqlite, create_schema, measure, print_result
+
+configure_sqlite("course_catalog")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.endpoints import auth, courses
+from db.utils.database import SessionLocal
+from models.user import User
+from models.course import Course
+from models.catalog_version import CatalogVersion
+from services.cache.catalog_cache import course_catalog_cache
+
+
+def seed(course_count: int):
+    with SessionLocal() as db:
+        db.add(User(id=1, username="instructor", email="instructor@example.com", hashed_password="x"))
+        db.add(CatalogVersion(name="courses", version=0))
+        db.bulk_insert_mappings(Course, [
+            {
+                "id": i, "title": f"Course {i}", "description": "A seeded course description " * 5,
+                "instructor_id": 1, "category": ("data", "web", "design")[i % 3],
+                "difficulty_level": ("beginner", "advanced")[i % 2], "duration_hours": 10, "price": 99,
+            }
+            for i in range(1, course_count + 1)
+        ])
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Course catalog cache throughput")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=5000)
+    args = parser.parse_args()
+    
+    create_schema()
+    seed(args.courses)
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+    client = TestClient(app)
+    
+    paths = ["/courses/?limit=100", "/courses/?category=data&limit=50", "/courses/42", "/courses/instructor/1"]
+    counter = iter(range(10 ** 9))
+    
+    def request():
+        response = client.get(paths[next(counter) % len(paths)])
+        assert response.status_code == 200, response.text
+    
+    etags = {path: client.get(path).headers["ETag"] for path in paths}
+    
+    def conditional_request():
+        path = paths[next(counter) % len(paths)]
+        response = client.get(path, headers={"If-None-Match": etags[path]})
+        assert response.status_code == 304, response.status_code
+    
+    course_catalog_cache.enabled = False
+    print_result("no cache", measure(request, args.requests, args.concurrency))
+    course_catalog_cache.enabled = True
+    print_result("catalog cache", measure(request, args.requests, args.concurrency))
+    print_result("catalog cache + If-None-Match", measure(conditional_request, args.requests, args.concurrency))
+    
+    token = auth.create_access_token({"sub": "instructor", "uid": 1, "email": "instructor@example.com"})
+    client.patch("/courses/42", json={"price": 5}, headers={"Authorization": f"Bearer {token}"})
+    refreshed = client.get("/courses/42", headers={"If-None-Match": etags["/courses/42"]})
+    print(f"after update: status {refreshed.status_code}, price {refreshed.json()['price']}")
+
+
+if __name__ == "__main__":
+    main()
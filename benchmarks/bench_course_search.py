@@ -0,0 +1,95 @@
+"""Full-text course search latency over a large synthetic catalog (SQLite FTS5).
+
+Usage:
+    python -m benchmarks.bench_course_search [--courses 100000] [--requests 500]
+"""
+import argparse
+import random
+
+from benchmarks.common import configure_sqlite, create_schema, measure, print_result
+
+configure_sqlite("course_search")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.endpoints import courses
+from db.utils.database import SessionLocal, engine
+from models.user import User
+from models.course import Course
+from services.cache.catalog_cache import course_catalog_cache
+from db.utils.fulltext import ensure_sqlite_fts
+
+TOPICS = (
+    "python data science machine learning web development design marketing finance "
+    "leadership cloud security analytics statistics javascript react sql excel writing "
+    "photography management agile product strategy networking devops kubernetes"
+).split()
+
+
+def build_vocabulary(rng: random.Random, size: int = 20000):
+    """Topic words plus filler terms, sampled with Zipf-like weights"""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = {"".join(rng.choices(letters, k=rng.randint(4, 9))) for _ in range(size)}
+    filler = sorted(filler - set(TOPICS))
+    # Topic words sit in the upper-middle of the frequency range, so a query
+    # matches a few percent of the catalog rather than nearly all of it
+    words = filler[:50] + TOPICS + filler[50:]
+    cumulative, total = [], 0.0
+    for rank in range(len(words)):
+        total += 1.0 / (rank + 1)
+        cumulative.append(total)
+    return words, cumulative
+
+
+def seed(course_count: int, rng: random.Random):
+    words, cum_weights = build_vocabulary(rng)
+    with SessionLocal() as db:
+        db.add(User(id=1, username="instructor", email="instructor@example.com", hashed_password="x"))
+        batch = []
+        for i in range(1, course_count + 1):
+            batch.append({
+                "id": i,
+                "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=4)).title(),
+                "description": " ".join(rng.choices(words, cum_weights=cum_weights, k=40)),
+                "instructor_id": 1, "category": rng.choice(["data", "web", "business"]),
+                "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]),
+                "duration_hours": rng.randint(1, 60), "price": rng.randint(0, 300),
+            })
+            if len(batch) == 10000:
+                db.bulk_insert_mappings(Course, batch)
+                batch = []
+        db.bulk_insert_mappings(Course, batch)
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text course search latency")
+    parser.add_argument("--courses", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    create_schema()
+    ensure_sqlite_fts(engine)
+    seed(args.courses, rng)
+    
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+    client = TestClient(app)
+    course_catalog_cache.enabled = False
+    
+    def search():
+        q = " ".join(rng.sample(TOPICS, 2))
+        response = client.get("/courses/search", params={"q": q, "limit": 20})
+        assert response.status_code == 200, response.text
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor:
+            page = client.get("/courses/search", params={"q": q, "limit": 20, "cursor": cursor})
+            assert page.status_code == 200, page.text
+    
+    print_result(f"search + next page ({args.courses} courses)", measure(search, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""CRM sync cost through the outbox: requests per message against a stub CRM.
+
+Seeds conversation messages with outbox rows, then drains the outbox into a
+local stub CRM that fails a share of batches. Every message must arrive
+exactly once and the number of CRM requests should track the number of
+batches, not messages.
+
+Usage:
+    python -m benchmarks.bench_crm_outbox [--messages 20000] [--batch-size 500] [--failure-rate 0.2]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import configure_sqlite, create_schema
+from benchmarks.fakes.crm_stub import StubCRM
+
+configure_sqlite("crm_outbox")
+
+from db.utils.database import SessionLocal
+from models.user import User
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from models.crm_outbox import CrmOutbox
+from services.crm.crm_client import CRMClient
+from services.crm.outbox import enqueue_messages
+from services.crm.outbox_flusher import OutboxFlusher
+
+
+def seed(message_count: int):
+    with SessionLocal() as db:
+        db.add(User(id=1, username="learner", email="learner@example.com", hashed_password="x"))
+        conversation = Conversation(id=1, user_id=1, title="Outbox benchmark")
+        db.add(conversation)
+        for start in range(0, message_count, 1000):
+            messages = [
+                ConversationMessage(conversation_id=1, role=MessageRole.USER, content=f"Message {i} " * 10)
+                for i in range(start, min(message_count, start + 1000))
+            ]
+            db.add_all(messages)
+            db.flush()
+            enqueue_messages(db, conversation, messages)
+            db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM outbox batching against a stub CRM")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    
+    create_schema()
+    seed(args.messages)
+    
+    stub = StubCRM(failure_rate=args.failure_rate, seed=1).start()
+    os.environ["LARAVEL_CRM_BASE_URL"] = stub.base_url
+    flusher = OutboxFlusher(crm_client=CRMClient(), batch_size=args.batch_size, max_backoff=0.05)
+    
+    started = time.perf_counter()
+    while True:
+        flusher.drain()
+        with SessionLocal() as db:
+            remaining = db.query(CrmOutbox).count()
+        if not remaining:
+            break
+        time.sleep(0.05)  # wait out the retry backoff
+    elapsed = time.perf_counter() - started
+    stub.stop()
+    
+    print(f"messages: {args.messages}, delivered: {len(stub.message_ids)}, duplicates: {stub.duplicate_messages}")
+    print(f"CRM requests: {stub.requests} ({stub.sync_batches} batches, {stub.failed_batches} failed and retried)")
+    print(f"requests per message: {stub.requests / args.messages:.4f}")
+    print(f"payload: {stub.raw_bytes / 1e6:.1f} MB raw, {stub.compressed_bytes / 1e6:.2f} MB gzip")
+    print(f"drained in {elapsed:.2f}s ({args.messages / elapsed:.0f} messages/s)")
+    assert len(stub.message_ids) == args.messages and stub.duplicate_messages == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Sync vs async engine on the conversation read queries.
+
+Seeds a SQLite database and runs the queries behind GET /conversations and
+GET /conversations/{id}/messages concurrently, once through the sync engine on
+a thread pool (how FastAPI runs `def` endpoints) and once through the async
+engine on the event loop. Prints throughput and the pool metrics.
+
+Then boots uvicorn and measures the endpoints themselves: GET /conversations
+is served from the async engine, GET /conversations/{id}/messages from the
+sync engine in the threadpool.
+
+Usage:
+    python -m benchmarks.bench_db_engines [--requests 2000] [--concurrency 16] [--no-endpoints]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.bench_startup import free_port, wait_for
+from benchmarks.common import configure_sqlite, create_schema, measure, print_result, summarize
+
+configure_sqlite("db_engines")
+
+import httpx
+from sqlalchemy import select
+
+from api.endpoints.auth import create_access_token
+from db.utils.database import SessionLocal, engine, get_async_engine, get_async_sessionmaker
+from db.utils.pool import pool_status
+from models.user import User
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+
+
+def seed(users: int, conversations_per_user: int, messages_per_conversation: int):
+    with SessionLocal() as db:
+        db.bulk_insert_mappings(User, [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x", "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        conversation_rows = []
+        message_rows = []
+        conversation_id = 0
+        for user_id in range(1, users + 1):
+            for _ in range(conversations_per_user):
+                conversation_id += 1
+                conversation_rows.append({"id": conversation_id, "user_id": user_id, "title": f"c{conversation_id}"})
+                message_rows.extend(
+                    {"conversation_id": conversation_id, "role": MessageRole.USER, "content": "hello " * 20}
+                    for _ in range(messages_per_conversation)
+                )
+        db.bulk_insert_mappings(Conversation, conversation_rows)
+        db.bulk_insert_mappings(ConversationMessage, message_rows)
+        db.commit()
+    return conversation_id
+
+
+def list_statements(user_id: int, conversation_id: int):
+    conversations = (
+        select(Conversation.id, Conversation.user_id, Conversation.title, Conversation.created_at)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.id)
+        .limit(50)
+    )
+    messages = (
+        select(ConversationMessage)
+        .where(ConversationMessage.conversation_id == conversation_id)
+        .order_by(ConversationMessage.created_at, ConversationMessage.id)
+        .limit(50)
+    )
+    return conversations, messages
+
+
+def sync_request(i: int, users: int, conversations: int):
+    conversations_stmt, messages_stmt = list_statements(i % users + 1, i % conversations + 1)
+    with SessionLocal() as db:
+        db.execute(conversations_stmt).all()
+        db.execute(messages_stmt).scalars().all()
+
+
+async def async_request(i: int, users: int, conversations: int):
+    conversations_stmt, messages_stmt = list_statements(i % users + 1, i % conversations + 1)
+    async with get_async_sessionmaker()() as db:
+        (await db.execute(conversations_stmt)).all()
+        (await db.execute(messages_stmt)).scalars().all()
+
+
+async def run_async(requests: int, concurrency: int, users: int, conversations: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await async_request(i, users, conversations)
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def measure_endpoint(base_url: str, path_for, requests: int, concurrency: int, users: int):
+    """GET ``path_for(i)`` as user ``i % users + 1``, one keep-alive client per thread"""
+    local = threading.local()
+    counter = iter(range(10 ** 9))
+    opened = []
+    
+    def request():
+        i = next(counter)
+        if not hasattr(local, "clients"):
+            local.clients = {}
+        user_id = i % users + 1
+        if user_id not in local.clients:
+            token = create_access_token({"sub": f"user{user_id}"})
+            local.clients[user_id] = httpx.Client(
+                base_url=base_url, timeout=60, headers={"Authorization": f"Bearer {token}"}
+            )
+            opened.append(local.clients[user_id])
+        local.clients[user_id].get(path_for(i, user_id), params={"limit": 50}).raise_for_status()
+    
+    try:
+        return measure(request, requests, concurrency)
+    finally:
+        for client in opened:
+            client.close()
+
+
+def run_endpoints(args, conversations_per_user: int):
+    env = dict(
+        os.environ,
+        QDRANT_LOCATION=":memory:",
+        CRM_OUTBOX_FLUSHER_ENABLED="False",
+        LLM_WARMUP_ENABLED="False",
+    )
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    
+    def conversation_of(i, user_id):
+        # One of the user's own conversations (ids are allocated user by user)
+        return (user_id - 1) * conversations_per_user + i % conversations_per_user + 1
+    
+    try:
+        wait_for(f"{base_url}/health/ready", time.perf_counter() + 120)
+        print_result("GET /conversations (async)", measure_endpoint(
+            base_url, lambda i, user_id: "/conversations/", args.requests, args.concurrency, args.users
+        ))
+        print_result("GET /{id}/messages (sync)", measure_endpoint(
+            base_url, lambda i, user_id: f"/conversations/{conversation_of(i, user_id)}/messages",
+            args.requests, args.concurrency, args.users,
+        ))
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async engine on conversation reads")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--conversations", type=int, default=20, help="Conversations per user")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per conversation")
+    parser.add_argument("--no-endpoints", dest="endpoints", action="store_false",
+                        help="Only compare the raw queries, skip the uvicorn run")
+    args = parser.parse_args()
+    
+    create_schema()
+    total_conversations = seed(args.users, args.conversations, args.messages)
+    
+    counter = iter(range(10 ** 9))
+    result = measure(lambda: sync_request(next(counter), args.users, total_conversations), args.requests, args.concurrency)
+    print_result("sync engine (threadpool)", result)
+    print(f"  pool: {pool_status(engine)}")
+    
+    async def run():
+        result = await run_async(args.requests, args.concurrency, args.users, total_conversations)
+        print_result("async engine (event loop)", result)
+        print(f"  pool: {pool_status(get_async_engine().sync_engine)}")
+        await get_async_engine().dispose()
+    
+    asyncio.run(run())
+    
+    if args.endpoints:
+        run_endpoints(args, args.conversations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Embedding throughput per provider, in texts per second and per core.
+
+The local providers run on 1..N worker processes. The OpenAI provider runs
+against the local stub, so its figure covers the HTTP round trip only and
+leaves out real model time. ONNX runs only when a model and tokenizer are
+supplied.
+
+Usage:
+    python -m benchmarks.bench_embeddings [--texts 20000] [--workers 1,4] [--batch-size 256]
+        [--openai-latency 0.15] [--onnx-model model.onnx --onnx-tokenizer tokenizer.json]
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.fakes.openai_stub import StubOpenAI
+from vector_db.utils.embedding_providers import (
+    HashingEmbeddingProvider,
+    OnnxEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+)
+
+WORDS = (
+    "python data science machine learning course beginner advanced project career web development "
+    "design marketing finance statistics cloud security analytics recommend help question answer "
+    "week lesson practice exercise instructor certificate schedule budget goal interview skills"
+).split()
+
+
+def synthetic_texts(count: int, rng: random.Random):
+    """Conversation-sized texts of roughly 40 to 120 words"""
+    return [" ".join(rng.choices(WORDS, k=rng.randint(40, 120))) for _ in range(count)]
+
+
+def run(label: str, provider, texts, cores: int):
+    provider.embed(texts[:provider.batch_size * provider.workers])  # start workers, load models
+    started = time.perf_counter()
+    vectors = provider.embed(texts)
+    elapsed = time.perf_counter() - started
+    provider.close()
+    rate = len(texts) / elapsed
+    print(f"{label:<32} {provider.dimensions:>5}d  {rate:>10.0f} texts/s  {rate / cores:>10.0f} texts/s/core")
+    assert len(vectors) == len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding provider throughput")
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated pool sizes")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--openai-latency", type=float, default=0.15, help="Stub seconds per embeddings request")
+    parser.add_argument("--openai-batch-size", type=int, default=100)
+    parser.add_argument("--onnx-model")
+    parser.add_argument("--onnx-tokenizer")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.texts, random.Random(7))
+    cpus = os.cpu_count() or 1
+    pool_sizes = sorted({int(size) for size in args.workers.split(",")})
+    print(f"{args.texts} texts, {cpus} CPU(s)")
+
+    for workers in pool_sizes:
+        provider = HashingEmbeddingProvider(dimensions=args.dimensions, workers=workers, batch_size=args.batch_size)
+        run(f"hashing, {workers} worker(s)", provider, texts, min(workers, cpus))
+
+    if args.onnx_model:
+        for workers in pool_sizes:
+            provider = OnnxEmbeddingProvider(args.onnx_model, args.onnx_tokenizer, workers=workers, batch_size=64)
+            run(f"onnx, {workers} worker(s)", provider, texts, min(workers, cpus))
+
+    stub = StubOpenAI(latency=args.openai_latency).start()
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    from openai import OpenAI
+
+    client = OpenAI(base_url=stub.base_url)
+    provider = OpenAIEmbeddingProvider(lambda: client, "text-embedding-3-small")
+    sample = texts[:min(len(texts), args.openai_batch_size * 20)]
+    started = time.perf_counter()
+    for start in range(0, len(sample), args.openai_batch_size):
+        provider.embed(sample[start:start + args.openai_batch_size])
+    rate = len(sample) / (time.perf_counter() - started)
+    stub.stop()
+    print(f"{'openai (stub, sequential batches)':<32} {provider.dimensions:>5}d  {rate:>10.0f} texts/s  "
+          f"{'n/a':>10} (network bound)")
+
+
+if __name__ == "__main__":
+    main()
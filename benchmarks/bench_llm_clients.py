@@ -0,0 +1,99 @@
+"""Memory per cached conversation and first-turn latency, per-chain vs shared LLM clients.
+
+Runs against a local HTTPS stub of the OpenAI API. "per-chain clients" gives
+every conversation its own ChatOpenAI with its own httpx client (what the
+pinned langchain-openai does when each chain builds its model); "shared
+registry" uses ``chatbot.llm.chat_model`` after ``warm_up``.
+
+Usage:
+    python -m benchmarks.bench_llm_clients [--conversations 300] [--first-turns 50]
+"""
+import argparse
+import gc
+import os
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.fakes.openai_stub import StubOpenAI
+
+stub = StubOpenAI(latency=0.005, tls=True).start()
+os.environ["OPENAI_BASE_URL"] = stub.base_url
+os.environ["SSL_CERT_FILE"] = stub.ca_file
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["LLM_ROUTING"] = "chat=small"
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from chatbot import llm as llm_registry
+from chatbot.chains.conversation import ConversationChain
+
+
+def per_chain_llm(chain, model):
+    """Each conversation keeps its own ChatOpenAI with its own httpx client"""
+    if not hasattr(chain, "own_llms"):
+        chain.own_llms = {}
+    if model not in chain.own_llms:
+        chain.own_llms[model] = ChatOpenAI(
+            model=model,
+            temperature=0.7,
+            callbacks=[llm_registry.GatewayCallbackHandler()],
+            http_client=httpx.Client(),
+        )
+    return chain.own_llms[model]
+
+
+def memory_per_conversation(count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    chains = []
+    for i in range(count):
+        chain = ConversationChain(conversation_id=i)
+        chain.get_llm(chain.route("hello").model)
+        chains.append(chain)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return allocated / count
+
+
+def first_turn_latency(count: int) -> list:
+    latencies = []
+    for i in range(count):
+        chain = ConversationChain(conversation_id=10_000 + i)
+        started = time.perf_counter()
+        chain.respond("hello")
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label, conversations, first_turns):
+    connections = stub.connections
+    memory = memory_per_conversation(conversations)
+    latencies = first_turn_latency(first_turns)
+    print(f"{label:<20} {memory / 1024:>8.1f} KiB/conversation  first turn p50 {statistics.median(latencies):>6.1f} ms  "
+          f"mean {statistics.fmean(latencies):>6.1f} ms  new connections {stub.connections - connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-chain vs shared LLM clients")
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--first-turns", type=int, default=50)
+    args = parser.parse_args()
+    
+    shared_llm = ConversationChain.get_llm
+    ConversationChain.get_llm = per_chain_llm
+    report("per-chain clients", args.conversations, args.first_turns)
+    
+    ConversationChain.get_llm = shared_llm
+    timings = llm_registry.warm_up()
+    print(f"warm-up: {', '.join(f'{step} {seconds * 1000:.0f} ms' for step, seconds in timings.items())}")
+    report("shared registry", args.conversations, args.first_turns)
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""LLM gateway behaviour under a spike, with simulated LLM calls.
+
+Interactive chat turns and batch recommendation calls arrive at random
+over a few seconds at more than the gateway can serve. Interactive calls should see short queue waits,
+batch calls absorb the backlog, and calls that cannot be admitted in time
+are rejected quickly with a Retry-After hint rather than piling up.
+
+Usage:
+    python -m benchmarks.bench_llm_gateway [--interactive 400] [--batch 400] [--concurrency 8] [--call-ms 50]
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from services.ai.llm_gateway import BATCH, INTERACTIVE, LLMGateway, LLMOverloaded
+from benchmarks.common import summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM gateway admission under load")
+    parser.add_argument("--interactive", type=int, default=400)
+    parser.add_argument("--batch", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tokens-per-minute", type=int, default=2_000_000)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--call-ms", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=4.0, help="Seconds over which calls arrive")
+    args = parser.parse_args()
+    
+    gateway = LLMGateway(
+        max_concurrency=args.concurrency,
+        tokens_per_minute=args.tokens_per_minute,
+        max_queue=args.max_queue,
+        max_wait={INTERACTIVE: 1.0, BATCH: 60.0},
+    )
+    waits = defaultdict(list)
+    rejected = defaultdict(list)
+    lock = threading.Lock()
+    
+    def call(arrival):
+        offset, priority = arrival
+        time.sleep(offset)
+        started = time.perf_counter()
+        try:
+            with gateway.slot(priority, tokens=1500):
+                waited = time.perf_counter() - started
+                time.sleep(random.uniform(0.5, 1.5) * args.call_ms / 1000)
+        except LLMOverloaded as exc:
+            with lock:
+                rejected[priority].append((time.perf_counter() - started, exc.retry_after))
+            return
+        with lock:
+            waits[priority].append(waited)
+    
+    rng = random.Random(1)
+    calls = [(rng.uniform(0, args.duration), INTERACTIVE) for _ in range(args.interactive)]
+    calls += [(rng.uniform(0, args.duration), BATCH) for _ in range(args.batch)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        list(pool.map(call, calls))
+    elapsed = time.perf_counter() - started
+    
+    capacity = args.concurrency / (args.call_ms / 1000)
+    print(f"{len(calls)} calls over {args.duration:.0f}s ({len(calls) / args.duration:.0f}/s offered, "
+          f"~{capacity:.0f}/s capacity), finished in {elapsed:.2f}s, max queue {args.max_queue}")
+    for priority in (INTERACTIVE, BATCH):
+        result = summarize(waits[priority], elapsed)
+        print(f"{priority:<12} admitted {len(waits[priority]):>5}  queue wait p50 {result['p50_ms']:>8.1f} ms  "
+              f"p95 {result['p95_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms")
+        if rejected[priority]:
+            reject_ms = max(seconds for seconds, _ in rejected[priority]) * 1000
+            retry_after = max(hint for _, hint in rejected[priority])
+            print(f"{'':<12} rejected {len(rejected[priority]):>5}  slowest rejection {reject_ms:.1f} ms, "
+                  f"Retry-After up to {retry_after:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Per-turn DB cost of POST /conversations/{id}/messages with a stubbed LLM.
+
+Compares the previous write path (commit + refresh per message, then the
+background task re-reading the conversation on the request session) with
+the single unit-of-work write and with group commit across concurrent turns.
+Only the time spent in the database is reported; the stub LLM sleeps outside
+of it.
+
+Usage:
+    python -m benchmarks.bench_message_writes [--turns 2000] [--concurrency 16] [--llm-ms 5]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from sqlalchemy import event
+
+from benchmarks.common import configure_sqlite, create_schema, summarize
+
+configure_sqlite("message_writes")
+
+from db.utils.database import SessionLocal, engine
+from models.user import User
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from services.crm.outbox import enqueue_messages
+from services.conversations.turn_writer import TurnWriter, write_turn
+
+CONVERSATIONS = 64
+
+statements = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+def stub_llm(content: str, llm_ms: float) -> str:
+    time.sleep(llm_ms / 1000)
+    return f"Stub answer to: {content}"
+
+
+def legacy_turn(db, conversation, content, llm_ms) -> float:
+    """The write sequence add_message used before consolidation; returns DB seconds"""
+    started = time.perf_counter()
+    db_message = ConversationMessage(conversation_id=conversation.id, role=MessageRole.USER, content=content)
+    db.add(db_message)
+    db.flush()
+    enqueue_messages(db, conversation, [db_message])
+    db.commit()
+    db.refresh(db_message)
+    db_seconds = time.perf_counter() - started
+    
+    response = stub_llm(content, llm_ms)
+    
+    started = time.perf_counter()
+    ai_message = ConversationMessage(conversation_id=conversation.id, role=MessageRole.ASSISTANT, content=response)
+    db.add(ai_message)
+    db.flush()
+    enqueue_messages(db, conversation, [ai_message])
+    db.commit()
+    db.refresh(ai_message)
+    # The old background task re-read every message and the conversation on the same session
+    db.query(ConversationMessage).filter(ConversationMessage.conversation_id == conversation.id).all()
+    db.query(Conversation).filter(Conversation.id == conversation.id).first()
+    return db_seconds + time.perf_counter() - started
+
+
+def consolidated_turn(write):
+    def turn(db, conversation, content, llm_ms) -> float:
+        response = stub_llm(content, llm_ms)
+        started = time.perf_counter()
+        write(db, conversation, content, response)
+        return time.perf_counter() - started
+    return turn
+
+
+def run(label, turns, concurrency, llm_ms, write):
+    """Run turns on worker threads; ``write`` returns the DB seconds spent after the lookup"""
+    global statements
+    statements = 0
+    latencies: List[float] = []
+    
+    def one_turn(i):
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            conversation = db.get(Conversation, i % CONVERSATIONS + 1)
+            lookup = time.perf_counter() - started
+            latencies.append(lookup + write(db, conversation, f"Question {i}", llm_ms))
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_turn, range(turns)))
+    result = summarize(latencies, time.perf_counter() - started)
+    print(f"{label:<24} DB per turn: mean {result['mean_ms']:>6.2f} ms  p50 {result['p50_ms']:>6.2f} ms  "
+          f"p95 {result['p95_ms']:>6.2f} ms  statements/turn {statements / turns:>5.1f}  "
+          f"{result['rps']:>7.1f} turns/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat turn write path with a stubbed LLM")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    create_schema()
+    with SessionLocal() as db:
+        db.add(User(id=1, username="learner", email="learner@example.com", hashed_password="x"))
+        db.add_all(Conversation(id=i, user_id=1, title=f"Conversation {i}") for i in range(1, CONVERSATIONS + 1))
+        db.commit()
+    
+    writer = TurnWriter(window=0.002)
+    
+    print(f"{args.turns} turns, concurrency {args.concurrency}, stub LLM {args.llm_ms:.0f} ms")
+    run("commit per message", args.turns, args.concurrency, args.llm_ms, legacy_turn)
+    run("single transaction", args.turns, args.concurrency, args.llm_ms, consolidated_turn(write_turn))
+    run("group commit", args.turns, args.concurrency, args.llm_ms,
+        consolidated_turn(lambda db, *turn: writer.write(*turn)))
+    writer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Offline check of model routing decisions, with stub models.
+
+Routes a labelled set of chat turns, sends each one to a stub small or large
+model and reports routing accuracy, how often a turn that needed the large
+model was kept on the small one (the costly mistake), and latency and cost
+against sending everything to the large model.
+
+Usage:
+    python -m benchmarks.bench_model_router [--min-accuracy 0.9]
+"""
+import argparse
+import time
+
+from benchmarks.fakes.llm_stub import StubChatModel
+from services.ai.model_router import CHAT, CREW, LARGE, SMALL, ModelRouter
+
+# (turn, tier it needs)
+LABELLED_TURNS = [
+    ("Hi!", SMALL),
+    ("hello there", SMALL),
+    ("Thanks, that helps a lot", SMALL),
+    ("ok great", SMALL),
+    ("Good morning", SMALL),
+    ("When does the Python for Beginners course start?", SMALL),
+    ("How long is the SQL fundamentals course?", SMALL),
+    ("Is the data visualisation course online?", SMALL),
+    ("What is the price of the UX design bootcamp?", SMALL),
+    ("Do I get a certificate at the end?", SMALL),
+    ("Can I pay in instalments?", SMALL),
+    ("Where do I find my login for the learning portal?", SMALL),
+    ("Who teaches the machine learning course?", SMALL),
+    ("What time are the live sessions?", SMALL),
+    ("Bye!", SMALL),
+    ("Can I switch to the evening group?", SMALL),
+    ("Is there a discount for students? And for alumni?", SMALL),
+    ("How do I reset my password?", SMALL),
+    ("What are the prerequisites for Advanced Excel?", SMALL),
+    ("Is the course available in Spanish?", SMALL),
+    ("Can you compare the data science and machine learning tracks?", LARGE),
+    ("What's the difference between the web development and full stack programs?", LARGE),
+    ("Explain why the statistics course is required before machine learning", LARGE),
+    ("I work in retail and want to move into analytics, what career path would you recommend?", LARGE),
+    ("Help me plan a six month roadmap to become a data engineer", LARGE),
+    ("Which courses would you suggest for someone who already knows Python and SQL?", LARGE),
+    ("What are the pros and cons of the part-time versus the intensive bootcamp?", LARGE),
+    ("Walk me step by step through getting from zero to my first frontend job", LARGE),
+    ("Why does this fail?\n```python\nfor i in range(10) print(i)\n```", LARGE),
+    ("Can you evaluate whether the cloud certification is worth it for a sysadmin with ten years of experience?", LARGE),
+    ("I finished the beginner Python course last spring, I have been doing some small automation scripts at my job "
+     "in accounting, and I'm wondering what the best next step would be given that I can only study on weekends "
+     "and I would like to eventually work with financial data at a larger company", LARGE),
+    ("Which is better for me, UX design or product management? What jobs do they lead to? How much do they pay?", LARGE),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify model routing offline with stub models")
+    parser.add_argument("--min-accuracy", type=float, default=0.9)
+    args = parser.parse_args()
+    
+    small = StubChatModel("small", first_token_ms=60, tokens_per_second=2000, cost_per_1k_tokens=0.6)
+    large = StubChatModel("large", first_token_ms=250, tokens_per_second=800, cost_per_1k_tokens=10.0)
+    router = ModelRouter(small_model="small", large_model="large", policies={CHAT: "auto", CREW: "large"})
+    models = {"small": small, "large": large}
+    
+    correct = under = over = 0
+    routed_seconds = 0.0
+    for text, expected in LABELLED_TURNS:
+        decision = router.route(CHAT, text)
+        if decision.tier == expected:
+            correct += 1
+        elif expected == LARGE:
+            under += 1
+            print(f"kept on small model: {text[:70]!r}")
+        else:
+            over += 1
+            print(f"escalated ({decision.reason}): {text[:70]!r}")
+        started = time.perf_counter()
+        models[decision.model].invoke(text)
+        routed_seconds += time.perf_counter() - started
+    routed_cost = small.cost + large.cost
+    
+    baseline = StubChatModel("large", first_token_ms=250, tokens_per_second=800, cost_per_1k_tokens=10.0)
+    started = time.perf_counter()
+    for text, _ in LABELLED_TURNS:
+        baseline.invoke(text)
+    baseline_seconds = time.perf_counter() - started
+    
+    turns = len(LABELLED_TURNS)
+    accuracy = correct / turns
+    print(f"{turns} turns: accuracy {accuracy:.0%}, under-escalated {under}, over-escalated {over}, "
+          f"small model share {small.calls / turns:.0%}")
+    print(f"mean latency per turn: routed {routed_seconds / turns * 1000:.0f} ms, "
+          f"all large {baseline_seconds / turns * 1000:.0f} ms")
+    print(f"cost: routed {routed_cost:.4f}, all large {baseline.cost:.4f} ({routed_cost / baseline.cost:.0%})")
+    assert router.route(CREW).model == "large", "crew policy must pin the large model"
+    assert accuracy >= args.min_accuracy, f"routing accuracy {accuracy:.0%} below {args.min_accuracy:.0%}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Request profiler overhead, and what a triggered profile captures.
+
+Serves ``/courses/{id}`` (catalog cache off, so every request queries SQLite)
+without the middleware, with it enabled but never triggered, and with every
+request sampled. A deliberately slow route then crosses the threshold; its
+stored profile (span tree and hottest folded stacks) is printed.
+
+Usage:
+    python -m benchmarks.bench_profiler [--requests 2000] [--concurrency 4] [--threshold-ms 200]
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import configure_sqlite, create_schema, measure, print_result
+
+configure_sqlite("profiler")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.endpoints import courses
+from benchmarks.bench_course_catalog import seed
+from api.dependencies import get_db
+from services.cache.catalog_cache import course_catalog_cache
+from services.observability.profiler import ProfileStore, Profiler, ProfilerMiddleware, span
+
+
+def busy_wait(seconds: float):
+    """CPU-bound stand-in for slow application code"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(200))
+
+
+def build_app(profiler=None) -> FastAPI:
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+
+    @app.get("/slow")
+    def slow(db: Session = Depends(get_db)):
+        for _ in range(5):
+            db.execute(text("SELECT COUNT(*) FROM courses")).scalar()
+        with span("llm", "simulated"):
+            time.sleep(0.1)
+        busy_wait(0.2)
+        return {"ok": True}
+
+    if profiler is not None:
+        app.add_middleware(ProfilerMiddleware, profiler=profiler, exclude_prefixes=())
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request profiler overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--threshold-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    create_schema()
+    seed(args.courses)
+    course_catalog_cache.enabled = False
+    store = ProfileStore(tempfile.mkdtemp(prefix="crm-profiles-"), max_profiles=50)
+    configurations = (
+        ("middleware off", None),
+        ("enabled, not triggered", Profiler(store, threshold=args.threshold_ms / 1000, sample_rate=0)),
+        ("every request sampled", Profiler(store, threshold=args.threshold_ms / 1000, sample_rate=1.0)),
+    )
+
+    for label, profiler in configurations:
+        client = TestClient(build_app(profiler))
+        counter = iter(range(10 ** 9))
+
+        def request():
+            response = client.get(f"/courses/{next(counter) % args.courses + 1}")
+            assert response.status_code == 200, response.text
+
+        measure(request, 200, args.concurrency)  # warm up
+        print_result(label, measure(request, args.requests, args.concurrency))
+    time.sleep(0.5)  # let the sampler thread flush sampled profiles
+    print(f"profiles kept in ring buffer: {len(store.list())} (max {store.max_profiles})")
+
+    profiler = Profiler(ProfileStore(tempfile.mkdtemp(prefix="crm-profiles-")), threshold=args.threshold_ms / 1000)
+    client = TestClient(build_app(profiler))
+    client.get("/courses/1")
+    client.get("/slow")
+    time.sleep(0.5)
+    summaries = profiler.store.list()
+    print(f"\nstored after one fast and one slow request: {[(s['route'], s['trigger']) for s in summaries]}")
+    profile = profiler.store.get(summaries[0]["id"])
+    print(f"{profile['route']}: {profile['duration_ms']:.0f} ms, {profile['samples']} samples, "
+          f"span totals {profile['span_totals']}")
+    for stack, count in list(profile["folded"].items())[:3]:
+        print(f"  {count:>4}  ...{';'.join(stack.split(';')[-3:])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Provider prompt-cache hits: legacy LangChain prompt vs the chat prompt builder.
+
+Runs multi-turn conversations against the local OpenAI stub, which caches
+prompt prefixes the way the provider does and charges prefill latency only
+for uncached tokens. The legacy path rebuilds the previous
+``langchain.chains.ConversationChain`` setup (system prompt injected as a
+raw dict into buffer memory, user turn added before ``predict``).
+
+Usage:
+    python -m benchmarks.bench_prompt_cache [--conversations 20] [--turns 8]
+"""
+import argparse
+import os
+import random
+import time
+import warnings
+
+from benchmarks.fakes.openai_stub import StubOpenAI
+
+stub = StubOpenAI(latency=0.01, prefill_ms_per_1k_tokens=40).start()
+os.environ["OPENAI_BASE_URL"] = stub.base_url
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["LLM_ROUTING"] = "chat=large"
+os.environ["LLM_GATEWAY_TOKENS_PER_MINUTE"] = "0"  # measure the provider, not our own budget
+
+from chatbot.chains.conversation import ConversationChain
+from chatbot.llm import chat_model, prompt_cache_hit_ratio, prompt_token_totals
+from chatbot.prompts.base_prompt import SYSTEM_PROMPT
+
+WORDS = ("course python data career schedule online certificate project mentor module exam weekend "
+         "beginner advanced analytics design cloud security portfolio deadline").split()
+
+# Stable context shared by every conversation: a digest of the course catalog
+CATALOG_CONTEXT = "Course catalog:\n" + "\n".join(
+    f"- Course {i}: {' '.join(random.Random(i).choices(WORDS, k=14))}" for i in range(60)
+)
+
+
+class LegacyChain:
+    """The LangChain ConversationChain setup used before the prompt builder"""
+    
+    def __init__(self):
+        from langchain.chains import ConversationChain as LangchainConversationChain
+        from langchain.memory import ConversationBufferMemory
+        
+        self.memory = ConversationBufferMemory(return_messages=True)
+        self.memory.chat_memory.add_message({"role": "system", "content": SYSTEM_PROMPT})
+        self.memory.chat_memory.add_message({"role": "system", "content": CATALOG_CONTEXT})
+        self.chain = LangchainConversationChain(llm=chat_model("gpt-4o", 0.7), memory=self.memory)
+    
+    def respond(self, text):
+        self.memory.chat_memory.add_user_message(text)
+        reply = self.chain.predict(input=text)
+        self.memory.chat_memory.add_ai_message(reply)
+
+
+def run(label, make_chain, conversations, turns):
+    rng = random.Random(7)
+    prompt_tokens, cached_tokens = stub.prompt_tokens, stub.cached_tokens
+    started = time.perf_counter()
+    for _ in range(conversations):
+        chain = make_chain()
+        for _ in range(turns):
+            chain.respond(" ".join(rng.choices(WORDS, k=40)) + "?")
+    elapsed = time.perf_counter() - started
+    prompt_tokens, cached_tokens = stub.prompt_tokens - prompt_tokens, stub.cached_tokens - cached_tokens
+    print(f"{label:<16} prompt tokens {prompt_tokens:>8}  cached {cached_tokens / prompt_tokens:>5.0%}  "
+          f"mean turn {elapsed / (conversations * turns) * 1000:>6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt cache friendliness of chat prompts")
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=8)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+    
+    run("legacy chain", LegacyChain, args.conversations, args.turns)
+    run("prompt builder", lambda: ConversationChain(context=[CATALOG_CONTEXT]), args.conversations, args.turns)
+    
+    print(f"recorded llm_prompt_tokens_total: {prompt_token_totals()}, hit ratio {prompt_cache_hit_ratio():.1%}")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Read-replica routing with two local SQLite "replicas".
+
+The primary and each replica are separate SQLite files seeded with the same
+catalog; nothing replicates between them, so a course created through the API
+only exists on the primary. Reading it back right after the write therefore
+only works because of read-your-writes stickiness. Prints the routing split.
+
+Usage:
+    python -m benchmarks.bench_read_replicas [--requests 1000] [--write-every 50]
+"""
+import argparse
+import os
+
+from benchmarks.common import configure_sqlite, measure, print_result
+
+primary_path = configure_sqlite("primary")
+replica_paths = [primary_path.replace("primary.db", f"replica_{index}.db") for index in range(2)]
+os.environ["DB_REPLICA_URLS"] = ",".join(f"sqlite:///{path}" for path in replica_paths)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import models  # noqa: F401
+from api.endpoints import auth, courses
+from db.utils.database import Base, engine, replica_engines, routing_stats
+from sqlalchemy.orm import Session
+from models.user import User
+from models.course import Course
+
+
+def seed(bind, course_count: int):
+    Base.metadata.create_all(bind=bind)
+    with Session(bind=bind) as db:
+        db.add(User(id=1, username="instructor", email="instructor@example.com", hashed_password="x"))
+        db.bulk_insert_mappings(Course, [
+            {
+                "id": i, "title": f"Course {i}", "description": "Seeded course", "instructor_id": 1,
+                "category": "data", "difficulty_level": "beginner", "duration_hours": 10, "price": 99,
+            }
+            for i in range(1, course_count + 1)
+        ])
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-replica routing split")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--write-every", type=int, default=50)
+    parser.add_argument("--courses", type=int, default=200)
+    args = parser.parse_args()
+    
+    for bind in [engine, *replica_engines]:
+        seed(bind, args.courses)
+    
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+    client = TestClient(app)
+    token = auth.create_access_token({"sub": "instructor", "uid": 1, "email": "instructor@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    counter = iter(range(10 ** 9))
+    stale_reads = 0
+    
+    def request():
+        nonlocal stale_reads
+        i = next(counter)
+        if i % args.write_every == 0:
+            created = client.post("/courses/", headers=headers, json={
+                "title": f"New course {i}", "description": "Written to the primary", "category": "data",
+                "difficulty_level": "beginner", "duration_hours": 5, "price": 10,
+            })
+            assert created.status_code == 201, created.text
+            # Read-your-writes: the replicas never see this row
+            if client.get(f"/courses/{created.json()['id']}", headers=headers).status_code != 200:
+                stale_reads += 1
+        else:
+            client.get("/courses/", params={"limit": 20})
+    
+    print_result("mixed read/write", measure(request, args.requests))
+    print(f"stale reads after own write: {stale_reads}")
+    for route, count in sorted(routing_stats().items()):
+        print(f"  {route:<32} {int(count)}")
+
+
+if __name__ == "__main__":
+    main()
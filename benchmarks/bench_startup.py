@@ -0,0 +1,120 @@
+"""Import time of ``api.main`` and worker boot time to liveness and readiness.
+
+Boots uvicorn against SQLite, an embedded in-memory Qdrant and the local
+OpenAI stub, and polls ``/health/live`` and ``/health/ready``. Thresholds
+make the script usable as a CI gate.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--max-import-seconds 3] [--max-ready-seconds 20] [--json FILE]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import configure_sqlite
+from benchmarks.fakes.openai_stub import StubOpenAI
+
+# Modules that must not be imported just by loading the app
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_openai", "crewai", "openai", "qdrant_client")
+
+IMPORT_PROBE = (
+    "import sys, time, json; started = time.perf_counter(); import api.main; "
+    "print(json.dumps({'seconds': time.perf_counter() - started, "
+    "'heavy': sorted(m for m in %r if m in sys.modules)}))" % (HEAVY_MODULES,)
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, deadline: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} not healthy after {time.perf_counter() - started:.1f}s")
+
+
+def measure_import(env) -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure_boot(env, timeout: float) -> dict:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        live = wait_for(f"http://127.0.0.1:{port}/health/live", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/health/ready", deadline)
+    finally:
+        server.terminate()
+        server.wait(10)
+    return {"live_seconds": live - started, "ready_seconds": ready - started}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API import and boot time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float)
+    parser.add_argument("--max-ready-seconds", type=float)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    
+    configure_sqlite("startup")
+    stub = StubOpenAI().start()
+    env = dict(
+        os.environ,
+        QDRANT_LOCATION=":memory:",
+        OPENAI_BASE_URL=stub.base_url,
+        CRM_OUTBOX_FLUSHER_ENABLED="false",
+    )
+    
+    imports = [measure_import(env) for _ in range(args.runs)]
+    boots = [measure_boot(env, timeout=120) for _ in range(args.runs)]
+    stub.stop()
+    
+    result = {
+        "import_seconds": statistics.median(run["seconds"] for run in imports),
+        "heavy_modules_at_import": imports[-1]["heavy"],
+        "live_seconds": statistics.median(run["live_seconds"] for run in boots),
+        "ready_seconds": statistics.median(run["ready_seconds"] for run in boots),
+    }
+    print(f"import api.main     {result['import_seconds']:.2f}s (median of {args.runs})")
+    print(f"heavy modules       {', '.join(result['heavy_modules_at_import']) or 'none'}")
+    print(f"boot to liveness    {result['live_seconds']:.2f}s")
+    print(f"boot to readiness   {result['ready_seconds']:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    
+    failures = []
+    if args.max_import_seconds is not None and result["import_seconds"] > args.max_import_seconds:
+        failures.append(f"import took {result['import_seconds']:.2f}s > {args.max_import_seconds:.2f}s")
+    if args.max_ready_seconds is not None and result["ready_seconds"] > args.max_ready_seconds:
+        failures.append(f"readiness took {result['ready_seconds']:.2f}s > {args.max_ready_seconds:.2f}s")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
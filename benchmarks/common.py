@@ -0,0 +1,72 @@
+"""Shared helpers for the offline benchmark scripts.
+
+The benchmarks run against a throwaway SQLite database, so ``configure_sqlite``
+must be called before any module that imports ``db.utils.database``.
+"""
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+
+def configure_sqlite(name: str = "benchmark") -> str:
+    """Point the app at a fresh SQLite file and return its path"""
+    path = os.path.join(tempfile.mkdtemp(prefix="crm-bench-"), f"{name}.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    return path
+
+
+def create_schema():
+    from db.utils.database import Base, engine
+    import models  # noqa: F401  (registers every table on Base.metadata)
+    
+    Base.metadata.create_all(bind=engine)
+
+
+def measure(fn: Callable[[], object], requests: int, concurrency: int = 1) -> Dict[str, float]:
+    """Call ``fn`` ``requests`` times on ``concurrency`` threads and summarize latency"""
+    latencies: List[float] = []
+    
+    def timed_call(_):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    if concurrency == 1:
+        for i in range(requests):
+            timed_call(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(timed_call, range(requests)))
+    elapsed = time.perf_counter() - started
+    
+    return summarize(latencies, elapsed)
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+        return latencies[index] * 1000
+    
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
+
+
+def print_result(label: str, result: Dict[str, float]):
+    print(f"{label:<32} {result['rps']:>10.1f} req/s  "
+          f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  p99 {result['p99_ms']:>7.2f} ms")
@@ -0,0 +1,110 @@
+"""Local stand-in for the Laravel CRM API.
+
+Serves the endpoints CRMClient calls from an in-memory store, accepts gzip
+request bodies and records every sync batch so benchmarks can count requests
+and duplicate deliveries. ``failure_rate`` and ``latency`` simulate a flaky,
+slow CRM.
+"""
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubCRM:
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.sync_batches = 0
+        self.failed_batches = 0
+        self.compressed_bytes = 0
+        self.raw_bytes = 0
+        self.message_ids = set()
+        self.duplicate_messages = 0
+        self.server = None
+        self.thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/api"
+    
+    def handle(self, method: str, path: str, body: bytes, headers) -> tuple:
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        
+        if method == "POST" and path == "/api/conversations/sync-batch":
+            raw = gzip.decompress(body) if headers.get("Content-Encoding") == "gzip" else body
+            with self.lock:
+                if self.random.random() < self.failure_rate:
+                    self.failed_batches += 1
+                    return 503, {"message": "CRM temporarily unavailable"}
+                self.sync_batches += 1
+                self.compressed_bytes += len(body)
+                self.raw_bytes += len(raw)
+                accepted = 0
+                for message in json.loads(raw)["messages"]:
+                    if message["message_id"] in self.message_ids:
+                        self.duplicate_messages += 1
+                    else:
+                        self.message_ids.add(message["message_id"])
+                        accepted += 1
+            return 200, {"accepted": accepted}
+        
+        match = re.fullmatch(r"/api/users/(\d+)", path)
+        if method == "GET" and match:
+            user_id = int(match.group(1))
+            return 200, {
+                "id": user_id,
+                "interests": ["data science", "web development"][user_id % 2:],
+                "education_level": "bachelor",
+                "career_goals": ["career change"],
+                "enrolled_courses": [],
+                "completed_courses": [],
+            }
+        
+        if method == "GET" and path.startswith("/api/courses"):
+            return 200, {"data": []}
+        
+        if method == "POST" and path == "/api/conversations/sync":
+            return 200, {"status": "ok"}
+        
+        return 404, {"message": "Not found"}
+    
+    def start(self, host: str = "127.0.0.1", port: int = 0):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = stub.handle(self.command, self.path.split("?")[0], body, self.headers)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,37 @@
+"""Offline stand-ins for chat models.
+
+``StubChatModel`` returns canned text after simulating a
+model's time to first token and generation speed, so routing and latency
+benchmarks can run without network access or API keys.
+"""
+import time
+from typing import Iterator
+
+
+class StubChatModel:
+    def __init__(self, name: str, first_token_ms: float, tokens_per_second: float, cost_per_1k_tokens: float = 0.0):
+        self.name = name
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.calls = 0
+        self.tokens = 0
+    
+    def reply_tokens(self, prompt: str):
+        words = prompt.split()
+        return [f"stub-{self.name}"] + words[: max(8, min(len(words) * 2, 120))]
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        self.calls += 1
+        time.sleep(self.first_token_ms / 1000)
+        for token in self.reply_tokens(prompt):
+            self.tokens += 1
+            time.sleep(1 / self.tokens_per_second)
+            yield token + " "
+    
+    def invoke(self, prompt: str) -> str:
+        return "".join(self.stream(prompt)).strip()
+    
+    @property
+    def cost(self) -> float:
+        return self.tokens / 1000 * self.cost_per_1k_tokens
@@ -0,0 +1,222 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Serves ``/v1/chat/completions`` (plain and ``stream=true``),
+``/v1/embeddings`` (deterministic unit vectors seeded by the input text) and
+``/v1/models`` with canned replies after a configurable latency. Prompt
+caching is simulated like the provider's: the longest prefix shared with a
+earlier prompt counts as cached (in 128-token steps, from 1024 tokens) and
+only uncached tokens pay ``prefill_ms_per_1k_tokens``. With
+``tls=True`` it listens on HTTPS with a throwaway self-signed certificate,
+so benchmarks see real connection setup costs; point clients at it with
+``OPENAI_BASE_URL=stub.base_url`` and ``SSL_CERT_FILE=stub.ca_file``.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOpenAI:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        tls: bool = False,
+        prefill_ms_per_1k_tokens: float = 0.0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.tls = tls
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self.seen_prefixes = set()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.embedding_requests = 0
+        self.models_seen = {}
+        self.ca_file = None
+        self.server = None
+        self.thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"{'https' if self.tls else 'http'}://{host}:{port}/v1"
+    
+    def reply_words(self, messages) -> list:
+        last = messages[-1]["content"] if messages else ""
+        if isinstance(last, list):
+            last = " ".join(part.get("text", "") for part in last)
+        return ["Stub", "reply", "to:"] + str(last).split()[:40]
+    
+    def cached_prefix_tokens(self, prompt: str) -> int:
+        """Tokens of the longest 128-token block prefix seen before; remembers this prompt's blocks"""
+        block = 128 * 4  # characters per 128 tokens at ~4 characters a token
+        cached = 0
+        for end in range(block, len(prompt) + 1, block):
+            key = hash(prompt[:end])
+            if key in self.seen_prefixes:
+                cached = end // 4
+            else:
+                self.seen_prefixes.add(key)
+        return cached if cached >= 1024 else 0
+    
+    def completion(self, request: dict) -> tuple:
+        messages = request.get("messages", [])
+        prompt = "".join(f"<{m.get('role')}>{m.get('content')}\n" for m in messages)
+        prompt_tokens = len(prompt) // 4
+        with self.lock:
+            self.requests += 1
+            model = request.get("model", "")
+            self.models_seen[model] = self.models_seen.get(model, 0) + 1
+            cached_tokens = min(self.cached_prefix_tokens(prompt), prompt_tokens)
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+        delay = self.latency + (prompt_tokens - cached_tokens) / 1000 * self.prefill_ms_per_1k_tokens / 1000
+        if delay:
+            time.sleep(delay)
+        
+        words = self.reply_words(messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        return words, usage
+    
+    @staticmethod
+    def embedding(text: str, dimensions: int = 1536) -> list:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+    
+    def embeddings(self, request: dict) -> dict:
+        with self.lock:
+            self.requests += 1
+            self.embedding_requests += 1
+        inputs = request.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        dimensions = request.get("dimensions") or 1536
+        tokens = sum(len(str(text)) // 4 for text in inputs)
+        return {
+            "object": "list",
+            "model": request.get("model"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": self.embedding(str(text), dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+    
+    def _certificate(self) -> tuple:
+        directory = tempfile.mkdtemp(prefix="openai-stub-")
+        cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+             "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+        return cert, key
+    
+    def start(self, host: str = "127.0.0.1", port: int = 0):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+            disable_nagle_algorithm = True
+            
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+            
+            def _json(self, status: int, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _event(self, payload):
+                data = f"data: {json.dumps(payload) if isinstance(payload, dict) else payload}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            
+            def do_GET(self):
+                if self.path.split("?")[0] == "/v1/models":
+                    self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._json(404, {"error": {"message": "Not found"}})
+            
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.split("?")[0] == "/v1/embeddings":
+                    self._json(200, stub.embeddings(request))
+                    return
+                if self.path.split("?")[0] != "/v1/chat/completions":
+                    self._json(404, {"error": {"message": "Not found"}})
+                    return
+                
+                words, usage = stub.completion(request)
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                base = {"id": completion_id, "created": int(time.time()), "model": request.get("model")}
+                if not request.get("stream"):
+                    self._json(200, dict(base, object="chat.completion", usage=usage, choices=[{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": " ".join(words)},
+                    }]))
+                    return
+                
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    if stub.tokens_per_second:
+                        time.sleep(1 / stub.tokens_per_second)
+                    self._event(dict(base, object="chat.completion.chunk", choices=[{
+                        "index": 0,
+                        "finish_reason": None,
+                        "delta": {"role": "assistant", "content": word if i == 0 else " " + word},
+                    }]))
+                final = dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    final["usage"] = usage
+                self._event(final)
+                self._event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        if self.tls:
+            cert, key = self._certificate()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert, key)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+            self.ca_file = cert
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,288 @@
+"""End-to-end load test of the API with every external dependency faked locally.
+
+Boots uvicorn against a seeded SQLite database, an embedded in-memory Qdrant,
+the OpenAI stub (chat and embeddings) and the CRM stub, then drives a weighted
+mix of the real routes from many client threads. Per-endpoint throughput,
+p50/p95/p99 and error counts are compared with a stored baseline so the suite
+can gate regressions in CI.
+
+Usage:
+    python -m benchmarks.load_suite [--duration 30] [--concurrency 16] [--users 50]
+        [--courses 2000] [--llm-latency 0.05] [--tolerance 0.25]
+        [--baseline benchmarks/baselines/load_suite.json] [--update-baseline] [--json FILE] [--metrics FILE]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.bench_startup import free_port, wait_for
+from benchmarks.common import configure_sqlite, create_schema, summarize
+
+configure_sqlite("load_suite")
+
+import httpx
+
+from api.endpoints.auth import get_password_hash
+from benchmarks.fakes.crm_stub import StubCRM
+from benchmarks.fakes.openai_stub import StubOpenAI
+from db.utils.database import SessionLocal, engine
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from models.course import Course
+from models.course_recommendation import CourseRecommendation
+from models.user import User
+from db.utils.fulltext import ensure_sqlite_fts
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "load_suite.json")
+PASSWORD = "load-suite-password"
+SEARCH_TERMS = ("python", "data", "design", "marketing", "cloud", "security", "finance", "sql")
+
+# (endpoint label, relative weight); chat turns are rarer but far more expensive
+MIX = (
+    ("POST /auth/token", 1),
+    ("GET /auth/me", 10),
+    ("GET /courses/", 15),
+    ("GET /courses/search", 15),
+    ("GET /courses/{id}", 15),
+    ("GET /conversations/", 10),
+    ("GET /conversations/{id}/messages", 12),
+    ("POST /conversations/{id}/messages", 6),
+    ("GET /recommendations/me", 15),
+)
+
+
+def seed(users: int, courses: int, rng: random.Random):
+    """Users with real bcrypt hashes, a catalog, a short chat history and precomputed recommendations"""
+    hashed = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        db.bulk_insert_mappings(User, [
+            {"id": i, "username": f"load{i}", "email": f"load{i}@example.com", "hashed_password": hashed, "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        db.bulk_insert_mappings(Course, [
+            {
+                "id": i,
+                "title": f"{rng.choice(SEARCH_TERMS).title()} {rng.choice(SEARCH_TERMS)} course {i}",
+                "description": " ".join(rng.choices(SEARCH_TERMS, k=30)),
+                "instructor_id": 1, "category": rng.choice(["data", "web", "business"]),
+                "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]),
+                "duration_hours": rng.randint(1, 60), "price": rng.randint(0, 300),
+            }
+            for i in range(1, courses + 1)
+        ])
+        db.bulk_insert_mappings(Conversation, [
+            {"id": i, "user_id": i, "title": f"Load conversation {i}"} for i in range(1, users + 1)
+        ])
+        db.bulk_insert_mappings(ConversationMessage, [
+            {"conversation_id": i, "role": role, "content": f"Seeded {role.value} message {n}"}
+            for i in range(1, users + 1)
+            for n, role in enumerate((MessageRole.USER, MessageRole.ASSISTANT) * 3)
+        ])
+        db.bulk_insert_mappings(CourseRecommendation, [
+            {
+                "user_id": i, "run_id": "load-suite", "query": "data science",
+                "recommendations": json.dumps([{"course_id": rng.randint(1, courses)} for _ in range(5)]),
+                "user_profile": json.dumps({"interests": ["data science"]}),
+            }
+            for i in range(1, users + 1)
+        ])
+        db.commit()
+    ensure_sqlite_fts(engine)
+
+
+class Client:
+    """One simulated user: a keep-alive connection, a token and a conversation"""
+
+    def __init__(self, base_url: str, user_id: int, courses: int, rng: random.Random):
+        self.http = httpx.Client(base_url=base_url, timeout=60)
+        self.user_id = user_id
+        self.courses = courses
+        self.rng = rng
+        self.login()
+
+    def login(self):
+        response = self.http.post("/auth/token", data={"username": f"load{self.user_id}", "password": PASSWORD})
+        response.raise_for_status()
+        self.http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return response
+
+    def call(self, label: str) -> httpx.Response:
+        conversation = self.user_id
+        if label == "POST /auth/token":
+            return self.login()
+        if label == "GET /auth/me":
+            return self.http.get("/auth/me")
+        if label == "GET /courses/":
+            return self.http.get("/courses/", params={"skip": self.rng.randrange(0, self.courses, 20), "limit": 20})
+        if label == "GET /courses/search":
+            return self.http.get("/courses/search", params={"q": self.rng.choice(SEARCH_TERMS)})
+        if label == "GET /courses/{id}":
+            return self.http.get(f"/courses/{self.rng.randint(1, self.courses)}")
+        if label == "GET /conversations/":
+            return self.http.get("/conversations/")
+        if label == "GET /conversations/{id}/messages":
+            return self.http.get(f"/conversations/{conversation}/messages")
+        if label == "POST /conversations/{id}/messages":
+            return self.http.post(
+                f"/conversations/{conversation}/messages",
+                json={"content": f"Which {self.rng.choice(SEARCH_TERMS)} course should I take next?"},
+            )
+        if label == "GET /recommendations/me":
+            return self.http.get("/recommendations/me")
+        raise ValueError(label)
+
+
+def drive(base_url: str, args) -> dict:
+    """Run the weighted mix on ``args.concurrency`` threads and summarize each endpoint"""
+    labels = [label for label, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    # Log every client in before the clock starts: bcrypt dominates a cold start
+    clients = [Client(base_url, i % args.users + 1, args.courses, random.Random(args.seed + i))
+               for i in range(args.concurrency)]
+    stop_at = time.perf_counter() + args.duration
+
+    def worker(client: Client):
+        try:
+            while time.perf_counter() < stop_at:
+                label = client.rng.choices(labels, weights=weights)[0]
+                started = time.perf_counter()
+                try:
+                    failed = client.call(label).status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies[label].append(elapsed)
+                    errors[label] += failed
+        finally:
+            client.http.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for label in labels:
+        result = summarize(latencies[label], elapsed)
+        result["errors"] = errors[label]
+        endpoints[label] = result
+    total = summarize([value for values in latencies.values() for value in values], elapsed)
+    total["errors"] = sum(errors.values())
+    return {"endpoints": endpoints, "total": total}
+
+
+def compare(result: dict, baseline: dict, tolerance: float, max_error_rate: float) -> list:
+    """Regressions: p95 up or throughput down by more than ``tolerance``, or errors above the ceiling"""
+    failures = []
+    rows = dict(result["endpoints"], total=result["total"])
+    for label, current in rows.items():
+        reference = baseline.get("endpoints", {}).get(label) if label != "total" else baseline.get("total")
+        if current["requests"] and current["errors"] / current["requests"] > max_error_rate:
+            failures.append(f"{label}: error rate {current['errors'] / current['requests']:.1%} > {max_error_rate:.1%}")
+        if not reference or not reference["requests"]:
+            continue
+        if current["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            failures.append(f"{label}: p95 {current['p95_ms']:.1f} ms > baseline {reference['p95_ms']:.1f} ms")
+        if current["rps"] < reference["rps"] * (1 - tolerance):
+            failures.append(f"{label}: {current['rps']:.1f} req/s < baseline {reference['rps']:.1f} req/s")
+    return failures
+
+
+def print_report(result: dict, baseline: dict):
+    print(f"{'endpoint':<36} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'p95 vs base':>12}")
+    rows = dict(result["endpoints"], total=result["total"])
+    for label, row in rows.items():
+        reference = baseline.get("endpoints", {}).get(label) if label != "total" else baseline.get("total")
+        delta = f"{(row['p95_ms'] / reference['p95_ms'] - 1):+.0%}" if reference and reference["p95_ms"] else "-"
+        print(f"{label:<36} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['errors']:>7} {delta:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end API load test")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load after the clients have logged in")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub streaming rate (0 = unthrottled)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95/throughput drift vs baseline")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--metrics", help="Save the app's /metrics scrape after the run to this file")
+    args = parser.parse_args()
+
+    create_schema()
+    seed(args.users, args.courses, random.Random(args.seed))
+    openai_stub = StubOpenAI(latency=args.llm_latency, tokens_per_second=args.tokens_per_second).start()
+    crm_stub = StubCRM().start()
+    env = dict(
+        os.environ,
+        QDRANT_LOCATION=":memory:",
+        OPENAI_BASE_URL=openai_stub.base_url,
+        LARAVEL_CRM_BASE_URL=crm_stub.base_url,
+        LLM_GATEWAY_TOKENS_PER_MINUTE="0",
+    )
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base_url}/health/ready", time.perf_counter() + 120)
+        result = drive(base_url, args)
+        if args.metrics:
+            with open(args.metrics, "w") as f:
+                f.write(httpx.get(f"{base_url}/metrics").text)
+    finally:
+        server.terminate()
+        server.wait(10)
+        openai_stub.stop()
+        crm_stub.stop()
+    result["config"] = {
+        key: getattr(args, key)
+        for key in ("duration", "concurrency", "users", "courses", "llm_latency", "tokens_per_second", "seed")
+    }
+    result["llm_requests"] = openai_stub.requests
+    result["embedding_requests"] = openai_stub.embedding_requests
+    result["crm_requests"] = crm_stub.requests
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return
+
+    failures = compare(result, baseline, args.tolerance, args.max_error_rate)
+    if failures:
+        sys.exit("regressions:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
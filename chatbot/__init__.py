@@ -1,2 +1,21 @@
-from .chains.conversation import ConversationChain
-from .agents.crewai_agent import create_crew_agents
\ No newline at end of file
+"""Chat chains and agents.
+
+Exports are resolved on first access so importing ``chatbot.*`` submodules
+does not pull in LangChain and CrewAI until they are actually used.
+"""
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    "ConversationChain": "chatbot.chains.conversation",
+    "create_crew_agents": "chatbot.agents.crewai_agent",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
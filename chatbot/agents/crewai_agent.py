@@ -1,5 +1,7 @@
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from chatbot.llm import LLM_OUTPUT_TOKEN_ESTIMATE, estimate_tokens
+from services.ai.llm_gateway import BATCH, llm_gateway
+from services.ai.model_router import CREW, model_router
 import os
 from dotenv import load_dotenv
 
@@ -8,8 +10,10 @@ load_dotenv()
 def create_crew_agents():
     """Create a crew of AI agents for educational CRM"""
     
-    # Initialize the LLM
-    llm = ChatOpenAI(model="gpt-4o")
+    # Model from the crew routing policy. CrewAI builds its own client from the
+    # name (a LangChain model's callbacks would be dropped), so the gateway
+    # admits whole crew runs in run_crew instead of individual calls
+    llm = model_router.route(CREW).model
     
     # Create the education advisor agent
     education_advisor = Agent(
@@ -62,18 +66,21 @@ def create_course_recommendation_crew(user_query, user_profile, available_course
     analyze_user_needs = Task(
         description=f"""Analyze the user query: '{user_query}' along with their profile
         to understand their educational needs and goals.""",
+        expected_output="A short summary of the user's educational needs and goals.",
         agent=agents["education_advisor"],
     )
     
     find_matching_courses = Task(
         description=f"""Based on the user's needs, review the available courses and
         identify the top 3 most suitable options. Available courses: {available_courses}""",
+        expected_output="The 3 best matching courses with a one-line reason for each.",
         agent=agents["content_expert"],
     )
     
     explain_career_benefits = Task(
         description="""For each recommended course, explain how it will benefit
         the user's career path and what specific job opportunities it might open up.""",
+        expected_output="Each recommended course with its career benefits and related job opportunities.",
         agent=agents["career_counselor"],
     )
     
@@ -84,4 +91,10 @@ def create_course_recommendation_crew(user_query, user_profile, available_course
         verbose=True
     )
     
-    return crew
\ No newline at end of file
+    return crew
+
+def run_crew(crew, prompt: str = ""):
+    """kickoff() inside one batch-priority gateway slot held for the whole run"""
+    tokens = estimate_tokens(prompt) + LLM_OUTPUT_TOKEN_ESTIMATE * len(crew.tasks)
+    with llm_gateway.slot(BATCH, tokens):
+        return crew.kickoff()
@@ -1,51 +1,108 @@
-from langchain.chains import ConversationChain as LangchainConversationChain
-from langchain.memory import ConversationBufferMemory
-from langchain_openai import ChatOpenAI
-from chatbot.prompts.base_prompts import SYSTEM_PROMPT
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from chatbot.llm import chat_model
+from chatbot.prompts.chat_prompt import ChatPromptBuilder
+from services.ai.model_router import CHAT, RoutingDecision, model_router
+from services.observability import metrics, profiler
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+TURN_STAGE_SECONDS = metrics.histogram("chat_turn_stage_seconds", "Time per chat turn stage", ["endpoint", "stage"])
+TURN_ERRORS = metrics.counter("chat_turn_errors_total", "Chat turns whose LLM call raised", ["endpoint", "model", "error"])
+
+class ChatTurn:
+    """An assistant reply with the model that produced it and its prompt token usage"""
+    
+    def __init__(self, content, model, latency_ms, prompt_tokens=None, cached_tokens=None):
+        self.content = content
+        self.model = model
+        self.latency_ms = latency_ms
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+
 class ConversationChain:
-    """Wrapper around Langchain ConversationChain for educational CRM interactions"""
+    """Chat history and prompt assembly for educational CRM interactions"""
     
-    def __init__(self, conversation_id=None, llm_model="gpt-4o"):
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model=llm_model,
-        )
-        
-        self.memory = ConversationBufferMemory(
-            return_messages=True
-        )
+    def __init__(self, conversation_id=None, llm_model=None, endpoint=CHAT, router=model_router, context=None):
+        # llm_model pins every turn to one model; otherwise the router picks per turn
+        self.llm_model = llm_model
+        self.endpoint = endpoint
+        self.router = router
         
-        self.chain = LangchainConversationChain(
-            llm=self.llm,
-            memory=self.memory,
-            verbose=True
-        )
+        # System prompt and stable context first, history last (see ChatPromptBuilder)
+        self.prompt = ChatPromptBuilder(context=context)
+        self.history = []
         
         self.conversation_id = conversation_id
-        
-        # Add system prompt to memory
-        self.add_message("system", SYSTEM_PROMPT)
+    
+    def get_llm(self, model):
+        # Shared client from the registry; interactive priority in the LLM gateway
+        return chat_model(model=model, temperature=0.7)
     
     def add_message(self, role, content):
         """Add a message to the conversation memory"""
         if role == "user":
-            self.memory.chat_memory.add_user_message(content)
+            self.history.append(HumanMessage(content=content))
         elif role == "assistant":
-            self.memory.chat_memory.add_ai_message(content)
+            self.history.append(AIMessage(content=content))
         elif role == "system":
-            self.memory.chat_memory.add_message({"role": "system", "content": content})
+            self.prompt.add_context(content)
         else:
             raise ValueError(f"Unknown role: {role}")
     
+    def route(self, user_input):
+        if self.llm_model:
+            return RoutingDecision(self.llm_model, "pinned", "pinned")
+        return self.router.route(self.endpoint, user_input)
+    
+    def respond(self, user_input, on_token=None):
+        """Answer a user turn and add both messages to the history
+        
+        With ``on_token`` the reply is streamed and each chunk of text is passed to it as it arrives.
+        """
+        turn_started = time.perf_counter()
+        decision = self.route(user_input)
+        routed = time.perf_counter()
+        messages = self.prompt.build(self.history, user_input)
+        
+        started = time.perf_counter()
+        TURN_STAGE_SECONDS.observe(routed - turn_started, endpoint=self.endpoint, stage="route")
+        TURN_STAGE_SECONDS.observe(started - routed, endpoint=self.endpoint, stage="prompt")
+        try:
+            with profiler.span("llm", decision.model):
+                reply = self.generate(self.get_llm(decision.model), messages, on_token)
+        except Exception as e:
+            TURN_ERRORS.inc(endpoint=self.endpoint, model=decision.model, error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        self.router.record_latency(self.endpoint, decision.model, elapsed)
+        TURN_STAGE_SECONDS.observe(elapsed, endpoint=self.endpoint, stage="llm")
+        
+        self.history.append(messages[-1])
+        self.history.append(AIMessage(content=reply.content))
+        self.prompt.trim(self.history)
+        
+        usage = reply.usage_metadata or {}
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        return ChatTurn(reply.content, decision.model, int(elapsed * 1000), usage.get("input_tokens"), cached_tokens)
+    
+    @staticmethod
+    def generate(llm, messages, on_token=None):
+        if on_token is None:
+            return llm.invoke(messages)
+        reply = AIMessageChunk(content="")
+        for chunk in llm.stream(messages):
+            if chunk.content:
+                on_token(chunk.content)
+            reply += chunk
+        return reply
+    
     def get_response(self, user_input):
         """Get a response from the chatbot"""
-        return self.chain.predict(input=user_input)
+        return self.respond(user_input).content
     
     def get_messages(self):
         """Get all messages in the conversation"""
-        return self.memory.chat_memory.messages
\ No newline at end of file
+        return self.prompt.build(self.history)
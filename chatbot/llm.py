@@ -0,0 +1,190 @@
+"""Process-wide chat model registry routed through the LLM gateway.
+
+``chat_model`` returns a shared ChatOpenAI per (model, temperature, priority)
+instead of building one per conversation. Every model in the registry uses
+one keep-alive httpx pool, and its callbacks take a gateway slot before each
+call and release it when the call ends, so LangChain chains are admitted by
+``services.ai.llm_gateway`` without wrapping every call site. ``warm_up``
+builds the routed models and opens pooled connections at startup so the first
+turn does not pay for the TLS handshake.
+
+CrewAI agents are not covered: CrewAI builds its own client from a model name,
+so crews neither share this pool nor run these callbacks. They are admitted
+per crew run by ``chatbot.agents.crewai_agent.run_crew`` instead.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_openai import ChatOpenAI
+
+from services.ai.llm_gateway import INTERACTIVE, llm_gateway
+from services.ai.model_router import model_router
+from services.observability import metrics
+
+load_dotenv()
+
+# Output tokens reserved per call until the provider reports real usage
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "512"))
+
+PROMPT_TOKENS = metrics.counter("llm_prompt_tokens_total", "Prompt tokens by provider prompt cache result", ["model", "cache"])
+COMPLETION_TOKENS = metrics.counter("llm_completion_tokens_total", "Tokens generated by the model", ["model"])
+PROMPT_CACHE_HIT_RATIO = metrics.gauge("llm_prompt_cache_hit_ratio", "Share of prompt tokens served from the provider prompt cache")
+
+# Models that have reported prompt usage, to read PROMPT_TOKENS back per label set
+_prompt_token_models = set()
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "120"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_WARMUP_CONNECTIONS = int(os.getenv("LLM_WARMUP_CONNECTIONS", "2"))
+LLM_WARMUP_TIMEOUT = float(os.getenv("LLM_WARMUP_TIMEOUT", "5"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+def record_prompt_cache(model: str, usage: Dict[str, Any]):
+    """Count prompt tokens served from the provider's prompt cache vs processed anew"""
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    if prompt_tokens:
+        _prompt_token_models.add(model)
+        PROMPT_TOKENS.inc(cached_tokens, model=model, cache="hit")
+        PROMPT_TOKENS.inc(prompt_tokens - cached_tokens, model=model, cache="miss")
+
+
+def prompt_token_totals() -> Dict[str, float]:
+    """Prompt tokens by cache result ("hit"/"miss"), summed over models"""
+    models = list(_prompt_token_models)
+    return {cache: sum(PROMPT_TOKENS.value(model=model, cache=cache) for model in models) for cache in ("hit", "miss")}
+
+
+def prompt_cache_hit_ratio() -> float:
+    totals = prompt_token_totals()
+    processed = totals["hit"] + totals["miss"]
+    return totals["hit"] / processed if processed else 0.0
+
+
+PROMPT_CACHE_HIT_RATIO.set_function(prompt_cache_hit_ratio)
+
+
+class GatewayCallbackHandler(BaseCallbackHandler):
+    """Holds a gateway slot for the duration of every LLM run it sees"""
+    
+    # Let LLMOverloaded propagate out of on_chat_model_start instead of being logged
+    raise_error = True
+    
+    def __init__(self, priority: str = INTERACTIVE, gateway=llm_gateway):
+        self.priority = priority
+        self.gateway = gateway
+        self._runs: Dict[UUID, tuple] = {}
+    
+    def _start(self, run_id: UUID, prompt_tokens: int):
+        reserved = self.gateway.acquire(self.priority, prompt_tokens + LLM_OUTPUT_TOKEN_ESTIMATE)
+        self._runs[run_id] = (reserved, time.monotonic())
+    
+    def _finish(self, run_id: UUID, used=None):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            reserved, started = run
+            self.gateway.release(reserved, used=used, duration=time.monotonic() - started)
+    
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs):
+        self._start(run_id, sum(estimate_tokens(str(m.content)) for batch in messages for m in batch))
+    
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs):
+        self._start(run_id, sum(estimate_tokens(prompt) for prompt in prompts))
+    
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        self._finish(run_id, usage.get("total_tokens"))
+        model = llm_output.get("model_name") or "unknown"
+        record_prompt_cache(model, usage)
+        if usage.get("completion_tokens"):
+            COMPLETION_TOKENS.inc(usage["completion_tokens"], model=model)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._finish(run_id)
+
+
+_http_client: Optional[httpx.Client] = None
+_models: Dict[Tuple[str, float, str], ChatOpenAI] = {}
+_registry_lock = threading.Lock()
+
+
+def shared_http_client() -> httpx.Client:
+    """The keep-alive pool every registered chat model sends requests through"""
+    global _http_client
+    with _registry_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=LLM_REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return _http_client
+
+
+def chat_model(model: str = "gpt-4o", temperature: float = 0.7, priority: str = INTERACTIVE) -> ChatOpenAI:
+    """Shared chat model for (model, temperature, priority); priority selects the gateway callbacks"""
+    key = (model, float(temperature), priority)
+    llm = _models.get(key)
+    if llm is None:
+        http_client = shared_http_client()
+        with _registry_lock:
+            llm = _models.get(key)
+            if llm is None:
+                llm = _models[key] = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    callbacks=[GatewayCallbackHandler(priority)],
+                    http_client=http_client,
+                    stream_usage=True,  # token usage on streamed replies too
+                )
+    return llm
+
+
+def warm_up(models: Optional[Iterable[Tuple[str, float, str]]] = None) -> Dict[str, float]:
+    """Build the routed chat models and open pooled connections; returns seconds per step"""
+    if models is None:
+        models = [(name, 0.7, INTERACTIVE) for name in sorted(set(model_router.models.values()))]
+    
+    timings = {}
+    started = time.perf_counter()
+    llms = [chat_model(*key) for key in models]
+    timings["build"] = time.perf_counter() - started
+    
+    # Concurrent cheap requests leave that many TLS connections idle in the pool
+    started = time.perf_counter()
+    client = llms[0].root_client.with_options(timeout=LLM_WARMUP_TIMEOUT, max_retries=0)
+    threads = [threading.Thread(target=_open_connection, args=(client,)) for _ in range(LLM_WARMUP_CONNECTIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(LLM_WARMUP_TIMEOUT)
+    timings["connect"] = time.perf_counter() - started
+    return timings
+
+
+def _open_connection(client):
+    try:
+        client.models.list()
+    except Exception as e:
+        print(f"LLM warm-up request failed: {e}")
+
+
+def registered_models() -> List[str]:
+    return [f"{model}@{temperature}/{priority}" for model, temperature, priority in _models]
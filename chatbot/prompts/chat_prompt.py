@@ -0,0 +1,49 @@
+"""Chat prompt assembly ordered for provider-side prompt caching.
+
+Providers cache the longest previously seen prompt prefix, so the messages are
+laid out from most to least stable: the static system prompt, then stable
+per-conversation context, then the history, then the new user turn. The
+prefix messages are built once per conversation so they are byte-identical
+on every call, and history is trimmed in large steps rather than sliding one
+turn at a time, which would change the prefix on every call.
+"""
+import os
+from typing import List, Optional, Sequence
+
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from chatbot.prompts.base_prompt import SYSTEM_PROMPT
+
+load_dotenv()
+
+LLM_HISTORY_MAX_MESSAGES = int(os.getenv("LLM_HISTORY_MAX_MESSAGES", "40"))
+
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT.strip())
+
+
+class ChatPromptBuilder:
+    def __init__(self, context: Optional[Sequence[str]] = None, max_history: int = LLM_HISTORY_MAX_MESSAGES):
+        self.max_history = max_history
+        self._prefix: List[BaseMessage] = [SYSTEM_MESSAGE]
+        for text in context or ():
+            self.add_context(text)
+    
+    def add_context(self, text: str):
+        """Append stable context (user profile, course facts) after the system prompt"""
+        self._prefix.append(SystemMessage(content=text))
+    
+    def prefix(self) -> List[BaseMessage]:
+        return list(self._prefix)
+    
+    def build(self, history: Sequence[BaseMessage], user_input: Optional[str] = None) -> List[BaseMessage]:
+        messages = self._prefix + list(history)
+        if user_input is not None:
+            messages.append(HumanMessage(content=user_input))
+        return messages
+    
+    def trim(self, history: List[BaseMessage]):
+        """Drop the oldest turns in one step once history exceeds the limit"""
+        if len(history) > self.max_history:
+            drop = len(history) - self.max_history // 2
+            del history[: drop + drop % 2]  # whole user/assistant pairs
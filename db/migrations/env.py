@@ -13,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 load_dotenv()
 
 # Import all models
-from models import User, Course, Conversation, ConversationMessage
+from models import User, Course, Conversation, ConversationMessage, CourseRecommendation, CatalogVersion, CrmOutbox
 from db.utils.database import Base
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,42 @@
+"""add course_recommendations
+
+Revision ID: a1c3e5f70026
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a1c3e5f70026"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "course_recommendations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("run_id", sa.String(length=64), nullable=True),
+        sa.Column("query", sa.Text(), nullable=True),
+        sa.Column("recommendations", sa.Text(), nullable=True),
+        sa.Column("user_profile", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_course_recommendations_id"), "course_recommendations", ["id"], unique=False)
+    op.create_index(op.f("ix_course_recommendations_user_id"), "course_recommendations", ["user_id"], unique=True)
+    op.create_index(op.f("ix_course_recommendations_run_id"), "course_recommendations", ["run_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_course_recommendations_run_id"), table_name="course_recommendations")
+    op.drop_index(op.f("ix_course_recommendations_user_id"), table_name="course_recommendations")
+    op.drop_index(op.f("ix_course_recommendations_id"), table_name="course_recommendations")
+    op.drop_table("course_recommendations")
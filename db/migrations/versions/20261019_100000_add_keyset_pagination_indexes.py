@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: b2d4f6a80029
+Revises: a1c3e5f70026
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b2d4f6a80029"
+down_revision = "a1c3e5f70026"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_conversations_user_id_id", "conversations", ["user_id", "id"], unique=False)
+    op.create_index(
+        "ix_conversation_messages_conversation_id_created_at",
+        "conversation_messages",
+        ["conversation_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index("ix_courses_category_id", "courses", ["category", "id"], unique=False)
+    op.create_index("ix_courses_difficulty_level_id", "courses", ["difficulty_level", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_courses_difficulty_level_id", table_name="courses")
+    op.drop_index("ix_courses_category_id", table_name="courses")
+    op.drop_index("ix_conversation_messages_conversation_id_created_at", table_name="conversation_messages")
+    op.drop_index("ix_conversations_user_id_id", table_name="conversations")
@@ -0,0 +1,31 @@
+"""add catalog_versions
+
+Revision ID: c3e5a7b90032
+Revises: b2d4f6a80029
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c3e5a7b90032"
+down_revision = "b2d4f6a80029"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(catalog_versions, [{"name": "courses", "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_versions")
@@ -0,0 +1,40 @@
+"""add course full-text index
+
+Revision ID: d4f6b8c00033
+Revises: c3e5a7b90032
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+
+from db.utils.fulltext import SQLITE_FTS_DDL, SQLITE_FTS_DROP
+
+
+# revision identifiers, used by Alembic.
+revision = "d4f6b8c00033"
+down_revision = "c3e5a7b90032"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.create_index(
+            "ix_courses_fulltext_title_description",
+            "courses",
+            ["title", "description"],
+            mysql_prefix="FULLTEXT",
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ix_courses_fulltext_title_description", table_name="courses")
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            op.execute(statement)
@@ -0,0 +1,41 @@
+"""add crm_outbox
+
+Revision ID: e5a7c9d10035
+Revises: d4f6b8c00033
+Create Date: 2026-10-19 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a7c9d10035"
+down_revision = "d4f6b8c00033"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crm_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+        sa.ForeignKeyConstraint(["message_id"], ["conversation_messages.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("message_id"),
+    )
+    op.create_index(op.f("ix_crm_outbox_id"), "crm_outbox", ["id"], unique=False)
+    op.create_index(op.f("ix_crm_outbox_conversation_id"), "crm_outbox", ["conversation_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_crm_outbox_conversation_id"), table_name="crm_outbox")
+    op.drop_index(op.f("ix_crm_outbox_id"), table_name="crm_outbox")
+    op.drop_table("crm_outbox")
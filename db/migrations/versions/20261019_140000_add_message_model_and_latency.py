@@ -0,0 +1,26 @@
+"""add model and latency_ms to conversation_messages
+
+Revision ID: f6b8d0e20040
+Revises: e5a7c9d10035
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f6b8d0e20040"
+down_revision = "e5a7c9d10035"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("conversation_messages", sa.Column("model", sa.String(length=64), nullable=True))
+    op.add_column("conversation_messages", sa.Column("latency_ms", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("conversation_messages", "latency_ms")
+    op.drop_column("conversation_messages", "model")
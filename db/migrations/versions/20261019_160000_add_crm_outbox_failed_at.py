@@ -0,0 +1,24 @@
+"""add crm_outbox.failed_at
+
+Revision ID: c9e1a3b50035
+Revises: a7c9e1f30048
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c9e1a3b50035"
+down_revision = "a7c9e1f30048"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("crm_outbox", sa.Column("failed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("crm_outbox", "failed_at")
@@ -1,3 +1 @@
-from .database import engine, Base, SessionLocal, get_db
-from .models import User, Post, Comment, Like
-from .schemas import UserCreate, UserUpdate, UserResponse, PostCreate, PostResponse, CommentCreate, CommentResponse, LikeCreate, LikeResponse
\ No newline at end of file
+from .database import engine, Base, SessionLocal, get_db, get_db_context, get_async_db, get_async_read_db, get_read_db, get_read_session
@@ -1,11 +1,19 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from typing import AsyncGenerator, Generator, Optional
+import itertools
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from db.utils.pool import TimedQueuePool, TimedAsyncAdaptedQueuePool, instrument_engine
+from services.cache.ttl_cache import TTLCache
+from services.observability import metrics
+
 load_dotenv()
 
 # Database connection parameters
@@ -15,24 +23,198 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
 DB_NAME = os.getenv("DB_NAME", "crm_education")
 
-SQLALCHEMY_DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Connection pool settings (shared by the sync and async engines)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# Per-statement latency histograms (db_query_seconds)
+DB_QUERY_METRICS_ENABLED = os.getenv("DB_QUERY_METRICS_ENABLED", "True").lower() == "true"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+# DATABASE_URL overrides the MySQL settings, e.g. sqlite:///./local.db for benchmarks
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+def _default_async_url(url: str) -> str:
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url.replace("mysql+mysqlconnector://", "mysql+aiomysql://", 1)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _default_async_url(SQLALCHEMY_DATABASE_URL))
+
+# Read replicas: comma-separated URLs. Read-only routes use them unless the
+# client wrote recently, in which case reads stick to the primary for
+# READ_YOUR_WRITES_SECONDS so it sees its own writes despite replication lag.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+def engine_options(url: str) -> dict:
+    """Pool and driver options for an engine URL"""
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = DB_POOL_RECYCLE
+    return options
+
+engine = instrument_engine(
+    create_engine(SQLALCHEMY_DATABASE_URL, poolclass=TimedQueuePool, **engine_options(SQLALCHEMY_DATABASE_URL)),
+    "primary",
+    time_queries=DB_QUERY_METRICS_ENABLED,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# Database dependency
-def get_db() -> Generator:
+def utcnow() -> datetime:
+    """Naive UTC: the one clock for every timestamp the app writes, column defaults included"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+replica_engines = [
+    instrument_engine(
+        create_engine(url, poolclass=TimedQueuePool, **engine_options(url)), f"replica_{index}",
+        time_queries=DB_QUERY_METRICS_ENABLED,
+    )
+    for index, url in enumerate(DB_REPLICA_URLS)
+]
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+_replica_cycle = itertools.cycle(range(len(ReplicaSessionLocals))) if ReplicaSessionLocals else None
+_replica_lock = threading.Lock()
+_recent_writers = TTLCache(maxsize=100000, ttl=READ_YOUR_WRITES_SECONDS)
+
+READ_ROUTING = metrics.counter(
+    "db_read_routing_total",
+    "Read sessions handed out, by target engine and reason",
+    ["target", "reason"],
+)
+
+SESSION_SECONDS = metrics.histogram(
+    "db_session_seconds",
+    "How long a request held its database session",
+    ["kind"],
+)
+
+def mark_recent_write(key: Optional[str]):
+    if key:
+        _recent_writers.set(key, True)
+
+def get_read_session(sticky_key: Optional[str] = None):
+    """Open a session for read-only work, on a replica when one is available"""
+    if not ReplicaSessionLocals:
+        READ_ROUTING.inc(target="primary", reason="no_replica")
+        return SessionLocal()
+    if sticky_key and _recent_writers.get(sticky_key):
+        READ_ROUTING.inc(target="primary", reason="read_your_writes")
+        return SessionLocal()
+    
+    with _replica_lock:
+        index = next(_replica_cycle)
+    READ_ROUTING.inc(target=f"replica_{index}", reason="replica")
+    return ReplicaSessionLocals[index]()
+
+def routing_stats() -> dict:
+    """Read routing split, e.g. {"primary/read_your_writes": 3, "replica_0/replica": 97}"""
+    routes = [("primary", "no_replica"), ("primary", "read_your_writes")]
+    routes += [(f"replica_{index}", "replica") for index in range(len(ReplicaSessionLocals))]
+    stats = {f"{target}/{reason}": READ_ROUTING.value(target=target, reason=reason) for target, reason in routes}
+    return {route: count for route, count in stats.items() if count}
+
+# Async engines (the primary and one per replica), created on first use so the
+# async driver is only required by deployments that actually use it
+_async_engines = {}
+_async_sessionmakers = {}
+_async_lock = threading.Lock()
+
+def get_async_engine(replica: Optional[int] = None):
+    """Async engine for the primary, or for DB_REPLICA_URLS[replica]"""
+    with _async_lock:
+        if replica not in _async_engines:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            
+            url = ASYNC_DATABASE_URL if replica is None else _default_async_url(DB_REPLICA_URLS[replica])
+            options = engine_options(url)
+            options.pop("connect_args", None)
+            async_engine = create_async_engine(url, poolclass=TimedAsyncAdaptedQueuePool, **options)
+            name = "primary_async" if replica is None else f"replica_{replica}_async"
+            instrument_engine(async_engine.sync_engine, name, time_queries=DB_QUERY_METRICS_ENABLED)
+            _async_engines[replica] = async_engine
+        return _async_engines[replica]
+
+def get_async_sessionmaker(replica: Optional[int] = None):
+    if replica not in _async_sessionmakers:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        
+        _async_sessionmakers[replica] = async_sessionmaker(
+            bind=get_async_engine(replica), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmakers[replica]
+
+def get_async_read_session(sticky_key: Optional[str] = None):
+    """Async counterpart of get_read_session, with the same routing"""
+    if not ReplicaSessionLocals:
+        READ_ROUTING.inc(target="primary", reason="no_replica")
+        return get_async_sessionmaker()()
+    if sticky_key and _recent_writers.get(sticky_key):
+        READ_ROUTING.inc(target="primary", reason="read_your_writes")
+        return get_async_sessionmaker()()
+    
+    with _replica_lock:
+        index = next(_replica_cycle)
+    READ_ROUTING.inc(target=f"replica_{index}", reason="replica")
+    return get_async_sessionmaker(index)()
+
+# Database dependency. The API layer (api/dependencies.py) identifies the
+# client and passes its key in; this module never looks at requests.
+def get_db(writer_key: Optional[str] = None) -> Generator:
+    """Primary session; ``writer_key`` marks that client as a recent writer"""
+    mark_recent_write(writer_key)
     db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        yield db
+    finally:
+        db.close()
+        SESSION_SECONDS.observe(time.perf_counter() - started, kind="primary")
+
+def get_read_db(writer_key: Optional[str] = None) -> Generator:
+    """Session for read-only routes: replica, or primary right after ``writer_key`` wrote"""
+    db = get_read_session(writer_key)
+    started = time.perf_counter()
     try:
         yield db
     finally:
         db.close()
+        SESSION_SECONDS.observe(time.perf_counter() - started, kind="read")
+
+@asynccontextmanager
+async def async_session_scope(db, kind: str) -> AsyncGenerator:
+    started = time.perf_counter()
+    try:
+        yield db
+    finally:
+        await db.close()
+        SESSION_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+async def get_async_db(writer_key: Optional[str] = None) -> AsyncGenerator:
+    """Async variant of get_db backed by the async engine"""
+    mark_recent_write(writer_key)
+    async with async_session_scope(get_async_sessionmaker()(), "primary") as db:
+        yield db
+
+async def get_async_read_db(writer_key: Optional[str] = None) -> AsyncGenerator:
+    """Async variant of get_read_db backed by the async engines"""
+    async with async_session_scope(get_async_read_session(writer_key), "read") as db:
+        yield db
 
 @contextmanager
 def get_db_context():
@@ -0,0 +1,42 @@
+"""SQLite stand-in for the courses FULLTEXT index.
+
+MySQL gets a FULLTEXT index on (title, description). SQLite has none, so
+the ``courses_fts`` FTS5 table, kept in sync by triggers, takes its place.
+The DDL lives here so that the full-text migration and databases built with
+``create_all`` (tests, benchmarks) create the same objects.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+        title, description, content='courses', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS courses_fts_au",
+    "DROP TRIGGER IF EXISTS courses_fts_ad",
+    "DROP TRIGGER IF EXISTS courses_fts_ai",
+    "DROP TABLE IF EXISTS courses_fts",
+]
+
+
+def ensure_sqlite_fts(engine: Engine):
+    """Create the FTS5 fallback on a SQLite database built with create_all (idempotent)"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        for statement in SQLITE_FTS_DDL:
+            connection.execute(text(statement))
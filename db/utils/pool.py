@@ -0,0 +1,104 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from services.observability import metrics, profiler
+
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = metrics.counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that failed (pool timeout or connect error)",
+    ["engine"],
+)
+POOL_IN_USE = metrics.gauge("db_pool_connections_in_use", "Connections currently checked out", ["engine"])
+POOL_OVERFLOW = metrics.gauge("db_pool_overflow", "Connections open beyond pool_size", ["engine"])
+POOL_SIZE = metrics.gauge("db_pool_size", "Configured pool size", ["engine"])
+QUERY_SECONDS = metrics.histogram(
+    "db_query_seconds",
+    "Statement execution time, by statement kind",
+    ["engine", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+QUERY_ERRORS = metrics.counter("db_query_errors_total", "Statements that raised", ["engine", "operation", "error"])
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].upper()
+    return verb if verb in OPERATIONS else "OTHER"
+
+
+class _TimedCheckoutMixin:
+    """Records how long each checkout waited on the pool"""
+    metrics_label = "default"
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            POOL_CHECKOUT_TIMEOUTS.inc(engine=self.metrics_label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, engine=self.metrics_label)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, label: str, time_queries: bool = True):
+    """Label an engine's pool, export its saturation gauges and optionally time every statement
+
+    Statement timing hooks SQLAlchemy's cursor events, which costs a few
+    microseconds per statement; pool gauges are read at scrape time only.
+    """
+    pool = engine.pool
+    pool.metrics_label = label
+    
+    POOL_IN_USE.set_function(lambda: engine.pool.checkedout(), engine=label)
+    POOL_OVERFLOW.set_function(lambda: max(0, engine.pool.overflow()), engine=label)
+    POOL_SIZE.set_function(lambda: engine.pool.size(), engine=label)
+    if not time_queries:
+        return engine
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        context.metrics_started = time.perf_counter()
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish_query(conn, cursor, statement, parameters, context, executemany):
+        finished = time.perf_counter()
+        operation = _operation(statement)
+        QUERY_SECONDS.observe(finished - context.metrics_started, engine=label, operation=operation)
+        profiler.record_span("db", operation, context.metrics_started, finished)
+    
+    @event.listens_for(engine, "handle_error")
+    def _query_error(exception_context):
+        statement = exception_context.statement or ""
+        QUERY_ERRORS.inc(
+            engine=label, operation=_operation(statement), error=type(exception_context.original_exception).__name__
+        )
+    
+    return engine
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "checked_in": pool.checkedin(),
+    }
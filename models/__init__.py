@@ -1,4 +1,8 @@
 from .user import User
 from .course import Course
 from .conversation import Conversation
-from .conversation_message import ConversationMessage
\ No newline at end of file
+from .conversation_message import ConversationMessage
+from .conversation_archive import ConversationArchive
+from .course_recommendation import CourseRecommendation
+from .catalog_version import CatalogVersion
+from .crm_outbox import CrmOutbox
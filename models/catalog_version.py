@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from db.utils.database import Base, utcnow
+
+class CatalogVersion(Base):
+    """Monotonic version counter shared by all workers to invalidate catalog caches"""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow)
+    
+    def __repr__(self):
+        return f"<CatalogVersion {self.name}={self.version}>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from db.utils.database import Base, utcnow
+
+class ConversationArchive(Base):
+    """Messages of an idle conversation, moved out of conversation_messages as one compressed blob"""
+    __tablename__ = "conversation_archives"
+
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), primary_key=True)
+    message_count = Column(Integer, nullable=False)
+    first_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    codec = Column(String(16), nullable=False, default="zlib")
+    raw_bytes = Column(Integer, nullable=False)  # size of the JSON before compression
+    payload = Column(LargeBinary().with_variant(LONGBLOB(), "mysql"), nullable=False)
+    archived_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    
+    # Relationships
+    conversation = relationship("Conversation", back_populates="archive")
+    
+    def __repr__(self):
+        return f"<ConversationArchive {self.conversation_id} ({self.message_count} messages)>"
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from db.utils.database import Base
+from db.utils.database import Base, utcnow
 
 class MessageRole(str, enum.Enum):
     USER = "user"
@@ -11,12 +11,17 @@ class MessageRole(str, enum.Enum):
 
 class ConversationMessage(Base):
     __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_id_created_at", "conversation_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"))
     role = Column(Enum(MessageRole), default=MessageRole.USER)
     content = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    model = Column(String(64), nullable=True)  # LLM that produced an assistant message
+    latency_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
     
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from db.utils.database import Base
+from db.utils.database import Base, utcnow
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_category_id", "category", "id"),
+        Index("ix_courses_difficulty_level_id", "difficulty_level", "id"),
+        # SQLite uses the courses_fts FTS5 table instead (see services/search/course_search.py)
+        Index("ix_courses_fulltext_title_description", "title", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), index=True)
@@ -14,8 +20,8 @@ class Course(Base):
     difficulty_level = Column(String(50))
     duration_hours = Column(Float)
     price = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
     
     # Relationships
     instructor = relationship("User", back_populates="courses")
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from db.utils.database import Base, utcnow
+
+class CourseRecommendation(Base):
+    """Precomputed recommendations written by the nightly batch runner"""
+    __tablename__ = "course_recommendations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    run_id = Column(String(64), index=True)
+    query = Column(Text)
+    recommendations = Column(Text)
+    user_profile = Column(Text)  # JSON snapshot of the profile used
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
+    
+    # Relationships
+    user = relationship("User")
+    
+    def __repr__(self):
+        return f"<CourseRecommendation user={self.user_id} run={self.run_id}>"
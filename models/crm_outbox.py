@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.utils.database import Base, utcnow
+
+class CrmOutbox(Base):
+    """Transactional outbox of conversation messages waiting to be synced to the CRM"""
+    __tablename__ = "crm_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("conversation_messages.id"), unique=True, nullable=False)
+    conversation_id = Column(Integer, index=True)
+    payload = Column(Text, nullable=False)  # JSON document sent to the CRM
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)  # naive UTC, set by the flusher
+    last_error = Column(Text, nullable=True)
+    failed_at = Column(DateTime, nullable=True)  # dead-lettered after CRM_OUTBOX_MAX_ATTEMPTS, never retried
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<CrmOutbox message={self.message_id} attempts={self.attempts}>"
@@ -0,0 +1,299 @@
+"""Batch runner that precomputes course recommendations for every user.
+
+Usage:
+    python -m services.ai.batch_recommender --query "..." [--resume]
+
+Users are streamed from the database in id order, CRM profiles are fetched
+concurrently, and the recommendation crews run on a thread (or process) pool
+behind a rate limiter. Results are written chunk by chunk into the
+``course_recommendations`` table and progress is checkpointed to a JSON file
+so an interrupted run can resume where it stopped. Users whose recommendation
+failed are recorded in the checkpoint and retried first when the run resumes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from db.utils.database import SessionLocal, get_read_session
+from models.user import User
+from models.course_recommendation import CourseRecommendation
+from services.ai.course_recommender import CourseRecommender
+from services.crm.crm_client import CRMClient
+
+load_dotenv()
+
+DEFAULT_QUERY = os.getenv(
+    "BATCH_RECOMMENDATION_QUERY",
+    "Recommend the next courses that best match my interests and career goals.",
+)
+DEFAULT_CHECKPOINT = os.getenv("BATCH_RECOMMENDATION_CHECKPOINT", "batch_recommendations.checkpoint.json")
+
+
+class RateLimiter:
+    """Async token bucket limiting how many recommendations start per second"""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _run_recommendation(user_profile: Dict, query: str, available_courses: List[Dict]) -> str:
+    """Worker entry point; module level so it can be pickled for process pools"""
+    result = CourseRecommender.recommend_for_profile(user_profile, query, available_courses)
+    return str(result["recommendations"])
+
+
+class BatchRecommender:
+    """Precompute recommendations for all active users"""
+    
+    def __init__(
+        self,
+        query: str = DEFAULT_QUERY,
+        run_id: Optional[str] = None,
+        chunk_size: int = 200,
+        concurrency: int = 8,
+        crm_concurrency: int = 16,
+        rate_per_second: float = 4.0,
+        processes: int = 0,
+        checkpoint_path: str = DEFAULT_CHECKPOINT,
+    ):
+        self.query = query
+        self.run_id = run_id or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.crm_concurrency = crm_concurrency
+        self.rate_limiter = RateLimiter(rate_per_second)
+        self.processes = processes
+        self.checkpoint_path = checkpoint_path
+        self.crm_client = CRMClient()
+        
+        self.last_user_id = 0
+        self.processed = 0
+        self.failed: List[int] = []
+        # Failed ids from the checkpoint not retried yet; still saved as failed
+        self.retry_pending: List[int] = []
+    
+    # Checkpointing
+    def load_checkpoint(self) -> bool:
+        """Restore progress from the checkpoint file, returns False if there is none"""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        
+        self.run_id = checkpoint["run_id"]
+        self.query = checkpoint.get("query", self.query)
+        self.last_user_id = checkpoint.get("last_user_id", 0)
+        self.processed = checkpoint.get("processed", 0)
+        self.failed = checkpoint.get("failed", [])
+        return True
+    
+    def save_checkpoint(self):
+        checkpoint = {
+            "run_id": self.run_id,
+            "query": self.query,
+            "last_user_id": self.last_user_id,
+            "processed": self.processed,
+            "failed": self.failed + self.retry_pending,
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    # Data access
+    def fetch_user_chunk(self) -> List[Dict]:
+        """Keyset-paginate active users after the last processed id"""
+        with get_read_session() as db:
+            users = (
+                db.query(User)
+                .filter(User.id > self.last_user_id, User.is_active == True)
+                .order_by(User.id)
+                .limit(self.chunk_size)
+                .all()
+            )
+            return [CourseRecommender.build_user_profile(user) for user in users]
+    
+    def fetch_users(self, user_ids: List[int]) -> List[Dict]:
+        """Profiles of specific (still active) users, e.g. the failures of a previous attempt"""
+        with get_read_session() as db:
+            users = (
+                db.query(User)
+                .filter(User.id.in_(user_ids), User.is_active == True)
+                .order_by(User.id)
+                .all()
+            )
+            return [CourseRecommender.build_user_profile(user) for user in users]
+    
+    def load_available_courses(self) -> List[Dict]:
+        with get_read_session() as db:
+            return CourseRecommender(db).get_available_courses()
+    
+    def write_results(self, results: List[Dict]):
+        """Replace the materialized rows for this chunk in a single transaction"""
+        if not results:
+            return
+        
+        user_ids = [result["user_id"] for result in results]
+        with SessionLocal() as db:
+            db.query(CourseRecommendation).filter(
+                CourseRecommendation.user_id.in_(user_ids)
+            ).delete(synchronize_session=False)
+            db.bulk_insert_mappings(CourseRecommendation, results)
+            db.commit()
+    
+    # Pipeline
+    async def fetch_crm_profile(self, base_profile: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        async with semaphore:
+            try:
+                crm_user = await asyncio.to_thread(self.crm_client.get_user, base_profile["id"])
+            except Exception:
+                crm_user = None
+        
+        if not crm_user:
+            return base_profile
+        
+        profile = dict(base_profile)
+        for key in ("interests", "education_level", "career_goals", "enrolled_courses", "completed_courses"):
+            if key in crm_user:
+                profile[key] = crm_user[key]
+        return profile
+    
+    async def recommend_user(
+        self,
+        base_profile: Dict,
+        available_courses: List[Dict],
+        executor: Executor,
+        crm_semaphore: asyncio.Semaphore,
+        semaphore: asyncio.Semaphore,
+    ) -> Optional[Dict]:
+        profile = await self.fetch_crm_profile(base_profile, crm_semaphore)
+        
+        async with semaphore:
+            await self.rate_limiter.acquire()
+            loop = asyncio.get_running_loop()
+            try:
+                recommendations = await loop.run_in_executor(
+                    executor, _run_recommendation, profile, self.query, available_courses
+                )
+            except Exception as e:
+                print(f"Recommendation failed for user {profile['id']}: {e}")
+                return None
+        
+        return {
+            "user_id": profile["id"],
+            "run_id": self.run_id,
+            "query": self.query,
+            "recommendations": recommendations,
+            "user_profile": json.dumps(profile, default=str),
+        }
+    
+    async def run(self):
+        started = time.monotonic()
+        available_courses = self.load_available_courses()
+        print(f"Batch run {self.run_id}: {len(available_courses)} courses, resuming after user {self.last_user_id}")
+        
+        crm_semaphore = asyncio.Semaphore(self.crm_concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        if self.processes:
+            executor = ProcessPoolExecutor(max_workers=self.processes)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        
+        async def process(profiles: List[Dict]) -> List[int]:
+            """Recommend and write one chunk; returns the ids that failed"""
+            outcomes = await asyncio.gather(*[
+                self.recommend_user(profile, available_courses, executor, crm_semaphore, semaphore)
+                for profile in profiles
+            ])
+            results = [outcome for outcome in outcomes if outcome]
+            await asyncio.to_thread(self.write_results, results)
+            self.processed += len(results)
+            return [profile["id"] for profile, outcome in zip(profiles, outcomes) if outcome is None]
+        
+        try:
+            # Failures recorded by an interrupted attempt are retried before moving on
+            retry_ids, self.failed = self.failed, []
+            self.retry_pending = list(retry_ids)
+            while self.retry_pending:
+                chunk_ids = self.retry_pending[:self.chunk_size]
+                profiles = await asyncio.to_thread(self.fetch_users, chunk_ids)
+                self.failed.extend(await process(profiles))
+                del self.retry_pending[:len(chunk_ids)]
+                self.save_checkpoint()
+            if retry_ids:
+                print(f"Retried {len(retry_ids)} previously failed users, {len(self.failed)} still failing")
+            
+            while True:
+                profiles = await asyncio.to_thread(self.fetch_user_chunk)
+                if not profiles:
+                    break
+                
+                self.failed.extend(await process(profiles))
+                self.last_user_id = profiles[-1]["id"]
+                self.save_checkpoint()
+                
+                elapsed = time.monotonic() - started
+                print(f"Processed {self.processed} users ({len(self.failed)} failed) "
+                      f"up to id {self.last_user_id} in {elapsed:.1f}s")
+        finally:
+            executor.shutdown(wait=True)
+        
+        print(f"Batch run {self.run_id} finished: {self.processed} users, {len(self.failed)} failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute course recommendations for all users")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="Recommendation prompt used for every user")
+    parser.add_argument("--run-id", default=None, help="Identifier stored with every result row")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Users fetched and written per chunk")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent recommendation jobs")
+    parser.add_argument("--crm-concurrency", type=int, default=16, help="Concurrent CRM profile requests")
+    parser.add_argument("--rate", type=float, default=4.0, help="Max recommendations started per second (0 = unlimited)")
+    parser.add_argument("--processes", type=int, default=0, help="Use a process pool of this size instead of threads")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--resume", action="store_true", help="Resume from the checkpoint file if present")
+    args = parser.parse_args(argv)
+    
+    runner = BatchRecommender(
+        query=args.query,
+        run_id=args.run_id,
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency,
+        crm_concurrency=args.crm_concurrency,
+        rate_per_second=args.rate,
+        processes=args.processes,
+        checkpoint_path=args.checkpoint,
+    )
+    if args.resume and runner.load_checkpoint():
+        print(f"Resuming run {runner.run_id} from checkpoint {args.checkpoint}")
+    
+    asyncio.run(runner.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from services.crm.crm_client import CRMClient
-from chatbot.agents.crewai_agent import create_course_recommendation_crew
 from models.user import User
 from models.course import Course
 
@@ -9,6 +8,7 @@ class CourseRecommender:
     """Service for AI-powered course recommendations"""
     
     def __init__(self, db: Session):
+        # Only reads through it, so callers may pass a replica session (see get_read_session)
         self.db = db
         self.crm_client = CRMClient()
     
@@ -23,34 +23,28 @@ class CourseRecommender:
         # Try to get additional user information from CRM
         try:
             crm_user = self.crm_client.get_user(user_id)
-            # Merge CRM user data with database user
-            user_profile = {
-                "id": db_user.id,
-                "username": db_user.username,
-                "email": db_user.email,
-                "is_active": db_user.is_active,
-                # Add additional fields from CRM if available
-                "interests": crm_user.get("interests", []),
-                "education_level": crm_user.get("education_level"),
-                "career_goals": crm_user.get("career_goals", []),
-                "enrolled_courses": crm_user.get("enrolled_courses", []),
-                "completed_courses": crm_user.get("completed_courses", [])
-            }
         except Exception:
             # If CRM data is unavailable, use only database data
-            user_profile = {
-                "id": db_user.id,
-                "username": db_user.username,
-                "email": db_user.email,
-                "is_active": db_user.is_active,
-                "interests": [],
-                "education_level": None,
-                "career_goals": [],
-                "enrolled_courses": [],
-                "completed_courses": []
-            }
+            crm_user = None
         
-        return user_profile
+        return self.build_user_profile(db_user, crm_user)
+    
+    @staticmethod
+    def build_user_profile(db_user: User, crm_user: Optional[Dict] = None) -> Dict:
+        """Merge a database user with (optional) CRM user data"""
+        crm_user = crm_user or {}
+        return {
+            "id": db_user.id,
+            "username": db_user.username,
+            "email": db_user.email,
+            "is_active": db_user.is_active,
+            # Add additional fields from CRM if available
+            "interests": crm_user.get("interests", []),
+            "education_level": crm_user.get("education_level"),
+            "career_goals": crm_user.get("career_goals", []),
+            "enrolled_courses": crm_user.get("enrolled_courses", []),
+            "completed_courses": crm_user.get("completed_courses", [])
+        }
     
     def get_available_courses(self, category: Optional[str] = None, difficulty: Optional[str] = None) -> List[Dict]:
         """Get available courses from both database and CRM"""
@@ -107,6 +101,14 @@ class CourseRecommender:
         # Get available courses
         available_courses = self.get_available_courses()
         
+        return self.recommend_for_profile(user_profile, query, available_courses)
+    
+    @staticmethod
+    def recommend_for_profile(user_profile: Dict, query: str, available_courses: List[Dict]) -> Dict:
+        """Run the recommendation crew for an already resolved profile and catalog"""
+        # CrewAI is heavy to import; load it only when a crew actually runs
+        from chatbot.agents.crewai_agent import create_course_recommendation_crew, run_crew
+        
         # Create a crew for course recommendations
         crew = create_course_recommendation_crew(
             user_query=query,
@@ -115,7 +117,7 @@ class CourseRecommender:
         )
         
         # Execute the crew's tasks to get recommendations
-        result = crew.kickoff()
+        result = run_crew(crew, f"{query} {user_profile} {available_courses}")
         
         return {
             "recommendations": result,
@@ -0,0 +1,168 @@
+"""Process-wide admission control for LLM calls.
+
+Every chat model call goes through ``llm_gateway`` (see ``chatbot.llm``),
+which enforces a concurrency limit, a tokens-per-minute budget and a bounded
+priority queue. Interactive chat is always admitted ahead of batch work such
+as the recommendation crews. When a caller cannot be admitted in time the
+gateway raises ``LLMOverloaded`` with a Retry-After estimate, which the API
+turns into a 429 instead of letting every request slow down together.
+
+Limits apply per process; size them as the provider quota divided by the
+number of API workers.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.observability import metrics
+
+load_dotenv()
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+LLM_GATEWAY_MAX_CONCURRENCY = int(os.getenv("LLM_GATEWAY_MAX_CONCURRENCY", "16"))
+LLM_GATEWAY_TOKENS_PER_MINUTE = int(os.getenv("LLM_GATEWAY_TOKENS_PER_MINUTE", "300000"))
+LLM_GATEWAY_MAX_QUEUE = int(os.getenv("LLM_GATEWAY_MAX_QUEUE", "64"))
+LLM_GATEWAY_MAX_WAIT_SECONDS = float(os.getenv("LLM_GATEWAY_MAX_WAIT_SECONDS", "5"))
+LLM_GATEWAY_BATCH_MAX_WAIT_SECONDS = float(os.getenv("LLM_GATEWAY_BATCH_MAX_WAIT_SECONDS", "300"))
+
+QUEUE_WAIT = metrics.histogram(
+    "llm_gateway_queue_wait_seconds", "Time LLM calls waited for admission", ["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+REJECTIONS = metrics.counter("llm_gateway_rejections_total", "LLM calls rejected by the gateway", ["priority", "reason"])
+IN_FLIGHT = metrics.gauge("llm_gateway_in_flight", "LLM calls currently running")
+QUEUE_DEPTH = metrics.gauge("llm_gateway_queue_depth", "LLM calls waiting for admission")
+TOKENS = metrics.counter("llm_gateway_tokens_total", "Tokens charged against the per-minute budget", ["kind"])
+
+
+class LLMOverloaded(Exception):
+    """The gateway could not admit the call; retry after ``retry_after`` seconds"""
+    
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"LLM gateway overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LLMGateway:
+    """Concurrency limit + token bucket + priority queue, shared by all threads"""
+    
+    def __init__(
+        self,
+        max_concurrency: int = LLM_GATEWAY_MAX_CONCURRENCY,
+        tokens_per_minute: int = LLM_GATEWAY_TOKENS_PER_MINUTE,
+        max_queue: int = LLM_GATEWAY_MAX_QUEUE,
+        max_wait: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        # A budget of 0 disables token accounting
+        self.capacity = float(tokens_per_minute) if tokens_per_minute > 0 else math.inf
+        self.refill_rate = tokens_per_minute / 60.0 if tokens_per_minute > 0 else 0.0
+        self.max_queue = max_queue
+        self.max_wait = max_wait or {INTERACTIVE: LLM_GATEWAY_MAX_WAIT_SECONDS, BATCH: LLM_GATEWAY_BATCH_MAX_WAIT_SECONDS}
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._tokens = self.capacity
+        self._refilled_at = time.monotonic()
+        self._avg_call_seconds = 1.0
+        QUEUE_DEPTH.set_function(lambda: len(self._waiters))
+        IN_FLIGHT.set_function(lambda: self._active)
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_rate)
+        self._refilled_at = now
+    
+    def _retry_after(self, tokens: float, ahead: int) -> float:
+        token_wait = max(0.0, tokens - self._tokens) / self.refill_rate if self.refill_rate else 0.0
+        slot_wait = self._avg_call_seconds * (ahead + 1) / self.max_concurrency
+        return max(1.0, math.ceil(max(token_wait, slot_wait)))
+    
+    def _reject(self, priority: str, reason: str, tokens: float, ahead: int):
+        REJECTIONS.inc(priority=priority, reason=reason)
+        raise LLMOverloaded(reason, self._retry_after(tokens, ahead))
+    
+    def acquire(self, priority: str = INTERACTIVE, tokens: int = 0) -> float:
+        """Block until the call may run, reserving ``tokens``; returns the reservation"""
+        rank = PRIORITIES[priority]
+        reserved = float(min(tokens, self.capacity))
+        started = time.monotonic()
+        deadline = started + self.max_wait.get(priority, LLM_GATEWAY_MAX_WAIT_SECONDS)
+        
+        with self._cond:
+            # Callers of a lower rank do not delay this one, so only count those ahead of it
+            ahead = sum(1 for waiter_rank, _ in self._waiters if waiter_rank <= rank)
+            if ahead >= self.max_queue:
+                self._reject(priority, "queue_full", reserved, ahead)
+            
+            entry = (rank, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_next = self._waiters[0] == entry
+                    if is_next and self._active < self.max_concurrency and self._tokens >= reserved:
+                        break
+                    
+                    remaining = deadline - now
+                    token_bound = is_next and self._active < self.max_concurrency
+                    if remaining <= 0:
+                        self._reject(priority, "tokens" if token_bound else "concurrency", reserved, ahead)
+                    if token_bound:
+                        # Only the token budget is short: fail now if it cannot refill in
+                        # time, otherwise sleep until it has
+                        refill_wait = (reserved - self._tokens) / self.refill_rate
+                        if refill_wait > remaining:
+                            self._reject(priority, "tokens", reserved, ahead)
+                        remaining = refill_wait
+                    self._cond.wait(remaining)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            
+            heapq.heappop(self._waiters)
+            self._active += 1
+            self._tokens -= reserved
+            # The next waiter may also fit
+            self._cond.notify_all()
+        
+        QUEUE_WAIT.observe(time.monotonic() - started, priority=priority)
+        TOKENS.inc(reserved, kind="reserved")
+        return reserved
+    
+    def release(self, reserved: float, used: Optional[int] = None, duration: Optional[float] = None):
+        """Free the slot and settle the reservation against actual usage when known"""
+        with self._cond:
+            self._active -= 1
+            if used is not None:
+                self._tokens = min(self.capacity, self._tokens + reserved - used)
+                TOKENS.inc(used, kind="used")
+            if duration is not None:
+                self._avg_call_seconds = 0.9 * self._avg_call_seconds + 0.1 * duration
+            self._cond.notify_all()
+    
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, tokens: int = 0):
+        reserved = self.acquire(priority, tokens)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(reserved, duration=time.monotonic() - started)
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,108 @@
+"""Chooses the chat model for each turn.
+
+Short, low-complexity turns (greetings, thanks, simple FAQ questions) go to
+the small model; the large model is used only when a cheap heuristic sees a
+reason to escalate. Each endpoint has a routing policy:
+
+    LLM_ROUTING="chat=auto,websocket=auto,crew=large"
+
+where ``auto`` routes per turn and ``small``/``large`` pin the tier.
+"""
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.observability import metrics
+
+load_dotenv()
+
+SMALL = "small"
+LARGE = "large"
+AUTO = "auto"
+
+CHAT = "chat"
+WEBSOCKET = "websocket"
+CREW = "crew"
+
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "gpt-4o-mini")
+LLM_LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gpt-4o")
+LLM_ROUTING = os.getenv("LLM_ROUTING", "chat=auto,websocket=auto,crew=large")
+LLM_ROUTER_MAX_SIMPLE_WORDS = int(os.getenv("LLM_ROUTER_MAX_SIMPLE_WORDS", "40"))
+
+# Requests that need reasoning over several facts, planning or comparison
+COMPLEX_INTENT = re.compile(
+    r"\b(compar\w*|differen\w*|versus|vs\.?|explain\w*|why|analy[sz]\w*|plan\w*|roadmap|career|"
+    r"recommend\w*|suggest\w*|pros and cons|trade-?offs?|step[- ]by[- ]step|strateg\w*|evaluat\w*)\b",
+    re.IGNORECASE,
+)
+CODE = re.compile(r"```|\bdef |\bclass |\bSELECT\b|[{};]\s*$", re.MULTILINE)
+
+ROUTE_DECISIONS = metrics.counter("llm_route_decisions_total", "Model routing decisions", ["endpoint", "model", "reason"])
+TURN_LATENCY = metrics.histogram(
+    "llm_turn_latency_seconds", "LLM latency per chat turn", ["endpoint", "model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0),
+)
+
+
+def parse_policies(spec: str) -> Dict[str, str]:
+    policies = {}
+    for item in spec.split(","):
+        if "=" in item:
+            endpoint, policy = item.split("=", 1)
+            policies[endpoint.strip()] = policy.strip().lower()
+    return policies
+
+
+class RoutingDecision:
+    def __init__(self, model: str, tier: str, reason: str):
+        self.model = model
+        self.tier = tier
+        self.reason = reason
+    
+    def __repr__(self):
+        return f"<RoutingDecision {self.model} ({self.reason})>"
+
+
+class ModelRouter:
+    """Heuristic small/large model selection with per-endpoint policies"""
+    
+    def __init__(
+        self,
+        small_model: str = LLM_SMALL_MODEL,
+        large_model: str = LLM_LARGE_MODEL,
+        policies: Optional[Dict[str, str]] = None,
+        max_simple_words: int = LLM_ROUTER_MAX_SIMPLE_WORDS,
+    ):
+        self.models = {SMALL: small_model, LARGE: large_model}
+        self.policies = parse_policies(LLM_ROUTING) if policies is None else policies
+        self.max_simple_words = max_simple_words
+    
+    def classify(self, text: str) -> Tuple[str, str]:
+        """Return (tier, reason) for a user turn"""
+        if len(text.split()) > self.max_simple_words:
+            return LARGE, "long"
+        if CODE.search(text):
+            return LARGE, "code"
+        if text.count("?") > 2:
+            return LARGE, "multi_question"
+        if COMPLEX_INTENT.search(text):
+            return LARGE, "complex_intent"
+        return SMALL, "simple"
+    
+    def route(self, endpoint: str, text: str = "") -> RoutingDecision:
+        policy = self.policies.get(endpoint, AUTO)
+        if policy in self.models:
+            tier, reason = policy, "policy"
+        else:
+            tier, reason = self.classify(text)
+        decision = RoutingDecision(self.models[tier], tier, reason)
+        ROUTE_DECISIONS.inc(endpoint=endpoint, model=decision.model, reason=reason)
+        return decision
+    
+    def record_latency(self, endpoint: str, model: str, seconds: float):
+        TURN_LATENCY.observe(seconds, endpoint=endpoint, model=model)
+
+
+model_router = ModelRouter()
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from db.utils.database import SessionLocal
+from models.catalog_version import CatalogVersion
+from services.cache.ttl_cache import TTLCache
+from services.observability import metrics
+
+load_dotenv()
+
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "True").lower() == "true"
+CATALOG_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "1"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "2048"))
+
+CACHE_REQUESTS = metrics.counter("catalog_cache_requests_total", "Catalog cache lookups", ["catalog", "result"])
+
+
+class CatalogCache:
+    """Read-through cache of serialized catalog responses keyed by a version counter.
+    
+    Every entry is stored under the catalog version it was built from. Writers
+    bump the shared ``catalog_versions`` row in the same transaction as their
+    change; each worker re-reads that row at most every
+    ``CATALOG_VERSION_CHECK_SECONDS`` and entries of older versions simply stop
+    being addressed (and age out of the LRU).
+    
+    The row is always read on the primary, since a lagging replica would hand
+    out a version from before the latest write. The memoized version only
+    moves forward, and a writer's own worker adopts the version it committed
+    straight away (``advance``). Entries are built on the request's replica
+    session only once that replica has caught up with the version, otherwise
+    on the primary.
+    """
+    
+    def __init__(self, name: str, check_interval: float = CATALOG_VERSION_CHECK_SECONDS, maxsize: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.check_interval = check_interval
+        self.enabled = CATALOG_CACHE_ENABLED
+        self.entries = TTLCache(maxsize=maxsize, ttl=24 * 3600, name=f"catalog_{name}")
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def current_version(self) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._version
+        
+        with SessionLocal() as db:
+            version = self.version_in(db)
+        with self._lock:
+            self._version = max(self._version or 0, version)
+            self._checked_at = now
+            return self._version
+    
+    def version_in(self, db: Session) -> int:
+        """The version as ``db`` sees it (a replica may be behind)"""
+        return db.query(CatalogVersion.version).filter(CatalogVersion.name == self.name).scalar() or 0
+    
+    def etag(self, version: int, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return f'"{self.name}-v{version}-{digest}"'
+    
+    def get_or_load(self, version: int, key: Hashable, loader: Callable[[], Tuple[bytes, Dict[str, str]]]):
+        """Return (body, headers) for ``key`` at ``version``, building it with ``loader`` on a miss"""
+        if not self.enabled:
+            return loader()
+        
+        entry = self.entries.get((version, key))
+        if entry is not None:
+            CACHE_REQUESTS.inc(catalog=self.name, result="hit")
+            return entry
+        
+        CACHE_REQUESTS.inc(catalog=self.name, result="miss")
+        entry = loader()
+        self.entries.set((version, key), entry)
+        return entry
+    
+    def bump(self, db: Session) -> int:
+        """Increment the shared version inside the caller's transaction; returns the new version"""
+        updated = (
+            db.query(CatalogVersion)
+            .filter(CatalogVersion.name == self.name)
+            .update({CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.add(CatalogVersion(name=self.name, version=1))
+            db.flush()
+        return db.query(CatalogVersion.version).filter(CatalogVersion.name == self.name).scalar()
+    
+    def advance(self, version: int):
+        """Adopt the version returned by ``bump`` once its transaction has committed"""
+        with self._lock:
+            self._version = max(self._version or 0, version)
+            self._checked_at = time.monotonic()
+    
+    def invalidate(self):
+        """Force this worker to re-read the version on its next request"""
+        with self._lock:
+            self._checked_at = 0.0
+    
+    def reset(self):
+        """Forget the memoized version and every entry (the database was recreated)"""
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+        self.entries.clear()
+
+
+course_catalog_cache = CatalogCache("courses")
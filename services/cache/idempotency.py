@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Hashable, Tuple
+
+from dotenv import load_dotenv
+
+from services.cache.ttl_cache import TTLCache
+
+load_dotenv()
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used for a request with a different body"""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Bounded, TTL-limited record of requests by idempotency key.
+    
+    The first caller for a key becomes its owner and must call ``complete`` or
+    ``fail``. Later callers get the owner's future: already resolved when the
+    original finished, pending while it is still in flight. Failed requests are
+    forgotten so a retry runs again. Entries live in this process only.
+    """
+    
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, name="idempotency")
+        self._lock = threading.Lock()
+    
+    def begin(self, key: Hashable, fingerprint: str) -> Tuple[bool, Future]:
+        """Return (is_owner, future) for the key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_fingerprint, future = entry
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatch(key)
+                return False, future
+            
+            future = Future()
+            self._entries.set(key, (fingerprint, future))
+            return True, future
+    
+    def complete(self, future: Future, value: Any):
+        future.set_result(value)
+    
+    def fail(self, key: Hashable, future: Future, exc: BaseException):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is future:
+                self._entries.pop(key)
+        future.set_exception(exc)
+
+
+message_idempotency = IdempotencyStore()
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from services.observability import metrics
+
+CACHE_LOOKUPS = metrics.gauge("cache_lookups", "Lookups since start, by result", ["cache", "result"])
+CACHE_HIT_RATIO = metrics.gauge("cache_hit_ratio", "Share of lookups served from the cache since start", ["cache"])
+CACHE_ENTRIES = metrics.gauge("cache_entries", "Entries currently held", ["cache"])
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a TTL
+
+    A ``name`` exports hit/miss counts, the hit ratio and the size on ``/metrics``;
+    they are read at scrape time, so lookups pay nothing extra.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            CACHE_LOOKUPS.set_function(lambda: self.hits, cache=name, result="hit")
+            CACHE_LOOKUPS.set_function(lambda: self.misses, cache=name, result="miss")
+            CACHE_HIT_RATIO.set_function(self.hit_ratio, cache=name)
+            CACHE_ENTRIES.set_function(lambda: len(self._data), cache=name)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,44 @@
+from typing import List
+
+from db.utils.database import SessionLocal
+from models.course import Course
+from vector_db.qdrant_client import QDRANT_COURSE_COLLECTION, get_qdrant_client, initialize_collection, upsert_courses
+from vector_db.utils.embeddings import get_embeddings_batch
+
+EMBEDDING_BATCH_SIZE = 100
+
+
+def course_embedding_text(course: Course) -> str:
+    return f"{course.title}\n{course.category} / {course.difficulty_level}\n{course.description}"
+
+
+def embed_courses(course_ids: List[int], batch_size: int = EMBEDDING_BATCH_SIZE):
+    """Embed courses in batches (one embeddings request per batch) and store them in Qdrant"""
+    try:
+        client = get_qdrant_client()
+        initialize_collection(QDRANT_COURSE_COLLECTION, client=client)
+    except Exception as e:
+        print(f"Error preparing course embedding collection: {e}")
+        return
+    
+    for start in range(0, len(course_ids), batch_size):
+        batch_ids = course_ids[start:start + batch_size]
+        with SessionLocal() as db:
+            courses = db.query(Course).filter(Course.id.in_(batch_ids)).all()
+        if not courses:
+            continue
+        
+        try:
+            embeddings = get_embeddings_batch([course_embedding_text(course) for course in courses])
+            upsert_courses(client, [
+                (course.id, embedding, {
+                    "course_id": course.id,
+                    "title": course.title,
+                    "category": course.category,
+                    "difficulty_level": course.difficulty_level,
+                })
+                for course, embedding in zip(courses, embeddings)
+            ])
+        except Exception as e:
+            # Log the error and keep going with the next batch
+            print(f"Error embedding courses {batch_ids[0]}..{batch_ids[-1]}: {e}")
@@ -0,0 +1,302 @@
+"""Moves idle conversations out of the hot ``conversation_messages`` table.
+
+Usage:
+    python -m services.conversations.archive [--idle-days 90] [--batch-size 200]
+
+A conversation whose newest message is older than CONVERSATION_ARCHIVE_IDLE_DAYS
+has its messages packed into a single zlib-compressed JSON blob in
+``conversation_archives`` and deleted from ``conversation_messages``. The
+``conversations`` row stays as the summary, with ``archived_at`` set. Reads
+merge the archived messages (always older) with any newer hot messages, so
+archiving is invisible to API clients. A later pass folds such a hot tail back
+into the blob once it is idle too. Conversations with messages still waiting
+in the CRM outbox are skipped until those are synced; outbox rows the flusher
+dead-lettered are dropped along with the messages they point to.
+
+The API process also runs an archiver thread when CONVERSATION_ARCHIVE_ENABLED
+is true, one per worker. Archivers do not coordinate: each conversation is
+packed under a ``FOR UPDATE SKIP LOCKED`` lock on its ``conversations`` row
+and committed on its own, so a conversation another archiver holds is skipped,
+and a conflict costs that one conversation rather than the whole batch.
+"""
+import argparse
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from db.utils.database import SessionLocal, utcnow
+from models.conversation import Conversation
+from models.conversation_archive import ConversationArchive
+from models.conversation_message import ConversationMessage, MessageRole
+from models.crm_outbox import CrmOutbox
+from services.observability import metrics
+
+load_dotenv()
+
+CONVERSATION_ARCHIVE_ENABLED = os.getenv("CONVERSATION_ARCHIVE_ENABLED", "False").lower() == "true"
+CONVERSATION_ARCHIVE_IDLE_DAYS = float(os.getenv("CONVERSATION_ARCHIVE_IDLE_DAYS", "90"))
+CONVERSATION_ARCHIVE_BATCH_SIZE = int(os.getenv("CONVERSATION_ARCHIVE_BATCH_SIZE", "200"))
+CONVERSATION_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_ARCHIVE_INTERVAL_SECONDS", "3600"))
+CONVERSATION_ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("CONVERSATION_ARCHIVE_COMPRESSION_LEVEL", "6"))
+
+ARCHIVED_CONVERSATIONS = metrics.counter("conversation_archive_conversations_total", "Conversations archived")
+ARCHIVED_MESSAGES = metrics.counter("conversation_archive_messages_total", "Messages moved out of the hot table")
+ARCHIVE_BYTES = metrics.counter("conversation_archive_bytes_total", "Archived message bytes", ["encoding"])
+ARCHIVE_CONFLICTS = metrics.counter(
+    "conversation_archive_conflicts_total", "Conversations skipped because archiving them failed (e.g. a concurrent archiver)"
+)
+
+CODEC = "zlib"
+# Message ids per IN (...) list when deleting packed rows
+DELETE_CHUNK_SIZE = 1000
+FIELDS = ("id", "role", "content", "model", "latency_ms", "created_at")
+
+
+def pack_messages(messages: List[Dict]) -> tuple:
+    """(compressed blob, uncompressed size) for message dicts in conversation order"""
+    rows = [
+        [message["id"], message["role"], message["content"], message["model"], message["latency_ms"],
+         message["created_at"].isoformat() if message["created_at"] else None]
+        for message in messages
+    ]
+    raw = json.dumps({"fields": FIELDS, "rows": rows}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, CONVERSATION_ARCHIVE_COMPRESSION_LEVEL), len(raw)
+
+
+def unpack_messages(archive: ConversationArchive) -> List[Dict]:
+    """Archived messages as dicts shaped like ConversationMessage rows, oldest first"""
+    document = json.loads(zlib.decompress(archive.payload))
+    messages = []
+    for row in document["rows"]:
+        message = dict(zip(document["fields"], row))
+        message["conversation_id"] = archive.conversation_id
+        if message["created_at"]:
+            message["created_at"] = datetime.fromisoformat(message["created_at"])
+        messages.append(message)
+    return messages
+
+
+def message_dict(message: ConversationMessage) -> Dict:
+    role = message.role.value if hasattr(message.role, "value") else message.role
+    return {
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "role": role,
+        "content": message.content,
+        "model": message.model,
+        "latency_ms": message.latency_ms,
+        "created_at": message.created_at,
+    }
+
+
+def conversation_messages(db: Session, conversation: Conversation) -> List[Dict]:
+    """Every message of a conversation, archived ones included, oldest first"""
+    hot = (
+        db.query(ConversationMessage)
+        .filter(ConversationMessage.conversation_id == conversation.id)
+        .order_by(ConversationMessage.created_at, ConversationMessage.id)
+        .all()
+    )
+    archived = unpack_messages(conversation.archive) if conversation.archived_at and conversation.archive else []
+    return archived + [message_dict(message) for message in hot]
+
+
+def archive_conversation(db: Session, conversation_id: int, cutoff: Optional[datetime] = None) -> int:
+    """Move a conversation's hot messages into its archive blob; returns the number moved
+    
+    The caller commits. Messages already archived are kept and the new ones appended.
+    With ``cutoff``, idleness is checked again in this transaction, so a turn
+    written since the conversation was picked leaves it alone. Only the rows
+    read here are deleted; a message inserted concurrently stays hot. Returns 0
+    without reading anything if another transaction holds the conversation.
+    """
+    # SQLite ignores FOR UPDATE, but it only lets one writer commit at a time
+    locked = (
+        db.query(Conversation.id)
+        .filter(Conversation.id == conversation_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if locked is None:
+        return 0
+    columns = [getattr(ConversationMessage, field) for field in FIELDS]
+    hot = [
+        dict(zip(FIELDS, row))
+        for row in db.query(*columns)
+        .filter(ConversationMessage.conversation_id == conversation_id)
+        .order_by(ConversationMessage.created_at, ConversationMessage.id)
+    ]
+    if not hot:
+        return 0
+    newest_at = hot[-1]["created_at"]
+    if cutoff is not None and newest_at is not None and newest_at >= cutoff:
+        return 0
+    packed_ids = [message["id"] for message in hot]
+    id_chunks = [packed_ids[start:start + DELETE_CHUNK_SIZE] for start in range(0, len(packed_ids), DELETE_CHUNK_SIZE)]
+    for ids in id_chunks:
+        pending = (
+            db.query(CrmOutbox.id)
+            .filter(CrmOutbox.message_id.in_(ids), CrmOutbox.failed_at.is_(None))
+            .first()
+        )
+        if pending is not None:
+            return 0
+    for message in hot:
+        message["role"] = message["role"].value if isinstance(message["role"], MessageRole) else message["role"]
+    
+    archive = db.get(ConversationArchive, conversation_id)
+    messages = (unpack_messages(archive) if archive else []) + hot
+    payload, raw_bytes = pack_messages(messages)
+    if archive is None:
+        archive = ConversationArchive(conversation_id=conversation_id)
+        db.add(archive)
+    archive.message_count = len(messages)
+    archive.first_message_at = messages[0]["created_at"]
+    archive.last_message_at = messages[-1]["created_at"]
+    archive.codec = CODEC
+    archive.raw_bytes = raw_bytes
+    archive.payload = payload
+    archive.archived_at = utcnow()
+    
+    for ids in id_chunks:
+        db.query(CrmOutbox).filter(
+            CrmOutbox.message_id.in_(ids), CrmOutbox.failed_at.isnot(None)
+        ).delete(synchronize_session=False)
+        db.query(ConversationMessage).filter(
+            ConversationMessage.id.in_(ids)
+        ).delete(synchronize_session=False)
+    db.query(Conversation).filter(Conversation.id == conversation_id).update(
+        {Conversation.archived_at: archive.archived_at}, synchronize_session=False
+    )
+    
+    ARCHIVED_CONVERSATIONS.inc()
+    ARCHIVED_MESSAGES.inc(len(hot))
+    ARCHIVE_BYTES.inc(raw_bytes, encoding="raw")
+    ARCHIVE_BYTES.inc(len(payload), encoding="compressed")
+    return len(hot)
+
+
+def idle_conversation_ids(db: Session, conversation_ids: List[int], cutoff: datetime) -> List[int]:
+    """Of ``conversation_ids``, those with hot messages all older than ``cutoff`` and nothing left in the CRM outbox"""
+    # One grouped lookup on the (conversation_id, created_at, id) index per batch
+    newest = dict(
+        db.query(ConversationMessage.conversation_id, func.max(ConversationMessage.created_at))
+        .filter(ConversationMessage.conversation_id.in_(conversation_ids))
+        .group_by(ConversationMessage.conversation_id)
+        .all()
+    )
+    idle = [conversation_id for conversation_id, newest_at in newest.items() if newest_at and newest_at < cutoff]
+    if not idle:
+        return []
+    pending = {
+        conversation_id for (conversation_id,) in
+        db.query(CrmOutbox.conversation_id)
+        .filter(CrmOutbox.conversation_id.in_(idle), CrmOutbox.failed_at.is_(None))
+        .distinct()
+    }
+    return sorted(conversation_id for conversation_id in idle if conversation_id not in pending)
+
+
+def iter_conversation_id_batches(db: Session, batch_size: int) -> Iterator[List[int]]:
+    last_id = 0
+    while True:
+        ids = [
+            conversation_id for (conversation_id,) in
+            db.query(Conversation.id).filter(Conversation.id > last_id).order_by(Conversation.id).limit(batch_size)
+        ]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def archive_idle_conversations(
+    idle_days: float = CONVERSATION_ARCHIVE_IDLE_DAYS,
+    batch_size: int = CONVERSATION_ARCHIVE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+    stop: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    """One pass over all conversations, committing once per archived conversation"""
+    cutoff = (now or utcnow()) - timedelta(days=idle_days)
+    stats = {"scanned": 0, "conversations": 0, "messages": 0}
+    with SessionLocal() as scan_db:
+        for conversation_ids in iter_conversation_id_batches(scan_db, batch_size):
+            if stop is not None and stop.is_set():
+                break
+            stats["scanned"] += len(conversation_ids)
+            with SessionLocal() as db:
+                idle = idle_conversation_ids(db, conversation_ids, cutoff)
+                # Each conversation gets a fresh transaction that starts with its row lock
+                db.rollback()
+                for conversation_id in idle:
+                    try:
+                        moved = archive_conversation(db, conversation_id, cutoff)
+                        db.commit()
+                    except SQLAlchemyError as e:
+                        db.rollback()
+                        ARCHIVE_CONFLICTS.inc()
+                        print(f"Skipped archiving conversation {conversation_id}: {e}")
+                        continue
+                    stats["conversations"] += bool(moved)
+                    stats["messages"] += moved
+    return stats
+
+
+class ConversationArchiver:
+    """Runs ``archive_idle_conversations`` every ``interval`` seconds on a background thread"""
+    
+    def __init__(
+        self,
+        idle_days: float = CONVERSATION_ARCHIVE_IDLE_DAYS,
+        batch_size: int = CONVERSATION_ARCHIVE_BATCH_SIZE,
+        interval: float = CONVERSATION_ARCHIVE_INTERVAL_SECONDS,
+    ):
+        self.idle_days = idle_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                stats = archive_idle_conversations(self.idle_days, self.batch_size, stop=self._stop)
+                if stats["conversations"]:
+                    print(f"Archived {stats['messages']} messages from {stats['conversations']} idle conversations")
+            except Exception as e:
+                print(f"Conversation archiver error: {e}")
+            self._stop.wait(self.interval)
+    
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="conversation-archiver", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive idle conversations")
+    parser.add_argument("--idle-days", type=float, default=CONVERSATION_ARCHIVE_IDLE_DAYS)
+    parser.add_argument("--batch-size", type=int, default=CONVERSATION_ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    
+    stats = archive_idle_conversations(args.idle_days, args.batch_size)
+    print(f"scanned {stats['scanned']} conversations, archived {stats['conversations']} "
+          f"({stats['messages']} messages)")
+
+
+if __name__ == "__main__":
+    main()
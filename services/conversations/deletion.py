@@ -0,0 +1,87 @@
+"""Set-based deletion of conversations and of a user's whole footprint.
+
+Rows are removed with a fixed number of ``DELETE ... WHERE`` statements on
+indexed columns, child tables first, instead of loading every message into
+the session for the ORM cascade. The number of statements, and the memory
+used, no longer depend on how long the conversation was. The caller commits.
+
+Embeddings are removed from Qdrant with filter-based deletes by
+``delete_conversation_vectors`` / ``delete_user_vectors``, which endpoints
+schedule as background tasks so the request does not wait on Qdrant.
+"""
+from typing import Dict, List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from models.conversation import Conversation
+from models.conversation_archive import ConversationArchive
+from models.conversation_message import ConversationMessage
+from models.course import Course
+from models.course_recommendation import CourseRecommendation
+from models.crm_outbox import CrmOutbox
+from models.user import User
+from services.observability import metrics
+
+DELETED_ROWS = metrics.counter("deleted_rows_total", "Rows removed by bulk deletes", ["table"])
+
+
+def delete_conversations(db: Session, condition) -> Dict[str, int]:
+    """Delete the conversations matching ``condition`` with their messages, archives and CRM outbox rows"""
+    conversation_ids = select(Conversation.id).where(condition)
+    statements = (
+        ("crm_outbox", delete(CrmOutbox).where(CrmOutbox.conversation_id.in_(conversation_ids))),
+        ("conversation_messages",
+         delete(ConversationMessage).where(ConversationMessage.conversation_id.in_(conversation_ids))),
+        ("conversation_archives",
+         delete(ConversationArchive).where(ConversationArchive.conversation_id.in_(conversation_ids))),
+        ("conversations", delete(Conversation).where(condition)),
+    )
+    counts = {}
+    for table, statement in statements:
+        counts[table] = db.execute(statement.execution_options(synchronize_session=False)).rowcount
+        DELETED_ROWS.inc(counts[table], table=table)
+    return counts
+
+
+def delete_user_footprint(db: Session, user_id: int) -> Dict[str, int]:
+    """Delete a user and everything that references them; courses they teach lose their instructor"""
+    counts = delete_conversations(db, Conversation.user_id == user_id)
+    counts["course_recommendations"] = db.execute(
+        delete(CourseRecommendation)
+        .where(CourseRecommendation.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    counts["courses"] = db.execute(
+        update(Course)
+        .where(Course.instructor_id == user_id)
+        .values(instructor_id=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    counts["users"] = db.execute(
+        delete(User).where(User.id == user_id).execution_options(synchronize_session=False)
+    ).rowcount
+    DELETED_ROWS.inc(counts["course_recommendations"], table="course_recommendations")
+    DELETED_ROWS.inc(counts["users"], table="users")
+    return counts
+
+
+def delete_conversation_vectors(conversation_ids: List[int]):
+    """Background task: drop the embeddings of deleted conversations"""
+    from vector_db.qdrant_client import delete_conversations as delete_points, get_qdrant_client
+
+    try:
+        delete_points(get_qdrant_client(), conversation_ids)
+    except Exception as e:
+        # The rows are gone either way; orphaned points only cost space
+        print(f"Error deleting conversation vectors {conversation_ids[:10]}: {e}")
+
+
+def delete_user_vectors(user_id: int):
+    """Background task: drop every conversation embedding owned by a deleted user"""
+    from vector_db.qdrant_client import delete_user_conversations, get_qdrant_client
+
+    try:
+        delete_user_conversations(get_qdrant_client(), user_id)
+    except Exception as e:
+        print(f"Error deleting vectors of user {user_id}: {e}")
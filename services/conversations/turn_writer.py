@@ -0,0 +1,207 @@
+"""Persists a chat turn (user message + assistant reply) in one transaction.
+
+``write_turn`` inserts both messages and their CRM outbox rows in a single
+flush and commit on the caller's session. With MESSAGE_GROUP_COMMIT enabled,
+``TurnWriter`` instead hands turns to a background thread that writes every
+turn arriving within a short window in one transaction, so concurrent chats
+share a single commit (and fsync).
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from db.utils.database import SessionLocal, utcnow
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from services.crm.outbox import enqueue_messages
+from services.observability import metrics
+
+load_dotenv()
+
+MESSAGE_GROUP_COMMIT = os.getenv("MESSAGE_GROUP_COMMIT", "False").lower() == "true"
+MESSAGE_GROUP_COMMIT_WINDOW_MS = float(os.getenv("MESSAGE_GROUP_COMMIT_WINDOW_MS", "2"))
+MESSAGE_GROUP_COMMIT_MAX_BATCH = int(os.getenv("MESSAGE_GROUP_COMMIT_MAX_BATCH", "64"))
+MESSAGE_GROUP_COMMIT_TIMEOUT_SECONDS = float(os.getenv("MESSAGE_GROUP_COMMIT_TIMEOUT_SECONDS", "10"))
+
+TURN_WRITE_SECONDS = metrics.histogram("conversation_turn_write_seconds", "Time to persist a chat turn", ["mode"])
+GROUP_COMMIT_BATCH = metrics.histogram(
+    "conversation_group_commit_batch_size", "Turns written per group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+TurnMessages = Tuple[Dict, Dict]
+
+
+def message_snapshot(message: ConversationMessage) -> Dict:
+    """Response fields of a flushed message, readable after the session commits or closes"""
+    role = message.role.value if hasattr(message.role, "value") else message.role
+    return {
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "role": role,
+        "content": message.content,
+        "model": message.model,
+        "latency_ms": message.latency_ms,
+    }
+
+
+def _add_turn(
+    db: Session,
+    conversation: Conversation,
+    user_content: str,
+    assistant_content: str,
+    model: Optional[str] = None,
+    latency_ms: Optional[int] = None,
+):
+    # One timestamp for both messages, from the same clock as every other insert
+    created_at = utcnow()
+    messages = [
+        ConversationMessage(
+            conversation_id=conversation.id, role=MessageRole.USER, content=user_content, created_at=created_at,
+        ),
+        ConversationMessage(
+            conversation_id=conversation.id,
+            role=MessageRole.ASSISTANT,
+            content=assistant_content,
+            model=model,
+            latency_ms=latency_ms,
+            created_at=created_at,
+        ),
+    ]
+    db.add_all(messages)
+    return messages
+
+
+def write_turn(
+    db: Session,
+    conversation: Conversation,
+    user_content: str,
+    assistant_content: str,
+    model: Optional[str] = None,
+    latency_ms: Optional[int] = None,
+) -> TurnMessages:
+    """Insert both messages and their outbox rows with one flush and one commit"""
+    with TURN_WRITE_SECONDS.time(mode="single"):
+        messages = _add_turn(db, conversation, user_content, assistant_content, model, latency_ms)
+        db.flush()
+        enqueue_messages(db, conversation, messages)
+        snapshots = tuple(message_snapshot(message) for message in messages)
+        db.commit()
+    return snapshots
+
+
+class TurnWriter:
+    """Group commit: batches turns from concurrent requests into shared transactions"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        window: float = MESSAGE_GROUP_COMMIT_WINDOW_MS / 1000,
+        max_batch: int = MESSAGE_GROUP_COMMIT_MAX_BATCH,
+        timeout: float = MESSAGE_GROUP_COMMIT_TIMEOUT_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def write(
+        self,
+        conversation: Conversation,
+        user_content: str,
+        assistant_content: str,
+        model: Optional[str] = None,
+        latency_ms: Optional[int] = None,
+    ) -> TurnMessages:
+        """Queue a turn for the next group commit and wait until it is durable"""
+        self.start()
+        future: Future = Future()
+        started = time.perf_counter()
+        # Only conversation.id and user_id are read by the writer thread; the
+        # caller blocks until the future resolves, so the object is not shared
+        self._queue.put((conversation, user_content, assistant_content, model, latency_ms, future))
+        result = future.result(timeout=self.timeout)
+        TURN_WRITE_SECONDS.observe(time.perf_counter() - started, mode="group")
+        return result
+    
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run, name="turn-group-commit", daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.commit_batch(self._collect(first))
+    
+    def _collect(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def commit_batch(self, batch: List):
+        GROUP_COMMIT_BATCH.observe(len(batch))
+        try:
+            with self.session_factory() as db:
+                added = [(item, _add_turn(db, *item[:-1])) for item in batch]
+                db.flush()
+                for item, messages in added:
+                    enqueue_messages(db, item[0], messages)
+                results = [(item[-1], tuple(message_snapshot(m) for m in messages)) for item, messages in added]
+                db.commit()
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][-1].set_exception(exc)
+                return
+            # One bad turn must not fail its neighbours: retry each on its own
+            for item in batch:
+                self.commit_batch([item])
+            return
+        
+        for future, snapshots in results:
+            future.set_result(snapshots)
+
+
+turn_writer = TurnWriter()
+
+
+def persist_turn(
+    db: Session,
+    conversation: Conversation,
+    user_content: str,
+    assistant_content: str,
+    model: Optional[str] = None,
+    latency_ms: Optional[int] = None,
+) -> TurnMessages:
+    """Write a turn on the request session, or through the group committer when enabled"""
+    if MESSAGE_GROUP_COMMIT:
+        return turn_writer.write(conversation, user_content, assistant_content, model, latency_ms)
+    return write_turn(db, conversation, user_content, assistant_content, model, latency_ms)
@@ -1,10 +1,38 @@
 import requests
+import gzip
+import json
 import os
+import re
+import time
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
+from services.observability import metrics, profiler
+
 load_dotenv()
 
+# Connect and read timeout for every CRM call, so a hung CRM cannot stall the outbox flusher or a request
+CRM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("CRM_REQUEST_TIMEOUT_SECONDS", "10"))
+
+CRM_REQUEST_SECONDS = metrics.histogram("crm_request_seconds", "Laravel CRM API call latency", ["method", "endpoint"])
+CRM_REQUEST_ERRORS = metrics.counter("crm_request_errors_total", "Failed Laravel CRM API calls", ["method", "endpoint", "error"])
+
+class CRMError(Exception):
+    """A CRM API call failed"""
+
+
+class CRMUnavailable(CRMError):
+    """The CRM could not be reached, timed out, or answered 5xx / 408 / 429; worth retrying unchanged"""
+
+
+class CRMRejected(CRMError):
+    """The CRM answered with a 4xx: the request itself is at fault and will fail again as is"""
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Collapse ids so the endpoint label stays low-cardinality (users/42 -> users/{id})"""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", endpoint)
+
 class CRMClient:
     """Client for interacting with the Laravel CRM API"""
     
@@ -17,22 +45,35 @@ class CRMClient:
             "Accept": "application/json"
         }
     
-    def _make_request(self, method: str, endpoint: str, data: Dict = None, params: Dict = None):
+    def _make_request(self, method: str, endpoint: str, data: Dict = None, params: Dict = None, compress: bool = False):
         """Make a request to the Laravel CRM API"""
         url = f"{self.base_url}/{endpoint}"
         
+        headers = self.headers
+        body = None
+        if compress and data is not None:
+            # Large sync payloads are sent gzip-compressed
+            headers = {**self.headers, "Content-Encoding": "gzip"}
+            body = gzip.compress(json.dumps(data, default=str).encode("utf-8"))
+            data = None
+        
+        label = endpoint_label(endpoint)
+        started = time.perf_counter()
         try:
             response = requests.request(
                 method=method,
                 url=url,
-                headers=self.headers,
+                headers=headers,
                 json=data,
-                params=params
+                data=body,
+                params=params,
+                timeout=CRM_REQUEST_TIMEOUT_SECONDS,
             )
             
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
+            CRM_REQUEST_ERRORS.inc(method=method, endpoint=label, error=f"http_{response.status_code}")
             # Handle HTTP errors
             error_message = f"HTTP error occurred: {e}"
             if response.text:
@@ -42,10 +83,17 @@ class CRMClient:
                 except:
                     error_message = f"{error_message} - {response.text}"
             
-            raise Exception(error_message)
+            if response.status_code >= 500 or response.status_code in (408, 429):
+                raise CRMUnavailable(error_message)
+            raise CRMRejected(error_message)
         except requests.exceptions.RequestException as e:
-            # Handle connection errors
-            raise Exception(f"Request error occurred: {e}")
+            CRM_REQUEST_ERRORS.inc(method=method, endpoint=label, error=type(e).__name__)
+            # Handle connection errors and timeouts
+            raise CRMUnavailable(f"Request error occurred: {e}")
+        finally:
+            finished = time.perf_counter()
+            CRM_REQUEST_SECONDS.observe(finished - started, method=method, endpoint=label)
+            profiler.record_span("crm", f"{method} {label}", started, finished)
     
     # User-related methods
     def get_users(self, page: int = 1, per_page: int = 100) -> Dict:
@@ -104,4 +152,8 @@ class CRMClient:
     # Conversation-related methods
     def sync_conversation(self, conversation_data: Dict) -> Dict:
         """Sync a conversation with the CRM"""
-        return self._make_request("POST", "conversations/sync", data=conversation_data)
\ No newline at end of file
+        return self._make_request("POST", "conversations/sync", data=conversation_data)
+    
+    def sync_messages_batch(self, messages: List[Dict]) -> Dict:
+        """Sync a batch of conversation messages (gzip-compressed, deduplicated by message_id on the CRM side)"""
+        return self._make_request("POST", "conversations/sync-batch", data={"messages": messages}, compress=True)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import json
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from db.utils.database import utcnow
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage
+from models.crm_outbox import CrmOutbox
+
+
+def message_payload(conversation: Conversation, message: ConversationMessage) -> dict:
+    role = message.role.value if hasattr(message.role, "value") else message.role
+    return {
+        "message_id": message.id,
+        "conversation_id": conversation.id,
+        "user_id": conversation.user_id,
+        "role": role,
+        "content": message.content,
+        # The turn writer assigns created_at before the flush, so this does not reload the row
+        "created_at": (message.created_at or utcnow()).isoformat(),
+    }
+
+
+def enqueue_messages(db: Session, conversation: Conversation, messages: Iterable[ConversationMessage]):
+    """Add outbox rows for already flushed messages to the caller's transaction"""
+    for message in messages:
+        db.add(CrmOutbox(
+            message_id=message.id,
+            conversation_id=conversation.id,
+            payload=json.dumps(message_payload(conversation, message)),
+            attempts=0,
+        ))
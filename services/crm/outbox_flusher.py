@@ -0,0 +1,255 @@
+"""Drains the CRM outbox in size- and time-bounded batches.
+
+Usage:
+    python -m services.crm.outbox_flusher
+    python -m services.crm.outbox_flusher --redrive   # requeue dead letters and exit
+
+The API process also runs a flusher thread when CRM_OUTBOX_FLUSHER_ENABLED is
+true (the default only when LARAVEL_CRM_BASE_URL is set). Several flushers can
+run at once: a batch is claimed by pushing its ``next_attempt_at`` out by
+CRM_OUTBOX_LEASE_SECONDS (on MySQL under ``FOR UPDATE SKIP LOCKED``) and
+committing, so no row lock is held while the CRM request is in flight. Rows
+of a flusher that dies mid-request become due again when the lease expires;
+the CRM deduplicates by message_id.
+
+Failures are told apart by the CRM client:
+
+* ``CRMUnavailable`` (connection errors, timeouts, 5xx): the CRM is down, not
+  the rows. The batch is released without counting an attempt and the flusher
+  pauses with backoff, so an outage of any length dead-letters nothing and the
+  backlog drains in full batches once the CRM is back.
+* ``CRMRejected`` (4xx): counts an attempt on every row of the batch. Rows
+  that were rejected go out in smaller batches (halved per attempt) so one row
+  the CRM keeps rejecting ends up alone instead of holding back its
+  neighbours. After CRM_OUTBOX_MAX_ATTEMPTS a row is dead-lettered:
+  ``failed_at`` is set, it is counted in crm_outbox_dead_letters_total and not
+  sent again until ``--redrive`` clears it.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import or_
+
+from db.utils.database import SessionLocal, utcnow
+from models.crm_outbox import CrmOutbox
+from services.crm.crm_client import CRMClient, CRMRejected
+from services.observability import metrics
+
+load_dotenv()
+
+CRM_OUTBOX_FLUSHER_ENABLED = os.getenv(
+    "CRM_OUTBOX_FLUSHER_ENABLED", "True" if os.getenv("LARAVEL_CRM_BASE_URL") else "False"
+).lower() == "true"
+CRM_OUTBOX_BATCH_SIZE = int(os.getenv("CRM_OUTBOX_BATCH_SIZE", "500"))
+CRM_OUTBOX_MAX_WAIT_SECONDS = float(os.getenv("CRM_OUTBOX_MAX_WAIT_SECONDS", "5"))
+CRM_OUTBOX_POLL_SECONDS = float(os.getenv("CRM_OUTBOX_POLL_SECONDS", "1"))
+CRM_OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("CRM_OUTBOX_MAX_BACKOFF_SECONDS", "300"))
+CRM_OUTBOX_MAX_ATTEMPTS = int(os.getenv("CRM_OUTBOX_MAX_ATTEMPTS", "15"))
+# How long a claimed batch stays invisible to other flushers; must exceed CRM_REQUEST_TIMEOUT_SECONDS
+CRM_OUTBOX_LEASE_SECONDS = float(os.getenv("CRM_OUTBOX_LEASE_SECONDS", "120"))
+
+OUTBOX_BATCHES = metrics.counter("crm_outbox_batches_total", "CRM sync batches sent", ["result"])
+OUTBOX_MESSAGES = metrics.counter("crm_outbox_messages_total", "Messages synced to the CRM", ["result"])
+OUTBOX_DEAD_LETTERS = metrics.counter("crm_outbox_dead_letters_total", "Outbox rows given up on after CRM_OUTBOX_MAX_ATTEMPTS")
+
+
+class OutboxFlusher:
+    """Sends pending outbox rows to the CRM, one compressed request per batch"""
+    
+    def __init__(
+        self,
+        crm_client: Optional[CRMClient] = None,
+        batch_size: int = CRM_OUTBOX_BATCH_SIZE,
+        max_wait: float = CRM_OUTBOX_MAX_WAIT_SECONDS,
+        poll_interval: float = CRM_OUTBOX_POLL_SECONDS,
+        max_backoff: float = CRM_OUTBOX_MAX_BACKOFF_SECONDS,
+        max_attempts: int = CRM_OUTBOX_MAX_ATTEMPTS,
+        lease: float = CRM_OUTBOX_LEASE_SECONDS,
+    ):
+        self.crm_client = crm_client or CRMClient()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self._partial_since: Optional[float] = None
+        # Consecutive batches that failed because the CRM was unavailable, and when to try again
+        self._outages = 0
+        self._resume_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def backoff(self, attempts: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, 2 ** attempts))
+    
+    def flush_once(self, force: bool = False) -> int:
+        """Send at most one batch; returns the number of messages synced"""
+        if time.monotonic() < self._resume_at:
+            return 0
+        claimed = self.claim(force)
+        if not claimed:
+            return 0
+        ids, attempts, payloads = claimed
+        
+        try:
+            self.crm_client.sync_messages_batch(list(payloads.values()))
+        except CRMRejected as e:
+            self.record_rejection(ids, e)
+            OUTBOX_BATCHES.inc(result="rejected")
+            OUTBOX_MESSAGES.inc(len(payloads), result="rejected")
+            print(f"CRM rejected an outbox batch of {len(payloads)} (attempt {attempts + 1}): {e}")
+            return 0
+        except Exception as e:
+            # CRM unavailable: the rows are fine, so no attempt is counted and the batch is not split
+            self._outages += 1
+            delay = self.backoff(self._outages)
+            self._resume_at = time.monotonic() + delay
+            self.release(ids, delay, e)
+            OUTBOX_BATCHES.inc(result="unavailable")
+            OUTBOX_MESSAGES.inc(len(payloads), result="unavailable")
+            print(f"CRM unavailable, outbox paused for {delay:.1f}s: {e}")
+            return 0
+        
+        self._outages = 0
+        with SessionLocal() as db:
+            db.query(CrmOutbox).filter(CrmOutbox.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        OUTBOX_BATCHES.inc(result="sent")
+        OUTBOX_MESSAGES.inc(len(payloads), result="sent")
+        return len(payloads)
+    
+    def claim(self, force: bool) -> Optional[tuple]:
+        """Lease the next due batch; (row ids, attempts so far, payloads by message id) or None"""
+        now = utcnow()
+        with SessionLocal() as db:
+            rows = (
+                db.query(CrmOutbox)
+                .filter(
+                    CrmOutbox.failed_at.is_(None),
+                    or_(CrmOutbox.next_attempt_at.is_(None), CrmOutbox.next_attempt_at <= now),
+                )
+                .order_by(CrmOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                self._partial_since = None
+                return None
+            
+            # Rows the CRM rejected are retried in ever smaller batches to isolate the culprit
+            attempts = rows[0].attempts
+            retry_limit = max(1, self.batch_size >> attempts)
+            if retry_limit < len(rows):
+                rows = rows[:retry_limit]
+                force = True
+            
+            # Time bound: a partial batch waits up to max_wait for more messages
+            if len(rows) < self.batch_size and not force:
+                if self._partial_since is None:
+                    self._partial_since = time.monotonic()
+                if time.monotonic() - self._partial_since < self.max_wait:
+                    db.rollback()
+                    return None
+            self._partial_since = None
+            
+            # Deduplicate by message id (the CRM also treats message_id as an idempotency key)
+            payloads = {}
+            for row in rows:
+                payloads.setdefault(row.message_id, json.loads(row.payload))
+                row.next_attempt_at = now + timedelta(seconds=self.lease)
+            ids = [row.id for row in rows]
+            db.commit()
+        return ids, attempts, payloads
+    
+    def record_rejection(self, ids: list, error: Exception):
+        """Count an attempt on every row of a rejected batch and dead-letter the exhausted ones"""
+        now = utcnow()
+        dead = 0
+        with SessionLocal() as db:
+            for row in db.query(CrmOutbox).filter(CrmOutbox.id.in_(ids)):
+                row.attempts += 1
+                row.next_attempt_at = now + timedelta(seconds=self.backoff(row.attempts))
+                row.last_error = str(error)[:1000]
+                if row.attempts >= self.max_attempts:
+                    row.failed_at = now
+                    dead += 1
+            db.commit()
+        if dead:
+            OUTBOX_DEAD_LETTERS.inc(dead)
+            print(f"CRM outbox gave up on {dead} messages after {self.max_attempts} rejections")
+    
+    def release(self, ids: list, delay: float, error: Exception):
+        """Hand a batch back after an outage, due again once the pause is over"""
+        with SessionLocal() as db:
+            db.query(CrmOutbox).filter(CrmOutbox.id.in_(ids)).update({
+                CrmOutbox.next_attempt_at: utcnow() + timedelta(seconds=delay),
+                CrmOutbox.last_error: str(error)[:1000],
+            }, synchronize_session=False)
+            db.commit()
+    
+    def drain(self) -> int:
+        """Flush everything currently due, ignoring the time bound"""
+        total = 0
+        while True:
+            sent = self.flush_once(force=True)
+            if not sent:
+                return total
+            total += sent
+    
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.flush_once()
+            except Exception as e:
+                print(f"CRM outbox flusher error: {e}")
+                sent = 0
+            # Keep draining while full batches are available; sleep through an outage pause
+            if sent < self.batch_size:
+                self._stop.wait(max(self.poll_interval, self._resume_at - time.monotonic()))
+    
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="crm-outbox-flusher", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def redrive_dead_letters() -> int:
+    """Make dead-lettered rows pending again with a fresh attempt budget; returns how many"""
+    with SessionLocal() as db:
+        count = db.query(CrmOutbox).filter(CrmOutbox.failed_at.isnot(None)).update({
+            CrmOutbox.failed_at: None,
+            CrmOutbox.attempts: 0,
+            CrmOutbox.next_attempt_at: None,
+        }, synchronize_session=False)
+        db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the CRM outbox")
+    parser.add_argument("--redrive", action="store_true", help="Requeue dead-lettered messages and exit")
+    args = parser.parse_args()
+    if args.redrive:
+        print(f"Requeued {redrive_dead_letters()} dead-lettered CRM outbox messages")
+    else:
+        flusher = OutboxFlusher()
+        try:
+            flusher.run()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,215 @@
+"""Streaming export of conversation transcripts as NDJSON (optionally gzip).
+
+Usage:
+    python -m services.export.transcripts [--user-id N] [--since ISO] [--until ISO]
+        [--from-conversation N] [--to-conversation N] [--gzip] [--output FILE]
+
+One JSON object is emitted per message, ordered by conversation and time.
+Rows are read with a server-side cursor in ``yield_per`` batches as plain
+tuples (no ORM identity map), so memory use does not grow with the size of
+the export. Archived conversations are decompressed one blob at a time and
+merged into the stream ahead of any newer hot messages. ``since``/``until``
+may be naive (taken as UTC) or timezone-aware; both are compared as naive UTC,
+like the stored timestamps.
+"""
+import argparse
+import heapq
+import json
+import sys
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db.utils.database import get_read_session
+from models.conversation import Conversation
+from models.conversation_archive import ConversationArchive
+from models.conversation_message import ConversationMessage
+from services.conversations.archive import unpack_messages
+
+EXPORT_BATCH_SIZE = 1000
+GZIP_FLUSH_BYTES = 64 * 1024
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert aware bounds so they compare"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def iter_hot_records(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    from_conversation_id: Optional[int] = None,
+    to_conversation_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Dict]:
+    stmt = (
+        select(
+            ConversationMessage.id,
+            ConversationMessage.conversation_id,
+            Conversation.user_id,
+            Conversation.title,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.created_at,
+        )
+        .join(Conversation, Conversation.id == ConversationMessage.conversation_id)
+        .order_by(ConversationMessage.conversation_id, ConversationMessage.created_at, ConversationMessage.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Conversation.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(ConversationMessage.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(ConversationMessage.created_at < until)
+    if from_conversation_id is not None:
+        stmt = stmt.where(ConversationMessage.conversation_id >= from_conversation_id)
+    if to_conversation_id is not None:
+        stmt = stmt.where(ConversationMessage.conversation_id <= to_conversation_id)
+    
+    for message_id, conversation_id, owner_id, title, role, content, created_at in db.execute(stmt):
+        yield {
+            "message_id": message_id,
+            "conversation_id": conversation_id,
+            "user_id": owner_id,
+            "title": title,
+            "role": role.value if hasattr(role, "value") else role,
+            "content": content,
+            "created_at": created_at.isoformat() if created_at else None,
+        }
+
+
+def iter_archived_records(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    from_conversation_id: Optional[int] = None,
+    to_conversation_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Dict]:
+    # Keyset batches keep at most a few blobs in memory at a time
+    stmt = (
+        select(ConversationArchive, Conversation.user_id, Conversation.title)
+        .join(Conversation, Conversation.id == ConversationArchive.conversation_id)
+        .order_by(ConversationArchive.conversation_id)
+        .limit(max(1, batch_size // 100))
+    )
+    if user_id is not None:
+        stmt = stmt.where(Conversation.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(ConversationArchive.last_message_at >= since)
+    if until is not None:
+        stmt = stmt.where(ConversationArchive.first_message_at < until)
+    if from_conversation_id is not None:
+        stmt = stmt.where(ConversationArchive.conversation_id >= from_conversation_id)
+    if to_conversation_id is not None:
+        stmt = stmt.where(ConversationArchive.conversation_id <= to_conversation_id)
+    
+    last_id = 0
+    while True:
+        rows = db.execute(stmt.where(ConversationArchive.conversation_id > last_id)).all()
+        if not rows:
+            return
+        for archive, owner_id, title in rows:
+            for message in unpack_messages(archive):
+                created_at = message["created_at"]
+                if since is not None and (created_at is None or created_at < since):
+                    continue
+                if until is not None and (created_at is None or created_at >= until):
+                    continue
+                yield {
+                    "message_id": message["id"],
+                    "conversation_id": archive.conversation_id,
+                    "user_id": owner_id,
+                    "title": title,
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": created_at.isoformat() if created_at else None,
+                }
+            db.expunge(archive)
+        last_id = rows[-1][0].conversation_id
+
+
+def iter_transcript_records(db: Session, archive_db: Session, **filters) -> Iterator[Dict]:
+    """Archived and hot messages, ordered by conversation; archived ones come first within a conversation
+    
+    The hot stream holds a server-side cursor open on ``db`` for the whole
+    export, so the archive queries need their own session (``archive_db``):
+    MySQL refuses other statements on a connection with an unread result set.
+    """
+    for bound in ("since", "until"):
+        if filters.get(bound) is not None:
+            filters[bound] = naive_utc(filters[bound])
+    # heapq.merge is stable, so on equal conversation ids the archive stream wins
+    return heapq.merge(
+        iter_archived_records(archive_db, **filters),
+        iter_hot_records(db, **filters),
+        key=lambda record: record["conversation_id"],
+    )
+
+
+def iter_ndjson(records: Iterable[Dict]) -> Iterator[bytes]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def iter_gzip(chunks: Iterable[bytes], flush_bytes: int = GZIP_FLUSH_BYTES) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally, emitting compressed blocks of ~flush_bytes input"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    pending = 0
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_transcripts(compress: bool = False, **filters) -> Iterator[bytes]:
+    """Export stream with its own read sessions, safe to hand to a StreamingResponse"""
+    with get_read_session() as db, get_read_session() as archive_db:
+        chunks = iter_ndjson(iter_transcript_records(db, archive_db, **filters))
+        yield from (iter_gzip(chunks) if compress else chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export conversation transcripts as NDJSON")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Messages created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Messages created before (ISO 8601)")
+    parser.add_argument("--from-conversation", type=int, help="Lowest conversation id (inclusive)")
+    parser.add_argument("--to-conversation", type=int, help="Highest conversation id (inclusive)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument("--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+    
+    stream = stream_transcripts(
+        compress=args.gzip,
+        user_id=args.user_id,
+        since=args.since,
+        until=args.until,
+        from_conversation_id=args.from_conversation,
+        to_conversation_id=args.to_conversation,
+    )
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in stream:
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
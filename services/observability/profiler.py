@@ -0,0 +1,363 @@
+"""Opt-in request profiler: stack samples and a span tree for slow or sampled requests.
+
+Every request handled by ``ProfilerMiddleware`` gets a ``RequestProfile`` in a
+context variable. Instrumented stages (DB statements, LLM calls, Qdrant, CRM)
+append spans to it through ``span``/``record_span``; that is the only cost a
+request pays unless it is profiled. One background thread sleeps until the
+oldest running request crosses ``PROFILER_THRESHOLD_MS`` (or a request was
+picked by ``PROFILER_SAMPLE_RATE``) and only then samples the stacks of the
+event-loop thread the request started on and of the threads its spans ran on.
+
+Profiles of requests that ended slow or sampled are written as JSON to a
+bounded on-disk ring buffer (``PROFILER_DIR``, newest ``PROFILER_MAX_PROFILES``
+kept across all workers sharing it), with stacks in the folded format
+flamegraph tools read.
+"""
+import contextvars
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
+PROFILER_THRESHOLD_MS = float(os.getenv("PROFILER_THRESHOLD_MS", "1000"))
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "crm-ai-profiles"))
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "200"))
+PROFILER_MAX_SPANS = int(os.getenv("PROFILER_MAX_SPANS", "2000"))
+# Paths never profiled (the profile endpoints themselves, probes, scrapes)
+PROFILER_EXCLUDE_PREFIXES = tuple(
+    prefix.strip() for prefix in os.getenv("PROFILER_EXCLUDE_PREFIXES", "/admin/profiles,/health,/metrics").split(",")
+    if prefix.strip()
+)
+
+_WORKING_DIRECTORY = os.getcwd() + os.sep
+
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("active_profile", default=None)
+_parent_span: contextvars.ContextVar[int] = contextvars.ContextVar("parent_span", default=-1)
+
+
+class RequestProfile:
+    """Spans and stack samples of one request"""
+
+    def __init__(self, method: str, path: str, sampled: bool, threshold: float):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.route = path
+        self.status = None
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.threshold = threshold
+        self.deadline = self.started + threshold
+        self.duration = None
+        self.sampled = sampled
+        self.armed = sampled  # stacks are being sampled
+        self.finished = False
+        # (kind, name, start, end, parent index); the parent is an index into this list
+        self.spans: List[tuple] = []
+        # Created on the event loop, so async code blocking the loop shows up even without spans
+        self.threads = {threading.get_ident()}
+        self.stacks = Counter()
+        self.sample_count = 0
+
+    @property
+    def trigger(self) -> Optional[str]:
+        if self.sampled:
+            return "sample"
+        if self.duration is not None and self.duration >= self.threshold:
+            return "threshold"
+        return None
+
+    def span_tree(self) -> List[dict]:
+        nodes = [
+            {"kind": kind, "name": name, "start_ms": round((start - self.started) * 1000, 3),
+             "duration_ms": round((end - start) * 1000, 3), "children": []}
+            for kind, name, start, end, _ in self.spans
+        ]
+        roots = []
+        for node, (_, _, _, _, parent) in zip(nodes, self.spans):
+            (nodes[parent]["children"] if parent >= 0 else roots).append(node)
+        return roots
+
+    def span_totals(self) -> Dict[str, float]:
+        """Milliseconds per span kind, counting top-level spans of each kind only"""
+        totals: Dict[str, float] = {}
+        for kind, _, start, end, parent in self.spans:
+            if parent < 0 or self.spans[parent][0] != kind:
+                totals[kind] = totals.get(kind, 0.0) + (end - start) * 1000
+        return {kind: round(ms, 3) for kind, ms in totals.items()}
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "trigger": self.trigger,
+            "samples": self.sample_count,
+            "span_totals": self.span_totals(),
+        }
+
+    def to_dict(self) -> dict:
+        return dict(
+            self.summary(),
+            threshold_ms=self.threshold * 1000,
+            interval_ms=PROFILER_INTERVAL_MS,
+            folded=dict(self.stacks.most_common()),
+            spans=self.span_tree(),
+        )
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _active_profile.get()
+
+
+def record_span(kind: str, name: str, start: float, end: float):
+    """Attach an already-timed stage (perf_counter bounds) to the current request, if any"""
+    profile = _active_profile.get()
+    if profile is None or profile.finished or len(profile.spans) >= PROFILER_MAX_SPANS:
+        return
+    profile.spans.append((kind, name, start, end, _parent_span.get()))
+    profile.threads.add(threading.get_ident())
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """Time a stage of the current request; spans opened inside it become its children"""
+    profile = _active_profile.get()
+    if profile is None or profile.finished or len(profile.spans) >= PROFILER_MAX_SPANS:
+        yield
+        return
+
+    profile.threads.add(threading.get_ident())
+    index = len(profile.spans)
+    started = time.perf_counter()
+    profile.spans.append((kind, name, started, started, _parent_span.get()))
+    token = _parent_span.set(index)
+    try:
+        yield
+    finally:
+        _parent_span.reset(token)
+        profile.spans[index] = profile.spans[index][:3] + (time.perf_counter(),) + profile.spans[index][4:]
+
+
+def frame_label(code) -> str:
+    filename = code.co_filename
+    for marker in ("site-packages" + os.sep, _WORKING_DIRECTORY):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def folded_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileStore:
+    """Ring buffer of profile JSON files; the newest ``max_profiles`` are kept
+
+    Every worker of a deployment writes to the same directory, so the
+    directory listing is the index: ``list``/``get`` rescan it and ``save``
+    evicts by it. File names start with a nanosecond timestamp, so sorting
+    them orders profiles from all workers by age. Summaries are cached per
+    file name, so a rescan only reads files that are new to this worker.
+    """
+
+    def __init__(self, directory: str = PROFILER_DIR, max_profiles: int = PROFILER_MAX_PROFILES):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._summaries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _files(self) -> List[str]:
+        """Profile files of every worker, oldest first (in-progress ``.tmp`` files excluded)"""
+        try:
+            return sorted(filename for filename in os.listdir(self.directory) if filename.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def _scan(self) -> List[dict]:
+        """Summaries of the newest ``max_profiles`` files, oldest first"""
+        summaries = {}
+        for filename in self._files()[-self.max_profiles:]:
+            summary = self._summaries.get(filename)
+            if summary is None:
+                try:
+                    with open(os.path.join(self.directory, filename)) as f:
+                        profile = json.load(f)
+                except (OSError, ValueError):
+                    continue  # evicted by another worker meanwhile
+                profile.pop("folded", None)
+                profile.pop("spans", None)
+                summary = profile
+            summaries[filename] = summary
+        self._summaries = summaries
+        return list(summaries.values())
+
+    def save(self, profile: RequestProfile):
+        data = profile.to_dict()
+        filename = f"{time.time_ns():020d}_{profile.id}.json"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            for oldest in self._files()[:-self.max_profiles]:
+                try:
+                    os.remove(os.path.join(self.directory, oldest))
+                except OSError:
+                    pass  # another worker evicted it first
+
+    def list(self) -> List[dict]:
+        """Summaries, newest first"""
+        with self._lock:
+            return list(reversed(self._scan()))
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        suffix = f"_{profile_id}.json"
+        filename = next((filename for filename in self._files() if filename.endswith(suffix)), None)
+        if filename is None:
+            return None
+        try:
+            with open(os.path.join(self.directory, filename)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class Profiler:
+    """Tracks running requests and samples the stacks of those that are slow or sampled"""
+
+    def __init__(self, store: Optional[ProfileStore] = None, threshold: float = PROFILER_THRESHOLD_MS / 1000,
+                 sample_rate: float = PROFILER_SAMPLE_RATE, interval: float = PROFILER_INTERVAL_MS / 1000):
+        self.store = store or ProfileStore()
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.interval = interval
+        # Requests in start order; deadlines are start + threshold, so the front is always due first
+        self._running: Deque[RequestProfile] = deque()
+        self._finished: Deque[RequestProfile] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, method: str, path: str) -> RequestProfile:
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        profile = RequestProfile(method, path, sampled, self.threshold)
+        with self._condition:
+            self._running.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            elif len(self._running) == 1 or profile.sampled:
+                # The sampler sleeps indefinitely when idle and until the front deadline otherwise
+                self._condition.notify()
+        return profile
+
+    def end(self, profile: RequestProfile, status: Optional[int], route: Optional[str]):
+        profile.duration = time.perf_counter() - profile.started
+        profile.status = status
+        profile.route = route or profile.path
+        profile.finished = True
+        if profile.trigger:
+            with self._condition:
+                self._finished.append(profile)
+                self._condition.notify()
+
+    def _wait_timeout(self, now: float) -> Optional[float]:
+        """Seconds the sampler may sleep; None means until notified"""
+        if any(profile.armed for profile in self._running):
+            return self.interval
+        if self._running:
+            return max(0.0, self._running[0].deadline - now)
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._running = deque(profile for profile in self._running if not profile.finished)
+                timeout = self._wait_timeout(time.perf_counter())
+                if not self._finished and (timeout is None or timeout > 0):
+                    self._condition.wait(timeout)
+                now = time.perf_counter()
+                running = [profile for profile in self._running if not profile.finished]
+                finished, self._finished = list(self._finished), deque()
+
+            for profile in running:
+                if not profile.armed and now >= profile.deadline:
+                    profile.armed = True
+            armed = [profile for profile in running if profile.armed]
+            if armed:
+                self._sample(armed)
+            for profile in finished:
+                try:
+                    self.store.save(profile)
+                except Exception as e:
+                    print(f"Error saving request profile {profile.id}: {e}")
+
+    def _sample(self, profiles: List[RequestProfile]):
+        frames = sys._current_frames()
+        me = threading.get_ident()
+        for profile in profiles:
+            for thread_id in list(profile.threads):
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == me:
+                    continue
+                profile.stacks[folded_stack(frame)] += 1
+            profile.sample_count += 1
+
+
+class ProfilerMiddleware:
+    """ASGI middleware that opens a ``RequestProfile`` per HTTP request"""
+
+    def __init__(self, app, profiler: Optional[Profiler] = None, exclude_prefixes=PROFILER_EXCLUDE_PREFIXES):
+        self.app = app
+        self.profiler = profiler or request_profiler
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.profiler.begin(scope["method"], scope["path"])
+        status = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _active_profile.reset(token)
+            route = scope.get("route")
+            self.profiler.end(profile, status or 500, getattr(route, "path", None))
+
+
+request_profiler = Profiler()
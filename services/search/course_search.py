@@ -0,0 +1,82 @@
+"""Ranked full-text search over course titles and descriptions.
+
+MySQL uses the FULLTEXT index on (title, description) with
+``MATCH ... AGAINST`` in natural language mode. SQLite (tests, benchmarks)
+falls back to the ``courses_fts`` FTS5 table kept in sync by triggers (see
+db/utils/fulltext.py) and requires every term to match. Both paths return
+rows ordered by descending relevance with a (score, id) keyset cursor.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+COURSE_COLUMNS = "c.id, c.title, c.description, c.category, c.difficulty_level, c.duration_hours, c.price, c.instructor_id"
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _filters(category: Optional[str], difficulty: Optional[str], params: dict) -> str:
+    clauses = []
+    if category:
+        clauses.append("c.category = :category")
+        params["category"] = category
+    if difficulty:
+        clauses.append("c.difficulty_level = :difficulty")
+        params["difficulty"] = difficulty
+    return "".join(f" AND {clause}" for clause in clauses)
+
+
+def search_courses(
+    db: Session,
+    query: str,
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    after: Optional[Tuple[float, int]] = None,
+    limit: int = 20,
+):
+    """Return up to ``limit`` rows (course columns + ``score``), best match first.
+    
+    ``after`` is the (score, id) of the last row of the previous page.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    
+    params = {"limit": limit}
+    filters = _filters(category, difficulty, params)
+    keyset = ""
+    if after is not None:
+        params["after_score"], params["after_id"] = after
+        keyset = " WHERE score < :after_score OR (score = :after_score AND id > :after_id)"
+    
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        params["q"] = " ".join(f'"{term}"' for term in terms)
+        # bm25() is lower-is-better; negate it so both backends sort by score DESC
+        sql = f"""
+            SELECT * FROM (
+                SELECT {COURSE_COLUMNS}, -bm25(courses_fts) AS score
+                FROM courses_fts JOIN courses c ON c.id = courses_fts.rowid
+                WHERE courses_fts MATCH :q{filters}
+            ){keyset}
+            ORDER BY score DESC, id
+            LIMIT :limit
+        """
+    else:
+        params["q"] = " ".join(terms)
+        sql = f"""
+            SELECT * FROM (
+                SELECT {COURSE_COLUMNS},
+                       MATCH(c.title, c.description) AGAINST (:q IN NATURAL LANGUAGE MODE) AS score
+                FROM courses c
+                WHERE MATCH(c.title, c.description) AGAINST (:q IN NATURAL LANGUAGE MODE){filters}
+            ) ranked{keyset}
+            ORDER BY score DESC, id
+            LIMIT :limit
+        """
+    
+    return db.execute(text(sql), params).all()
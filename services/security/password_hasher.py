@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from passlib.context import CryptContext
+
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing queue is full and the caller should back off"""
+    
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+    
+    bcrypt releases the GIL while hashing, so a thread pool sized to the number
+    of cores gives real parallelism while keeping the ~100ms work off the event
+    loop. At most ``max_workers + max_queue`` jobs are admitted at once; beyond
+    that ``HashingOverloaded`` is raised immediately instead of queueing.
+    """
+    
+    def __init__(self, context: CryptContext, max_workers: int, max_queue: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+    
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingOverloaded(retry_after=max(1, self._pending // self.max_workers))
+            self._pending += 1
+        
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+    
+    @property
+    def pending(self) -> int:
+        return self._pending
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(self.context.verify, plain_password, hashed_password))
+    
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.context.hash, password))
+    
+    def hash_blocking(self, password: str) -> str:
+        """Hash from synchronous code (e.g. a threadpool endpoint) through the bounded pool"""
+        return self._submit(self.context.hash, password).result()
+    
+    def verify_blocking(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(self.context.verify, plain_password, hashed_password).result()
@@ -0,0 +1,69 @@
+"""Shared fixtures for the test suite.
+
+The app reads its settings from the environment at import time, so this
+module points it at a throwaway SQLite database and offline backends
+(embedded Qdrant, the hashing embedder, no CRM flusher) before any
+application module is imported. Tables are recreated for every test.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='crm-tests-'), 'test.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ["QDRANT_LOCATION"] = ":memory:"
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+os.environ["CRM_OUTBOX_FLUSHER_ENABLED"] = "False"
+os.environ["LLM_WARMUP_ENABLED"] = "False"
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def db_engine():
+    from db.utils.database import Base, engine
+    import models  # noqa: F401  (registers every table on Base.metadata)
+    from services.cache.catalog_cache import course_catalog_cache
+    
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Catalog versions only move forward; the new database starts over at 0
+    course_catalog_cache.reset()
+    yield engine
+
+
+@pytest.fixture
+def db(db_engine):
+    from db.utils.database import SessionLocal
+    
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def user(db):
+    from models.user import User
+    
+    user = User(id=1, username="alice", email="alice@example.com", hashed_password="x", is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def make_client():
+    """TestClient for an app with ``routers`` ({prefix: router}), authenticated as ``user`` if given"""
+    from api.endpoints.auth import get_current_user
+    
+    def build(routers: dict, user=None) -> TestClient:
+        app = FastAPI()
+        for prefix, router in routers.items():
+            app.include_router(router, prefix=prefix)
+        if user is not None:
+            app.dependency_overrides[get_current_user] = lambda: user
+        return TestClient(app)
+    
+    return build
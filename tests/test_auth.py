@@ -0,0 +1,29 @@
+import asyncio
+
+from api.endpoints import auth
+from api.endpoints.auth import create_access_token, principal_cache, principal_from_token
+
+
+def test_principal_cache_counts_one_miss_per_lookup(db, user):
+    principal_cache.clear()
+    hits, misses = principal_cache.hits, principal_cache.misses
+    token = create_access_token({"sub": user.username})
+    
+    first = asyncio.run(principal_from_token(token, db))
+    assert first.id == user.id
+    assert (principal_cache.hits - hits, principal_cache.misses - misses) == (0, 1)
+    
+    second = asyncio.run(principal_from_token(token, db))
+    assert second == first
+    assert (principal_cache.hits - hits, principal_cache.misses - misses) == (1, 1)
+
+
+def test_invalidated_principal_is_reloaded(db, user):
+    principal_cache.clear()
+    token = create_access_token({"sub": user.username})
+    asyncio.run(principal_from_token(token, db))
+    
+    user.is_active = False
+    db.commit()
+    auth.invalidate_principal(user.username)
+    assert asyncio.run(principal_from_token(token, db)).is_active is False
@@ -0,0 +1,44 @@
+import asyncio
+
+from models.course_recommendation import CourseRecommendation
+from models.user import User
+from services.ai import batch_recommender
+from services.ai.batch_recommender import BatchRecommender
+
+
+def make_runner(checkpoint_path) -> BatchRecommender:
+    runner = BatchRecommender(chunk_size=2, rate_per_second=0, checkpoint_path=str(checkpoint_path))
+    runner.crm_client.get_user = lambda user_id: None
+    return runner
+
+
+def test_resume_retries_failed_users(db, monkeypatch, tmp_path):
+    db.add_all([
+        User(id=i, username=f"user{i}", email=f"user{i}@example.com", hashed_password="x", is_active=True)
+        for i in range(1, 5)
+    ])
+    db.commit()
+    checkpoint = tmp_path / "checkpoint.json"
+    
+    def flaky(user_profile, query, available_courses):
+        if user_profile["id"] == 2:
+            raise RuntimeError("LLM timeout")
+        return f"courses for {user_profile['id']}"
+    
+    monkeypatch.setattr(batch_recommender, "_run_recommendation", flaky)
+    first = make_runner(checkpoint)
+    asyncio.run(first.run())
+    assert first.failed == [2]
+    assert first.last_user_id == 4
+    
+    monkeypatch.setattr(batch_recommender, "_run_recommendation", lambda profile, query, courses: "retried")
+    resumed = make_runner(checkpoint)
+    assert resumed.load_checkpoint()
+    assert resumed.failed == [2]
+    asyncio.run(resumed.run())
+    
+    assert resumed.failed == []
+    assert resumed.processed == 4
+    rows = {row.user_id: row.recommendations for row in db.query(CourseRecommendation).all()}
+    assert rows[2] == "retried"
+    assert rows[1] == "courses for 1"
@@ -0,0 +1,127 @@
+import json
+from types import SimpleNamespace
+from typing import Optional
+
+from api.endpoints import courses
+from models.course import Course
+from services.catalog.bulk_import import CSV, NDJSON, _insert_chunk, import_courses
+
+
+def course_row(title: str, **overrides) -> dict:
+    return {
+        "title": title, "description": "About it", "category": "data", "difficulty_level": "beginner",
+        "duration_hours": 3, "price": 10, **overrides,
+    }
+
+
+def streamed(lines):
+    # A generator body goes out chunked, so the endpoint sees it in pieces
+    for line in lines:
+        yield line.encode()
+
+
+def test_ndjson_import_reports_bad_lines_and_inserts_the_rest(db, user, make_client, monkeypatch):
+    monkeypatch.setattr(courses, "embed_courses", lambda course_ids: None)
+    client = make_client({"/courses": courses.router}, user=user)
+    lines = [
+        json.dumps(course_row("Python basics")) + "\n",
+        "{not json\n",
+        json.dumps(course_row("T" * 256)) + "\n",
+        "\n",
+        json.dumps(course_row("SQL basics", category="c" * 101)) + "\n",
+        json.dumps(course_row("Pandas")),
+    ]
+    response = client.post("/courses/bulk", content=streamed(lines), headers={"Content-Type": "application/x-ndjson"})
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["rows"], body["inserted"], body["failed"], body["embeddings_queued"]) == (5, 2, 3, 2)
+    assert [error["line"] for error in body["errors"]] == [2, 3, 5]
+    assert body["errors"][0]["errors"].startswith("Invalid JSON")
+    assert body["errors"][1]["errors"][0]["loc"] == ["title"]
+    assert body["errors"][2]["errors"][0]["loc"] == ["category"]
+    assert sorted(title for (title,) in db.query(Course.title)) == ["Pandas", "Python basics"]
+
+
+def test_csv_import(db, user, make_client, monkeypatch):
+    monkeypatch.setattr(courses, "embed_courses", lambda course_ids: None)
+    client = make_client({"/courses": courses.router}, user=user)
+    lines = [
+        "title,description,category,difficulty_level,duration_hours,price\n",
+        "Python basics,Start coding,data,beginner,4,0\n",
+        "Broken,row,data,beginner,four,0\n",
+        "Extra,row,data,beginner,4,0,surplus\n",
+        "Statistics,Averages,data,intermediate,6,20\n",
+    ]
+    response = client.post("/courses/bulk?format=csv", content=streamed(lines))
+    
+    body = response.json()
+    assert (body["rows"], body["inserted"], body["failed"]) == (4, 2, 2)
+    assert [error["line"] for error in body["errors"]] == [3, 4]
+    assert {course.instructor_id for course in db.query(Course)} == {user.id}
+
+
+class ImportRow(courses.CourseCreate):
+    id: Optional[int] = None
+
+
+def test_rejected_chunk_is_retried_row_by_row(db, user):
+    db.add(Course(id=5, title="Taken", instructor_id=user.id))
+    db.commit()
+    lines = [json.dumps(course_row(f"Course {i}", id=i)) + "\n" for i in range(1, 8)]
+    
+    result = import_courses(db, lines, NDJSON, instructor_id=user.id, row_model=ImportRow, chunk_size=3)
+    
+    # Chunks [1-3] and [7] go in whole; [4-6] is rolled back and retried row by row
+    assert (result.rows, result.inserted, result.failed) == (7, 6, 1)
+    assert result.errors[0]["line"] == 5
+    assert result.errors[0]["errors"].startswith("Rejected by the database")
+    assert sorted(result.course_ids) == [1, 2, 3, 4, 6, 7]
+    db.expire_all()
+    assert sorted(course_id for (course_id,) in db.query(Course.id)) == [1, 2, 3, 4, 5, 6, 7]
+    assert db.get(Course, 5).title == "Taken"
+
+
+def test_csv_chunks_are_committed_as_they_fill(db, user, monkeypatch):
+    commits = []
+    monkeypatch.setattr(db, "commit", lambda original=db.commit: commits.append(db.query(Course).count()) or original())
+    lines = ["title,description,category,difficulty_level,duration_hours,price\n"]
+    lines += [f"Course {i},About,data,beginner,1,0\n" for i in range(5)]
+    
+    result = import_courses(db, lines, CSV, instructor_id=user.id, row_model=courses.CourseCreate, chunk_size=2)
+    
+    assert result.inserted == 5
+    assert commits == [2, 4, 5]
+
+
+class FakeMySQL:
+    """Just enough of a Session on MySQL (no RETURNING) for _insert_chunk"""
+    
+    def __init__(self, lock_mode: int, step: int = 1):
+        self.settings = (step, lock_mode)
+        self.next_id = 100
+        self.inserts = []
+    
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(insert_executemany_returning=False))
+    
+    def execute(self, statement):
+        if not hasattr(statement, "table"):
+            return SimpleNamespace(one=lambda: self.settings)
+        rows = len(statement._multi_values[0]) if statement._multi_values else 1
+        self.inserts.append(rows)
+        first_id = self.next_id
+        self.next_id += rows * self.settings[0] + 7  # another writer takes ids in between
+        return SimpleNamespace(lastrowid=first_id, rowcount=rows)
+
+
+def test_mysql_ids_follow_lastrowid_only_with_consecutive_autoinc():
+    rows = [course_row(f"Course {i}") for i in range(3)]
+    
+    consecutive = FakeMySQL(lock_mode=1, step=2)
+    assert _insert_chunk(consecutive, rows) == [100, 102, 104]
+    assert consecutive.inserts == [3]
+    
+    interleaved = FakeMySQL(lock_mode=2)
+    assert _insert_chunk(interleaved, rows) == [100, 108, 116]
+    assert interleaved.inserts == [1, 1, 1]
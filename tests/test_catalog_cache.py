@@ -0,0 +1,62 @@
+import itertools
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.endpoints import courses
+from db.utils import database
+from db.utils.database import Base
+from services.cache.catalog_cache import course_catalog_cache
+
+
+def new_course(title: str) -> dict:
+    return {
+        "title": title, "description": "About it", "category": "data", "difficulty_level": "beginner",
+        "duration_hours": 2, "price": 0,
+    }
+
+
+def test_etag_revalidation_follows_catalog_writes(db, user, make_client):
+    client = make_client({"/courses": courses.router}, user=user)
+    assert client.post("/courses/", json=new_course("Python basics")).status_code == 201
+    
+    first = client.get("/courses/")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and len(first.json()) == 1
+    unchanged = client.get("/courses/", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.headers["ETag"] == etag
+    assert client.get("/courses/", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/courses/1", headers={"If-None-Match": etag}).status_code == 200  # per-key tags
+    
+    assert client.post("/courses/", json=new_course("Statistics")).status_code == 201
+    changed = client.get("/courses/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [course["title"] for course in changed.json()] == ["Python basics", "Statistics"]
+
+
+def test_a_lagging_replica_never_serves_the_writer_a_stale_catalog(db, user, make_client, monkeypatch, tmp_path):
+    # The "replica" never receives the write: it stays at the pre-write catalog
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica)
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [sessionmaker(bind=replica)])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([0]))
+    monkeypatch.setattr(course_catalog_cache, "check_interval", 3600)
+    database._recent_writers.clear()
+    client = make_client({"/courses": courses.router}, user=user)
+    
+    assert client.get("/courses/", headers={"Authorization": "Bearer reader"}).json() == []
+    assert client.post("/courses/", json=new_course("Python basics"), headers={"Authorization": "Bearer writer"}).status_code == 201
+    
+    # Another client reads first, through the lagging replica, and must not cache the old list
+    other = client.get("/courses/", headers={"Authorization": "Bearer reader"})
+    assert [course["title"] for course in other.json()] == ["Python basics"]
+    mine = client.get("/courses/", headers={"Authorization": "Bearer writer"})
+    assert [course["title"] for course in mine.json()] == ["Python basics"]
+    assert mine.headers["ETag"] == other.headers["ETag"]
+
+
+def test_memoized_version_never_moves_backwards(db):
+    course_catalog_cache.advance(7)
+    course_catalog_cache.invalidate()
+    assert course_catalog_cache.current_version() == 7  # the table still says 0
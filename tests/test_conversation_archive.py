@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from api.endpoints import conversations
+from api.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from services.conversations import archive
+from services.conversations.archive import archive_conversation, conversation_messages, idle_conversation_ids
+from services.conversations.turn_writer import write_turn
+
+OLD = datetime(2026, 1, 1, 8, 0)
+
+
+def seed(db, user, conversations: int, messages: int):
+    db.add_all([Conversation(id=i, user_id=user.id, title=f"Chat {i}") for i in range(1, conversations + 1)])
+    db.add_all([
+        ConversationMessage(
+            id=(conversation_id - 1) * messages + turn + 1,
+            conversation_id=conversation_id,
+            role=MessageRole.USER if turn % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"c{conversation_id} m{turn}",
+            created_at=OLD + timedelta(hours=turn),
+        )
+        for conversation_id in range(1, conversations + 1)
+        for turn in range(messages)
+    ])
+    db.commit()
+
+
+def test_archiving_skips_a_conversation_that_got_a_new_turn(db, user):
+    seed(db, user, conversations=1, messages=4)
+    cutoff = datetime(2026, 10, 1) - timedelta(days=90)
+    assert idle_conversation_ids(db, [1], cutoff) == [1]
+    
+    # A turn lands between the idleness scan and the archive transaction
+    write_turn(db, db.get(Conversation, 1), "One more question", "Sure")
+    assert archive_conversation(db, 1, cutoff) == 0
+    db.commit()
+    assert db.query(ConversationMessage).count() == 6
+    assert db.get(Conversation, 1).archived_at is None
+
+
+def test_archiving_keeps_a_message_inserted_while_packing(db, user, monkeypatch):
+    seed(db, user, conversations=1, messages=4)
+    original_pack = archive.pack_messages
+    
+    def pack_while_a_turn_commits(messages):
+        # Written after the hot rows were read, before they are deleted
+        db.execute(insert(ConversationMessage).values(
+            id=99, conversation_id=1, role=MessageRole.USER, content="late", created_at=OLD,
+        ))
+        return original_pack(messages)
+    
+    monkeypatch.setattr(archive, "pack_messages", pack_while_a_turn_commits)
+    assert archive_conversation(db, 1, datetime(2026, 7, 1)) == 4
+    db.commit()
+    
+    assert [message.id for message in db.query(ConversationMessage)] == [99]
+    messages = conversation_messages(db, db.get(Conversation, 1))
+    assert sorted(message["id"] for message in messages) == [1, 2, 3, 4, 99]
+
+
+def test_a_failed_conversation_does_not_undo_the_rest_of_the_batch(db, user, monkeypatch):
+    seed(db, user, conversations=3, messages=2)
+    original_archive = archive.archive_conversation
+    
+    def archive_or_conflict(session, conversation_id, cutoff=None):
+        moved = original_archive(session, conversation_id, cutoff)
+        if conversation_id == 2:
+            # Another worker archived it first: its archive row already exists
+            raise IntegrityError("INSERT INTO conversation_archives", {}, Exception("UNIQUE constraint failed"))
+        return moved
+    
+    monkeypatch.setattr(archive, "archive_conversation", archive_or_conflict)
+    conflicts_before = archive.ARCHIVE_CONFLICTS.value()
+    stats = archive.archive_idle_conversations(idle_days=90, batch_size=10, now=datetime(2026, 10, 1))
+    
+    assert (stats["conversations"], stats["messages"]) == (2, 4)
+    assert archive.ARCHIVE_CONFLICTS.value() - conflicts_before == 1
+    db.expire_all()
+    assert [conversation.archived_at is not None for conversation in db.query(Conversation).order_by(Conversation.id)] == [
+        True, False, True,
+    ]
+    assert db.query(ConversationMessage.conversation_id).distinct().all() == [(2,)]
+
+
+def test_embedding_of_an_archived_conversation_covers_every_message(db, user, monkeypatch):
+    seed(db, user, conversations=1, messages=4)
+    archive_conversation(db, 1)
+    db.commit()
+    write_turn(db, db.get(Conversation, 1), "Back again", "Welcome back")
+    
+    embedded, stored = [], []
+    monkeypatch.setattr(conversations, "get_conversation_embedding", lambda messages: embedded.extend(messages) or [0.0])
+    monkeypatch.setattr(conversations, "upsert_conversation", lambda client, cid, vector, metadata: stored.append(metadata))
+    monkeypatch.setattr(conversations, "get_qdrant_client", lambda: None)
+    conversations.save_conversation_embeddings(1)
+    
+    assert [message["content"] for message in embedded] == ["c1 m0", "c1 m1", "c1 m2", "c1 m3", "Back again", "Welcome back"]
+    assert stored[0]["message_count"] == 6
+
+
+def test_message_pages_handle_archived_rows_without_timestamps(db, user, make_client):
+    seed(db, user, conversations=1, messages=4)
+    db.query(ConversationMessage).filter(ConversationMessage.id.in_([1, 2])).update(
+        {ConversationMessage.created_at: None}, synchronize_session=False
+    )
+    db.commit()
+    archive_conversation(db, 1)
+    db.commit()
+    client = make_client({"/conversations": conversations.router}, user=user)
+    
+    seen, cursor = [], None
+    while True:
+        page = client.get("/conversations/1/messages", params={"limit": 1, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200
+        seen += [message["id"] for message in page.json()]
+        cursor = page.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert seen == [1, 2, 3, 4]
+    
+    for crafted in (encode_cursor("yesterday", 1), encode_cursor(None, "1"), encode_cursor(datetime(2026, 1, 1), True)):
+        assert client.get("/conversations/1/messages", params={"cursor": crafted}).status_code == 400
+    aware = encode_cursor(datetime(2026, 1, 1, 11, 0, tzinfo=timezone(timedelta(hours=1))), 3)  # 10:00 UTC, m2
+    assert [message["id"] for message in client.get("/conversations/1/messages", params={"cursor": aware}).json()] == [4]
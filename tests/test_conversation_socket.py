@@ -0,0 +1,63 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from api.endpoints import conversation_socket, conversations
+from db.utils import database
+from models.conversation import Conversation
+
+
+def test_binary_frame_closes_with_unsupported_data(user, monkeypatch, make_client):
+    async def authorize(token, conversation_id):
+        return Conversation(id=conversation_id, user_id=user.id, title="Chat")
+    
+    monkeypatch.setattr(conversation_socket, "authorize", authorize)
+    monkeypatch.setattr(conversation_socket, "get_conversation_chain", lambda conversation_id: None)
+    client = make_client({"/conversations": conversation_socket.router})
+    
+    with client.websocket_connect("/conversations/1/ws?token=x") as socket:
+        assert socket.receive_json() == {"type": "ready", "conversation_id": 1}
+        socket.send_text("not json")
+        assert socket.receive_json()["type"] == "error"  # text frames still get an error frame
+        socket.send_bytes(b'{"type": "message", "content": "hi"}')
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_json()
+    assert closed.value.code == 1003
+
+
+class FakeChain:
+    def respond(self, content, on_token=None):
+        on_token("Sure")
+        return SimpleNamespace(content="Sure", model="small", latency_ms=5)
+
+
+def test_socket_turns_make_rest_reads_stick_to_the_primary(db, user, monkeypatch, make_client):
+    db.add(Conversation(id=1, user_id=user.id, title="Chat"))
+    db.commit()
+    
+    async def authorize(token, conversation_id):
+        return Conversation(id=conversation_id, user_id=user.id, title="Chat")
+    
+    monkeypatch.setattr(conversation_socket, "authorize", authorize)
+    monkeypatch.setattr(conversation_socket, "get_conversation_chain", lambda conversation_id: FakeChain())
+    monkeypatch.setattr(conversation_socket, "save_conversation_embeddings", lambda conversation_id: None)
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [database.SessionLocal])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([0]))
+    database._recent_writers.clear()
+    client = make_client({"/conversations": conversations.router}, user=user)
+    client.app.include_router(conversation_socket.router, prefix="/conversations")
+    
+    with client.websocket_connect("/conversations/1/ws?token=alice-token") as socket:
+        socket.receive_json()
+        socket.send_json({"type": "message", "content": "Hello"})
+        while socket.receive_json()["type"] != "done":
+            pass
+    
+    before = database.routing_stats().get("primary/read_your_writes", 0)
+    page = client.get("/conversations/1/messages", headers={"Authorization": "Bearer alice-token"})
+    assert [message["content"] for message in page.json()] == ["Hello", "Sure"]
+    assert database.routing_stats()["primary/read_your_writes"] - before == 1
+    client.get("/conversations/1/messages", headers={"Authorization": "Bearer other-token"})
+    assert database.routing_stats()["primary/read_your_writes"] - before == 1
@@ -0,0 +1,58 @@
+import importlib.util
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import inspect, text
+
+from db.utils.fulltext import ensure_sqlite_fts
+from models.course import Course
+from services.search.course_search import search_courses
+
+FULLTEXT_MIGRATION = (
+    Path(__file__).resolve().parents[1] / "db" / "migrations" / "versions" / "20261019_120000_add_course_fulltext_index.py"
+)
+
+
+def test_sqlite_fallback_search(db, db_engine):
+    db.add_all([
+        Course(id=1, title="Python for data science", description="Pandas and notebooks", category="data",
+               difficulty_level="beginner", duration_hours=10, price=0),
+        Course(id=2, title="Leadership basics", description="Managing a small team", category="business",
+               difficulty_level="beginner", duration_hours=5, price=0),
+    ])
+    db.commit()
+    
+    ensure_sqlite_fts(db_engine)
+    ensure_sqlite_fts(db_engine)  # idempotent, e.g. on every benchmark start
+    
+    assert [row.id for row in search_courses(db, "python notebooks")] == [1]
+    db.get(Course, 2).description = "Managing a data team"
+    db.commit()
+    assert {row.id for row in search_courses(db, "data")} == {1, 2}
+
+
+
+def test_migration_creates_and_drops_the_same_fallback(db_engine):
+    spec = importlib.util.spec_from_file_location("course_fulltext_migration", FULLTEXT_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    
+    def fts_objects():
+        with db_engine.connect() as connection:
+            return sorted(connection.execute(text("SELECT name FROM sqlite_master WHERE name LIKE 'courses_fts%'")).scalars())
+    
+    with db_engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+    migrated = fts_objects()
+    assert {"courses_fts", "courses_fts_ai", "courses_fts_ad", "courses_fts_au"} <= set(migrated)
+    
+    with db_engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.downgrade()
+    assert fts_objects() == []
+    assert "courses_fts" not in inspect(db_engine).get_table_names()
+    
+    ensure_sqlite_fts(db_engine)
+    assert fts_objects() == migrated
@@ -0,0 +1,28 @@
+from crewai import Crew
+
+from services.ai.course_recommender import CourseRecommender
+from services.ai.llm_gateway import BATCH, QUEUE_WAIT, TOKENS, llm_gateway
+
+
+def test_crew_run_is_admitted_by_the_gateway_at_batch_priority(monkeypatch):
+    seen = {}
+    
+    def kickoff(self, *args, **kwargs):
+        # While the crew runs it holds one gateway slot
+        seen["active"] = llm_gateway._active
+        return "1. Python for data science"
+    
+    monkeypatch.setattr(Crew, "kickoff", kickoff)
+    admitted_before = QUEUE_WAIT.snapshot(priority=BATCH)[1]
+    reserved_before = TOKENS.value(kind="reserved")
+    active_before = llm_gateway._active
+    
+    result = CourseRecommender.recommend_for_profile(
+        {"id": 1, "interests": ["data"]}, "What next?", [{"id": 1, "title": "Python for data science"}],
+    )
+    
+    assert result["recommendations"] == "1. Python for data science"
+    assert QUEUE_WAIT.snapshot(priority=BATCH)[1] - admitted_before == 1
+    assert TOKENS.value(kind="reserved") > reserved_before
+    assert seen["active"] == active_before + 1
+    assert llm_gateway._active == active_before
@@ -0,0 +1,154 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from db.utils.database import SessionLocal
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from models.crm_outbox import CrmOutbox
+from services.conversations.archive import idle_conversation_ids
+from services.crm.crm_client import CRMClient, CRMRejected, CRMUnavailable
+from services.crm.outbox_flusher import OUTBOX_DEAD_LETTERS, OutboxFlusher, redrive_dead_letters
+
+
+class RejectingCRM:
+    """Accepts batches unless they contain the poisoned message"""
+    
+    def __init__(self, poisoned_id: int):
+        self.poisoned_id = poisoned_id
+        self.synced = []
+    
+    def sync_messages_batch(self, messages):
+        if any(message["message_id"] == self.poisoned_id for message in messages):
+            raise CRMRejected("HTTP error occurred: 422 Unprocessable Entity")
+        self.synced.extend(message["message_id"] for message in messages)
+
+
+class DownCRM:
+    """Unavailable for the first ``outage`` batches, then accepts everything"""
+    
+    def __init__(self, outage: int):
+        self.outage = outage
+        self.batches = []
+        self.leased_during_call = []
+    
+    def sync_messages_batch(self, messages):
+        with SessionLocal() as other:
+            # The batch is claimed and committed before the request, not locked across it
+            self.leased_during_call.append(all(
+                row.next_attempt_at is not None and row.next_attempt_at > datetime.utcnow()
+                for row in other.query(CrmOutbox).filter(
+                    CrmOutbox.message_id.in_([message["message_id"] for message in messages])
+                )
+            ))
+        if self.outage:
+            self.outage -= 1
+            raise CRMUnavailable("Request error occurred: connection refused")
+        self.batches.append([message["message_id"] for message in messages])
+
+
+def seed_outbox(db, user, count: int):
+    old = datetime.utcnow() - timedelta(days=200)
+    db.add(Conversation(id=1, user_id=user.id, title="Refunds"))
+    db.add_all([
+        ConversationMessage(id=i, conversation_id=1, role=MessageRole.USER, content=f"m{i}", created_at=old)
+        for i in range(1, count + 1)
+    ])
+    db.flush()
+    db.add_all([
+        CrmOutbox(message_id=i, conversation_id=1, payload=json.dumps({"message_id": i}), attempts=0)
+        for i in range(1, count + 1)
+    ])
+    db.commit()
+
+
+def test_rejected_row_is_isolated_and_dead_lettered(db, user):
+    seed_outbox(db, user, 4)
+    
+    crm = RejectingCRM(poisoned_id=2)
+    flusher = OutboxFlusher(crm_client=crm, batch_size=4, max_attempts=4)
+    flusher.backoff = lambda attempts: 0
+    dead_before = OUTBOX_DEAD_LETTERS.value()
+    for _ in range(10):
+        flusher.flush_once(force=True)
+    
+    assert sorted(crm.synced) == [1, 3, 4]
+    db.expire_all()
+    (poisoned,) = db.query(CrmOutbox).all()
+    assert poisoned.message_id == 2
+    assert poisoned.attempts == 4
+    assert poisoned.failed_at is not None
+    assert OUTBOX_DEAD_LETTERS.value() - dead_before == 1
+    
+    # A dead letter no longer holds the conversation back from archiving
+    assert idle_conversation_ids(db, [1], datetime.utcnow() - timedelta(days=90)) == [1]
+    
+    assert redrive_dead_letters() == 1
+    db.expire_all()
+    assert (poisoned.attempts, poisoned.failed_at) == (0, None)
+
+
+def test_outage_neither_consumes_attempts_nor_splits_batches(db, user):
+    seed_outbox(db, user, 8)
+    crm = DownCRM(outage=30)
+    flusher = OutboxFlusher(crm_client=crm, batch_size=8, max_attempts=3)
+    flusher.backoff = lambda attempts: 0
+    for _ in range(30):
+        assert flusher.flush_once(force=True) == 0
+        with SessionLocal() as other:
+            # Released for the next try straight away (zero backoff)
+            other.query(CrmOutbox).update({CrmOutbox.next_attempt_at: None})
+            other.commit()
+    
+    db.expire_all()
+    rows = db.query(CrmOutbox).all()
+    assert len(rows) == 8
+    assert all(row.attempts == 0 and row.failed_at is None for row in rows)
+    assert rows[0].last_error.startswith("Request error occurred")
+    
+    # Back up: the whole backlog goes out as one full batch
+    assert flusher.flush_once(force=True) == 8
+    assert crm.batches == [list(range(1, 9))]
+    assert all(crm.leased_during_call)
+    assert db.query(CrmOutbox).count() == 0
+
+
+def test_outage_pauses_the_flusher(db, user):
+    seed_outbox(db, user, 2)
+    crm = DownCRM(outage=1)
+    flusher = OutboxFlusher(crm_client=crm, batch_size=2)
+    flusher.backoff = lambda attempts: 60
+    assert flusher.flush_once(force=True) == 0
+    with SessionLocal() as other:
+        other.query(CrmOutbox).update({CrmOutbox.next_attempt_at: None})
+        other.commit()
+    assert flusher.flush_once(force=True) == 0
+    assert len(crm.leased_during_call) == 1  # no request while paused
+
+
+def response(status: int) -> requests.Response:
+    result = requests.Response()
+    result.status_code = status
+    result._content = b'{"message": "nope"}'
+    return result
+
+
+@pytest.mark.parametrize("outcome, error", [
+    (response(422), CRMRejected),
+    (response(404), CRMRejected),
+    (response(429), CRMUnavailable),
+    (response(503), CRMUnavailable),
+    (requests.exceptions.ConnectTimeout("timed out"), CRMUnavailable),
+    (requests.exceptions.ConnectionError("refused"), CRMUnavailable),
+])
+def test_client_tells_rejections_from_outages(monkeypatch, outcome, error):
+    def request(**kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    monkeypatch.setattr(requests, "request", request)
+    with pytest.raises(error):
+        CRMClient().sync_messages_batch([{"message_id": 1}])
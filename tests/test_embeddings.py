@@ -0,0 +1,43 @@
+import math
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from vector_db.qdrant_client import initialize_collection, vector_size
+from vector_db.utils.embedding_providers import HashingEmbeddingProvider
+
+TEXTS = ["Which Python course fits a beginner?", "Data science track schedule", "hello"]
+
+
+def test_hashing_provider_is_deterministic_across_instances_and_processes():
+    inline = HashingEmbeddingProvider(dimensions=64)
+    pooled = HashingEmbeddingProvider(dimensions=64, workers=2, batch_size=1)
+    try:
+        vectors = inline.embed(TEXTS)
+        assert HashingEmbeddingProvider(dimensions=64).embed(TEXTS) == vectors
+        # Worker processes hash the same way (no per-process hash seed)
+        assert pooled.embed(TEXTS) == vectors
+    finally:
+        pooled.close()
+    
+    assert all(len(vector) == 64 for vector in vectors)
+    assert all(math.isclose(math.fsum(x * x for x in vector), 1.0, rel_tol=1e-5) for vector in vectors)
+    assert vectors[0] != vectors[1]
+    # Case and whitespace are normalized away
+    assert inline.embed(["  WHICH python   course fits a Beginner?"]) == vectors[:1]
+
+
+def test_initialize_collection_rejects_a_dimension_mismatch():
+    client = QdrantClient(location=":memory:")
+    size = vector_size()
+    
+    initialize_collection("matching", client)
+    assert client.get_collection("matching").config.params.vectors.size == size
+    initialize_collection("matching", client)  # existing collection of the right size is reused
+    
+    client.create_collection(
+        "other_provider", vectors_config=models.VectorParams(size=size // 2, distance=models.Distance.COSINE)
+    )
+    with pytest.raises(RuntimeError, match=f"stores {size // 2}-dimensional vectors"):
+        initialize_collection("other_provider", client)
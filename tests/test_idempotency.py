@@ -0,0 +1,71 @@
+import threading
+
+from api.endpoints import conversations
+from services.cache.idempotency import message_idempotency
+
+
+def slow_turn_until(started: threading.Event, release: threading.Event, calls: list):
+    def slow_turn(conversation_id, message, background_tasks, db, current_user):
+        calls.append(message.content)
+        started.set()
+        release.wait(10)
+        return {
+            "user_message": {"id": 1, "conversation_id": conversation_id, "role": "user", "content": message.content},
+            "assistant_message": {"id": 2, "conversation_id": conversation_id, "role": "assistant", "content": "Hi"},
+        }
+    
+    return slow_turn
+
+
+def test_repeat_in_flight_waits_for_the_original(db, user, make_client, monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+    monkeypatch.setattr(conversations, "create_turn", slow_turn_until(started, release, calls))
+    message_idempotency._entries.clear()
+    client = make_client({"/conversations": conversations.router}, user=user)
+    request = dict(url="/conversations/7/messages", json={"content": "Hello"}, headers={"Idempotency-Key": "abc"})
+    
+    original, repeat = {}, {}
+    first = threading.Thread(target=lambda: original.update(response=client.post(**request)))
+    first.start()
+    assert started.wait(10)
+    second = threading.Thread(target=lambda: repeat.update(response=client.post(**request)))
+    second.start()
+    second.join(0.3)
+    assert second.is_alive()  # parked on the original, not answered
+    
+    release.set()
+    first.join(10)
+    second.join(10)
+    assert original["response"].status_code == 200
+    assert repeat["response"].status_code == 200
+    assert repeat["response"].headers["Idempotent-Replayed"] == "true"
+    assert repeat["response"].json() == original["response"].json()
+    assert calls == ["Hello"]
+
+
+def test_repeat_gets_409_when_the_original_outlasts_the_wait(db, user, make_client, monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+    monkeypatch.setattr(conversations, "create_turn", slow_turn_until(started, release, calls))
+    monkeypatch.setattr(conversations, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    message_idempotency._entries.clear()
+    client = make_client({"/conversations": conversations.router}, user=user)
+    request = dict(url="/conversations/7/messages", json={"content": "Hello"}, headers={"Idempotency-Key": "abc"})
+    
+    original = {}
+    thread = threading.Thread(target=lambda: original.update(response=client.post(**request)))
+    thread.start()
+    assert started.wait(10)
+    
+    repeat = client.post(**request)
+    assert repeat.status_code == 409
+    assert repeat.headers["Retry-After"] == str(conversations.IDEMPOTENCY_RETRY_AFTER_SECONDS)
+    
+    # The timed-out wait left the original alone
+    release.set()
+    thread.join(10)
+    assert original["response"].status_code == 200
+    replay = client.post(**request)
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == original["response"].json()
+    assert calls == ["Hello"]
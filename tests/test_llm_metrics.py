@@ -0,0 +1,12 @@
+from chatbot.llm import prompt_cache_hit_ratio, prompt_token_totals, record_prompt_cache
+
+
+def test_prompt_cache_totals_sum_over_models():
+    before = prompt_token_totals()
+    record_prompt_cache("small-test", {"prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": 800}})
+    record_prompt_cache("large-test", {"prompt_tokens": 500})
+    
+    after = prompt_token_totals()
+    assert after["hit"] - before["hit"] == 800
+    assert after["miss"] - before["miss"] == 700
+    assert 0 < prompt_cache_hit_ratio() <= 1
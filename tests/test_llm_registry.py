@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from chatbot.chains.conversation import ConversationChain
+from chatbot.llm import chat_model, registered_models, shared_http_client
+from services.ai.llm_gateway import BATCH, INTERACTIVE
+
+
+def test_chat_models_are_shared_per_model_temperature_and_priority():
+    llm = chat_model("registry-test", 0.7)
+    assert chat_model("registry-test", 0.7, INTERACTIVE) is llm
+    assert chat_model("registry-test", 0.2) is not llm
+    
+    batch = chat_model("registry-test", 0.7, BATCH)
+    assert batch is not llm
+    assert batch.callbacks[0].priority == BATCH
+    # Every registered model sends through the one keep-alive pool
+    assert llm.http_client is batch.http_client is shared_http_client()
+    assert "registry-test@0.7/interactive" in registered_models()
+
+
+def test_concurrent_lookups_build_one_model():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        llms = list(pool.map(lambda _: chat_model("registry-race-test", 0.5), range(32)))
+    assert all(llm is llms[0] for llm in llms)
+
+
+def test_conversations_reuse_the_registered_client():
+    first = ConversationChain(conversation_id=1).get_llm("registry-chain-test")
+    second = ConversationChain(conversation_id=2).get_llm("registry-chain-test")
+    assert first is second is chat_model("registry-chain-test", 0.7)
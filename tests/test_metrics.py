@@ -0,0 +1,30 @@
+import pytest
+
+from services.observability import metrics
+
+
+def test_counter_value_is_per_label_set():
+    counter = metrics.Counter("test_counter_total", "Test", ["kind"])
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    counter.inc(kind="b")
+    
+    assert counter.value(kind="a") == 3
+    assert counter.value(kind="b") == 1
+    assert counter.value(kind="missing") == 0
+
+
+def test_track_times_the_block_and_counts_errors():
+    latency = metrics.Histogram("test_track_seconds", "Test", ["operation"])
+    errors = metrics.Counter("test_track_errors_total", "Test", ["operation", "error"])
+    
+    with metrics.track(latency, errors, operation="ok"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.track(latency, errors, operation="bad"):
+            raise ValueError("boom")
+    
+    assert latency.snapshot(operation="ok")[1] == 1
+    assert latency.snapshot(operation="bad")[1] == 1
+    assert errors.value(operation="bad", error="ValueError") == 1
+    assert errors.value(operation="ok", error="ValueError") == 0
@@ -0,0 +1,42 @@
+import pytest
+
+from services.ai.model_router import (
+    CHAT, CREW, LARGE, ROUTE_DECISIONS, SMALL, WEBSOCKET, ModelRouter, parse_policies,
+)
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(small_model="mini", large_model="big", policies={CHAT: "auto", CREW: "large", WEBSOCKET: "small"})
+
+
+@pytest.mark.parametrize("text, tier, reason", [
+    ("Hi there!", SMALL, "simple"),
+    ("When does the Python course start?", SMALL, "simple"),
+    ("Can you compare the data science and web tracks?", LARGE, "complex_intent"),
+    ("What should my career roadmap look like?", LARGE, "complex_intent"),
+    ("Why does this fail?\n```\nSELECT * FROM courses\n```", LARGE, "code"),
+    ("Price? Duration? Level? Teacher?", LARGE, "multi_question"),
+    ("word " * 41, LARGE, "long"),
+])
+def test_auto_policy_picks_the_tier_per_turn(router, text, tier, reason):
+    decision = router.route(CHAT, text)
+    assert (decision.tier, decision.reason) == (tier, reason)
+    assert decision.model == {SMALL: "mini", LARGE: "big"}[tier]
+
+
+def test_pinned_policies_ignore_the_text(router):
+    assert router.route(CREW).model == "big"
+    assert router.route(WEBSOCKET, "Can you compare the two tracks step by step?").model == "mini"
+    # Endpoints without a policy route per turn
+    assert router.route("unknown", "Hello").model == "mini"
+
+
+def test_decisions_are_counted_by_endpoint_model_and_reason(router):
+    before = ROUTE_DECISIONS.value(endpoint=CREW, model="big", reason="policy")
+    router.route(CREW)
+    assert ROUTE_DECISIONS.value(endpoint=CREW, model="big", reason="policy") == before + 1
+
+
+def test_parse_policies():
+    assert parse_policies("chat=auto, crew = LARGE,broken,") == {"chat": "auto", "crew": "large"}
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from api.endpoints import users
+from api.pagination import NEXT_CURSOR_HEADER, NULLABLE_DATETIME, NUMBER, decode_cursor, encode_cursor
+from models.user import User
+
+
+def test_cursor_round_trips_sort_keys():
+    created_at = datetime(2026, 10, 19, 12, 30, 15, 250000)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor  # travels in a query string unescaped
+    assert decode_cursor(cursor, NULLABLE_DATETIME, int) == [created_at, 42]
+    assert decode_cursor(encode_cursor(None, 7), NULLABLE_DATETIME, int) == [None, 7]
+    assert decode_cursor(encode_cursor(0.75, 3), NUMBER, int) == [0.75, 3]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "e30",  # {}
+    encode_cursor(1, 2),  # too many values
+    encode_cursor("1"),
+    encode_cursor(True),
+    encode_cursor(1.5),
+])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as rejected:
+        decode_cursor(cursor, int)
+    assert rejected.value.status_code == 400
+
+
+def test_user_list_pages_by_cursor(db, user, make_client):
+    db.add_all([User(id=i, username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(2, 6)])
+    db.commit()
+    client = make_client({"/users": users.router}, user=user)
+    
+    seen, cursor = [], None
+    while True:
+        page = client.get("/users/", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200
+        seen.append([row["id"] for row in page.json()])
+        cursor = page.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert seen == [[1, 2], [3, 4], [5]]
+    
+    response = client.get("/users/", params={"cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from api.endpoints import auth
+from services.security.password_hasher import HashingOverloaded, PasswordHasher
+
+
+class BlockingContext:
+    """Stands in for the CryptContext: every call waits until released"""
+    
+    def __init__(self):
+        self.release = threading.Event()
+    
+    def verify(self, plain_password, hashed_password):
+        self.release.wait(5)
+        return plain_password == hashed_password
+    
+    def hash(self, password):
+        self.release.wait(5)
+        return password
+
+
+def wait_until_drained(hasher, timeout=5):
+    # Slots are released by a done-callback, which can run just after result() returns
+    deadline = time.monotonic() + timeout
+    while hasher.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_queue_rejects_instead_of_queueing():
+    context = BlockingContext()
+    hasher = PasswordHasher(context, max_workers=1, max_queue=1)
+    running = hasher._submit(context.hash, "a")
+    queued = hasher._submit(context.hash, "b")
+    
+    with pytest.raises(HashingOverloaded) as overloaded:
+        hasher.hash_blocking("c")
+    assert overloaded.value.retry_after == 2
+    assert hasher.pending == 2
+    
+    context.release.set()
+    assert (running.result(), queued.result()) == ("a", "b")
+    wait_until_drained(hasher)
+    assert hasher.hash_blocking("c") == "c"
+
+
+def test_login_answers_429_with_retry_after_when_hashing_is_saturated(user, make_client, monkeypatch):
+    context = BlockingContext()
+    hasher = PasswordHasher(context, max_workers=1, max_queue=0)
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    busy = hasher._submit(context.hash, "busy")
+    client = make_client({"/auth": auth.router})
+    
+    try:
+        response = client.post("/auth/token", data={"username": user.username, "password": "x"})
+    finally:
+        context.release.set()
+        busy.result()
+        wait_until_drained(hasher)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    
+    response = client.post("/auth/token", data={"username": user.username, "password": "x"})
+    assert response.status_code == 200
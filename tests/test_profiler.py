@@ -0,0 +1,55 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.observability.profiler import ProfileStore, Profiler, ProfilerMiddleware, RequestProfile
+
+
+def block_event_loop(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_the_event_loop_thread_without_spans(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    profiler = Profiler(store=store, threshold=0.0, interval=0.001)
+    app = FastAPI()
+    
+    @app.get("/slow")
+    async def slow():
+        # Synchronous work on the loop: no span records it, only stack samples can
+        block_event_loop(0.2)
+        return {}
+    
+    app.add_middleware(ProfilerMiddleware, profiler=profiler, exclude_prefixes=())
+    with TestClient(app) as client:
+        assert client.get("/slow").status_code == 200
+    
+    deadline = time.monotonic() + 5
+    while not store.list() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    (summary,) = store.list()
+    profile = store.get(summary["id"])
+    assert profile["samples"] > 0
+    assert any("block_event_loop" in stack for stack in profile["folded"])
+
+
+def test_workers_sharing_a_directory_see_one_ring_buffer(tmp_path):
+    # Two workers' stores over the same PROFILER_DIR
+    first, second = ProfileStore(str(tmp_path), max_profiles=3), ProfileStore(str(tmp_path), max_profiles=3)
+    assert first.list() == []
+    saved = []
+    for index in range(5):
+        profile = RequestProfile("GET", f"/courses/{index}", sampled=True, threshold=1.0)
+        profile.duration = 0.01
+        (first if index % 2 == 0 else second).save(profile)
+        saved.append(profile.id)
+    
+    newest = [summary["id"] for summary in first.list()]
+    assert newest == list(reversed(saved[2:]))
+    assert [summary["id"] for summary in second.list()] == newest
+    assert len(list(tmp_path.iterdir())) == 3
+    assert first.get(saved[3])["path"] == "/courses/3"  # written by the other worker
+    assert second.get(saved[0]) is None  # evicted
@@ -0,0 +1,62 @@
+import itertools
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+
+from api.dependencies import get_db, get_read_db
+from db.utils import database
+
+
+def test_reads_stick_to_the_primary_after_a_write(db_engine, make_client, monkeypatch):
+    # One "replica" that is really the primary's sessionmaker; only the routing is under test
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [database.SessionLocal])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([0]))
+    database._recent_writers.clear()
+    before = database.routing_stats()
+    
+    router = APIRouter()
+    
+    @router.get("/read")
+    def read(db=Depends(get_read_db)):
+        return db.execute(text("SELECT 1")).scalar()
+    
+    @router.post("/write")
+    def write(db=Depends(get_db)):
+        return db.execute(text("SELECT 1")).scalar()
+    
+    client = make_client({"": router})
+    alice = {"Authorization": "Bearer alice"}
+    bob = {"Authorization": "Bearer bob"}
+    assert client.get("/read", headers=alice).status_code == 200
+    assert client.post("/write", headers=alice).status_code == 200
+    assert client.get("/read", headers=alice).status_code == 200
+    assert client.get("/read", headers=bob).status_code == 200
+    
+    after = database.routing_stats()
+    delta = {route: after.get(route, 0) - before.get(route, 0) for route in after}
+    assert delta["replica_0/replica"] == 2
+    assert delta["primary/read_your_writes"] == 1
+
+
+def test_conversation_list_pages_through_the_async_engine(db, user, make_client):
+    from api.endpoints import conversations
+    from models.conversation import Conversation
+    from models.user import User
+    
+    db.add(User(id=2, username="bob", email="bob@example.com", hashed_password="x"))
+    db.add_all([Conversation(id=i, user_id=user.id, title=f"Chat {i}") for i in range(1, 4)])
+    db.add(Conversation(id=4, user_id=2, title="Bob's"))
+    db.commit()
+    before = database.routing_stats()
+    
+    client = make_client({"/conversations": conversations.router}, user=user)
+    first = client.get("/conversations/", params={"limit": 2})
+    assert first.status_code == 200
+    assert [c["id"] for c in first.json()] == [1, 2]
+    second = client.get("/conversations/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [c["id"] for c in second.json()] == [3]
+    assert "X-Next-Cursor" not in second.headers
+    
+    after = database.routing_stats()
+    assert after["primary/no_replica"] - before.get("primary/no_replica", 0) == 2
+    assert database.get_async_engine().sync_engine.pool.checkedout() == 0
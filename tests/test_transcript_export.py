@@ -0,0 +1,47 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage, MessageRole
+from services.conversations.archive import archive_idle_conversations
+from services.conversations.turn_writer import write_turn
+from services.export.transcripts import stream_transcripts
+
+OLD = datetime(2026, 1, 1, 8, 0)
+
+
+def seed(db, user, conversations: int, messages: int):
+    db.add_all([Conversation(id=i, user_id=user.id, title=f"Chat {i}") for i in range(1, conversations + 1)])
+    db.add_all([
+        ConversationMessage(
+            id=(conversation_id - 1) * messages + turn + 1,
+            conversation_id=conversation_id,
+            role=MessageRole.USER if turn % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"c{conversation_id} m{turn}",
+            created_at=OLD + timedelta(hours=turn),
+        )
+        for conversation_id in range(1, conversations + 1)
+        for turn in range(messages)
+    ])
+    db.commit()
+
+
+def test_export_merges_many_archives_with_an_aware_since(db, user):
+    seed(db, user, conversations=25, messages=4)
+    stats = archive_idle_conversations(idle_days=90, batch_size=7, now=datetime(2026, 10, 1))
+    assert stats["conversations"] == 25
+    # Newer hot tails on two archived conversations
+    for conversation_id in (3, 20):
+        write_turn(db, db.get(Conversation, conversation_id), "Back again", "Welcome back")
+    
+    # 10:00 UTC written as 12:00+02:00: keeps the messages at 10:00 and 11:00 of each archive
+    since = datetime(2026, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    body = b"".join(stream_transcripts(compress=True, since=since))
+    records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    
+    assert len(records) == 25 * 2 + 2 * 2
+    assert [record["conversation_id"] for record in records] == sorted(record["conversation_id"] for record in records)
+    assert all(record["created_at"] >= "2026-01-01T10:00:00" for record in records)
+    third = [record["content"] for record in records if record["conversation_id"] == 3]
+    assert third == ["c3 m2", "c3 m3", "Back again", "Welcome back"]
@@ -0,0 +1,39 @@
+import json
+
+from db.utils.database import utcnow
+from models.conversation import Conversation
+from models.conversation_message import ConversationMessage
+from models.crm_outbox import CrmOutbox
+from services.conversations.turn_writer import _add_turn, write_turn
+
+
+def test_created_at_is_known_before_the_flush(db, user):
+    # MySQL cannot return server defaults from an INSERT; a Python-side value
+    # keeps the outbox payload from reloading each message after the flush
+    conversation = Conversation(id=1, user_id=user.id, title="Schedules")
+    db.add(conversation)
+    db.commit()
+    
+    messages = _add_turn(db, conversation, "When does it start?", "Monday")
+    assert all(message.created_at is not None for message in messages)
+    db.rollback()
+    
+    user_message, assistant_message = write_turn(db, conversation, "When does it start?", "Monday", "small", 120)
+    payloads = [json.loads(row.payload) for row in db.query(CrmOutbox).order_by(CrmOutbox.id)]
+    assert [payload["message_id"] for payload in payloads] == [user_message["id"], assistant_message["id"]]
+    assert payloads[0]["created_at"] == payloads[1]["created_at"]
+
+
+def test_turns_and_other_rows_share_one_clock(db, user):
+    # Keyset ordering and the archive idle cutoff compare these columns, so
+    # every insert has to take its timestamp from the same (UTC) clock
+    before = utcnow()
+    conversation = Conversation(id=1, user_id=user.id, title="Schedules")
+    db.add(conversation)
+    db.commit()
+    write_turn(db, conversation, "When does it start?", "Monday")
+    after = utcnow()
+    
+    timestamps = [conversation.created_at] + [message.created_at for message in db.query(ConversationMessage)]
+    timestamps += [row.created_at for row in db.query(CrmOutbox)]
+    assert all(before <= timestamp.replace(tzinfo=None) <= after for timestamp in timestamps)
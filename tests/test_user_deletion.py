@@ -0,0 +1,37 @@
+from api.endpoints import courses, users
+from models.course import Course
+from models.user import User
+from services.cache.catalog_cache import course_catalog_cache
+from db.utils.fulltext import ensure_sqlite_fts
+
+
+def test_catalog_reads_after_the_instructor_is_deleted(db, db_engine, user, make_client):
+    instructor = User(id=2, username="bob", email="bob@example.com", hashed_password="x", is_active=True)
+    db.add(instructor)
+    db.add_all([
+        Course(id=1, title="Python basics", description="Start coding", category="data",
+               difficulty_level="beginner", duration_hours=4, price=0, instructor_id=2),
+        Course(id=2, title="Python for analysts", description="Pandas", category="data",
+               difficulty_level="intermediate", duration_hours=6, price=10, instructor_id=user.id),
+    ])
+    db.commit()
+    ensure_sqlite_fts(db_engine)
+    course_catalog_cache.invalidate()
+    
+    reader = make_client({"/courses": courses.router})
+    assert reader.get("/courses/").status_code == 200  # warm the cached catalog
+    
+    db.refresh(instructor)
+    deleting = make_client({"/users": users.router}, user=instructor)
+    assert deleting.delete("/users/2").status_code == 204
+    
+    listing = reader.get("/courses/")
+    assert listing.status_code == 200
+    assert {course["id"]: course["instructor_id"] for course in listing.json()} == {1: None, 2: user.id}
+    detail = reader.get("/courses/1")
+    assert detail.status_code == 200
+    assert detail.json()["instructor_id"] is None
+    found = reader.get("/courses/search", params={"q": "python"})
+    assert found.status_code == 200
+    assert {course["id"] for course in found.json()} == {1, 2}
+    assert reader.get("/courses/instructor/2").json() == []
@@ -1,2 +1,17 @@
-from .qdrant_client import get_qdrant_client
-from .utils.embeddings import get_embeddings
\ No newline at end of file
+"""Vector store access. Exports are resolved on first access (see chatbot/__init__.py)."""
+from importlib import import_module
+
+_LAZY_EXPORTS = {
+    "get_qdrant_client": "vector_db.qdrant_client",
+    "get_embeddings": "vector_db.utils.embeddings",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,60 +1,175 @@
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
 import os
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from services.observability import metrics, profiler
+
 load_dotenv()
 
 # Qdrant configuration
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "conversation_embeddings")
-VECTOR_SIZE = 1536  # OpenAI embedding size
+QDRANT_COURSE_COLLECTION = os.getenv("QDRANT_COURSE_COLLECTION", "course_embeddings")
+# ":memory:" or a local path runs Qdrant embedded (offline benchmarks, tests)
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION")
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))
+QDRANT_DELETE_BATCH_SIZE = int(os.getenv("QDRANT_DELETE_BATCH_SIZE", "1000"))
+
+QDRANT_SECONDS = metrics.histogram("qdrant_request_seconds", "Qdrant call latency", ["operation"])
+QDRANT_ERRORS = metrics.counter("qdrant_errors_total", "Qdrant calls that raised", ["operation", "error"])
+
+@contextmanager
+def instrumented(operation):
+    """Latency/error metrics and a profiler span for one Qdrant call"""
+    with metrics.track(QDRANT_SECONDS, QDRANT_ERRORS, operation=operation), profiler.span("vector_db", operation):
+        yield
+
+# qdrant_client is imported on first use so importing this module stays cheap
+_client = None
+_client_lock = threading.Lock()
 
 def get_qdrant_client():
-    """Get a Qdrant client instance"""
-    return QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    """Get the shared Qdrant client instance"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from qdrant_client import QdrantClient
+                
+                if QDRANT_LOCATION:
+                    _client = QdrantClient(location=QDRANT_LOCATION)
+                else:
+                    _client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, timeout=QDRANT_TIMEOUT)
+    return _client
 
-def initialize_collection():
+def vector_size():
+    """Collection vector size, set by the configured embedding provider"""
+    from vector_db.utils.embeddings import get_embedding_provider
+    
+    return get_embedding_provider().dimensions
+
+def initialize_collection(collection_name=QDRANT_COLLECTION, client=None):
     """Initialize the Qdrant collection if it doesn't exist"""
-    client = get_qdrant_client()
+    from qdrant_client.http import models
     
-    # Check if collection exists
-    collections = client.get_collections()
-    if not any(collection.name == QDRANT_COLLECTION for collection in collections.collections):
-        # Create new collection
-        client.create_collection(
-            collection_name=QDRANT_COLLECTION,
-            vectors_config=models.VectorParams(
-                size=VECTOR_SIZE,
-                distance=models.Distance.COSINE
+    client = client or get_qdrant_client()
+    size = vector_size()
+    
+    with instrumented("initialize_collection"):
+        # Check if collection exists
+        collections = client.get_collections()
+        if not any(collection.name == collection_name for collection in collections.collections):
+            # Create new collection
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(
+                    size=size,
+                    distance=models.Distance.COSINE
+                )
             )
+            print(f"Created new Qdrant collection: {collection_name}")
+            ensure_payload_indexes(client, collection_name)
+            return client
+        existing = client.get_collection(collection_name).config.params.vectors.size
+    
+    if existing != size:
+        # Vectors from another provider cannot be compared; the collection must be rebuilt
+        raise RuntimeError(
+            f"Qdrant collection {collection_name} stores {existing}-dimensional vectors "
+            f"but the embedding provider produces {size}"
         )
-        print(f"Created new Qdrant collection: {QDRANT_COLLECTION}")
-    else:
-        print(f"Qdrant collection {QDRANT_COLLECTION} already exists")
+    print(f"Qdrant collection {collection_name} already exists")
+    ensure_payload_indexes(client, collection_name)
 
     return client
 
+def ensure_payload_indexes(client, collection_name):
+    """Index user_id, which the filter-based delete of a user's conversations matches on"""
+    from qdrant_client.http import models
+    
+    # Embedded Qdrant ignores payload indexes and warns about them
+    if collection_name != QDRANT_COLLECTION or QDRANT_LOCATION:
+        return
+    with instrumented("create_payload_index"):
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name="user_id",
+            field_schema=models.PayloadSchemaType.INTEGER
+        )
+
 def upsert_conversation(client, vector_id, embedding, metadata=None):
     """Store a conversation embedding in Qdrant"""
-    client.upsert(
-        collection_name=QDRANT_COLLECTION,
-        points=[
-            models.PointStruct(
-                id=vector_id,
-                vector=embedding,
-                payload=metadata or {}
+    from qdrant_client.http import models
+    
+    with instrumented("upsert_conversation"):
+        client.upsert(
+            collection_name=QDRANT_COLLECTION,
+            points=[
+                models.PointStruct(
+                    id=vector_id,
+                    vector=embedding,
+                    payload=metadata or {}
+                )
+            ]
+        )
+
+def upsert_courses(client, points):
+    """Store course embeddings in Qdrant; points are (course_id, embedding, metadata) tuples"""
+    from qdrant_client.http import models
+    
+    with instrumented("upsert_courses"):
+        client.upsert(
+            collection_name=QDRANT_COURSE_COLLECTION,
+            points=[
+                models.PointStruct(
+                    id=course_id,
+                    vector=embedding,
+                    payload=metadata or {}
+                )
+                for course_id, embedding, metadata in points
+            ]
+        )
+
+def delete_conversations(client, conversation_ids, batch_size=QDRANT_DELETE_BATCH_SIZE):
+    """Remove the embeddings of ``conversation_ids``, one filter-based delete per batch"""
+    from qdrant_client.http import models
+    
+    conversation_ids = list(conversation_ids)
+    for start in range(0, len(conversation_ids), batch_size):
+        with instrumented("delete_conversations"):
+            client.delete(
+                collection_name=QDRANT_COLLECTION,
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(must=[models.HasIdCondition(has_id=conversation_ids[start:start + batch_size])])
+                ),
+                wait=False
             )
-        ]
-    )
+
+def delete_user_conversations(client, user_id):
+    """Remove every conversation embedding owned by ``user_id`` in a single request"""
+    from qdrant_client.http import models
+    
+    with instrumented("delete_user_conversations"):
+        client.delete(
+            collection_name=QDRANT_COLLECTION,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(
+                    must=[models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))]
+                )
+            ),
+            wait=False
+        )
 
 def search_similar_conversations(client, embedding, limit=5):
     """Search for similar conversations based on embedding"""
-    results = client.search(
-        collection_name=QDRANT_COLLECTION,
-        query_vector=embedding,
-        limit=limit
-    )
+    with instrumented("search_conversations"):
+        # query_points replaces the search API removed from recent qdrant-client releases
+        results = client.query_points(
+            collection_name=QDRANT_COLLECTION,
+            query=embedding,
+            limit=limit
+        )
     
-    return results
\ No newline at end of file
+    return results.points
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""Embedding backends behind one interface.
+
+``OpenAIEmbeddingProvider`` calls the embeddings API. ``HashingEmbeddingProvider``
+and ``OnnxEmbeddingProvider`` run locally with no network. They split their
+input into batches and spread those over a process pool, because both are
+CPU bound.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from typing import Callable, List, Optional, Sequence
+
+# Output size of the OpenAI models when no ``dimensions`` override is requested
+OPENAI_MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# 64-bit FNV-1a constants and the murmur3 finalizer multiplier
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+MIX_MULTIPLIER = 0xFF51AFD7ED558CCD
+
+
+class EmbeddingProvider:
+    """Turns texts into fixed-size vectors; ``dimensions`` sizes the Qdrant collections"""
+    name = "base"
+    dimensions = 0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, client_factory: Callable, model: str, dimensions: int = 0):
+        self.client_factory = client_factory
+        self.model = model
+        # Only the text-embedding-3 models accept a shortened output size
+        self.requested_dimensions = dimensions or None
+        self.dimensions = dimensions or OPENAI_MODEL_DIMENSIONS.get(model, 1536)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        kwargs = {"dimensions": self.requested_dimensions} if self.requested_dimensions else {}
+        response = self.client_factory().embeddings.create(model=self.model, input=list(texts), **kwargs)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class PooledEmbeddingProvider(EmbeddingProvider):
+    """Local backend: chunks of ``batch_size`` texts run on up to ``workers`` processes"""
+
+    def __init__(self, workers: int, batch_size: int):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def batch_function(self) -> Callable[[List[str]], list]:
+        """Picklable module-level function that embeds one chunk"""
+        raise NotImplementedError
+
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn, not fork: the API process runs threads
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        return self._pool
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        texts = list(texts)
+        chunks = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        embed_chunk = self.batch_function()
+        # A single chunk is cheaper inline than a round trip to a worker
+        if self.workers == 1 or len(chunks) <= 1:
+            results = map(embed_chunk, chunks)
+        else:
+            results = self.pool().map(embed_chunk, chunks)
+        return [vector for chunk in results for vector in chunk]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+def hash_ngrams(texts: List[str], dimensions: int, ngram_min: int, ngram_max: int) -> list:
+    """Signed feature hashing of character n-grams with sublinear TF, L2-normalized
+
+    Every n-gram of every text in the chunk is hashed in one vectorized pass per
+    n-gram length; no Python-level loop runs over characters.
+    """
+    import numpy as np
+
+    docs = [f" {' '.join(text.lower().split())} ".encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+    data = np.frombuffer(b"".join(docs), dtype=np.uint8).astype(np.uint64)
+    padded = np.concatenate([data, np.zeros(ngram_max, dtype=np.uint64)])
+    doc_of = np.repeat(np.arange(len(docs), dtype=np.int64), lengths)
+    doc_end = np.repeat(np.cumsum(lengths), lengths)
+    positions = np.arange(len(data), dtype=np.int64)
+
+    counts = np.zeros(len(docs) * dimensions, dtype=np.float64)
+    hashes = np.full(len(data), FNV_OFFSET, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for n in range(1, ngram_max + 1):
+            # Extend every window by one byte; the hash of an n-gram builds on its (n-1)-gram
+            hashes = (hashes ^ padded[n - 1:n - 1 + len(data)]) * np.uint64(FNV_PRIME)
+            if n < ngram_min:
+                continue
+            valid = positions + n <= doc_end
+            mixed = hashes[valid] ^ np.uint64(n)
+            mixed = (mixed ^ (mixed >> np.uint64(33))) * np.uint64(MIX_MULTIPLIER)
+            mixed ^= mixed >> np.uint64(33)
+            buckets = (mixed % np.uint64(dimensions)).astype(np.int64)
+            signs = np.where(mixed >> np.uint64(63), -1.0, 1.0)
+            counts += np.bincount(doc_of[valid] * dimensions + buckets, weights=signs, minlength=counts.size)
+
+    vectors = counts.reshape(len(docs), dimensions)
+    vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1.0, norms)
+    return vectors.astype(np.float32).tolist()
+
+
+class HashingEmbeddingProvider(PooledEmbeddingProvider):
+    """Hashed character n-gram projection; no model file, vocabulary or network"""
+    name = "hashing"
+
+    def __init__(self, dimensions: int = 768, ngram_min: int = 3, ngram_max: int = 5, workers: int = 1,
+                 batch_size: int = 256):
+        super().__init__(workers, batch_size)
+        self.dimensions = dimensions
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+
+    def batch_function(self):
+        return partial(hash_ngrams, dimensions=self.dimensions, ngram_min=self.ngram_min, ngram_max=self.ngram_max)
+
+
+# Per-process ONNX sessions, keyed by model path
+_onnx_models = {}
+
+
+def load_onnx_model(model_path: str, tokenizer_path: str, max_tokens: int, threads: int):
+    key = (model_path, tokenizer_path, max_tokens)
+    if key not in _onnx_models:
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("The onnx embedding provider needs the onnxruntime and tokenizers packages") from e
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        tokenizer.enable_truncation(max_length=max_tokens)
+        tokenizer.enable_padding()
+        _onnx_models[key] = (session, tokenizer)
+    return _onnx_models[key]
+
+
+def run_onnx(texts: List[str], model_path: str, tokenizer_path: str, max_tokens: int, threads: int) -> list:
+    """Tokenize, run the model and mean-pool token states into unit vectors"""
+    import numpy as np
+
+    session, tokenizer = load_onnx_model(model_path, tokenizer_path, max_tokens, threads)
+    encodings = tokenizer.encode_batch(list(texts))
+    input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+    attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+    feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": np.zeros_like(input_ids)}
+    outputs = session.run(None, {inp.name: feeds[inp.name] for inp in session.get_inputs() if inp.name in feeds})
+
+    states = outputs[0]
+    if states.ndim == 3:
+        mask = attention_mask[:, :, None].astype(states.dtype)
+        states = (states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+    norms = np.linalg.norm(states, axis=1, keepdims=True)
+    return (states / np.where(norms == 0, 1.0, norms)).astype(np.float32).tolist()
+
+
+class OnnxEmbeddingProvider(PooledEmbeddingProvider):
+    """Sentence-embedding model exported to ONNX, loaded from local files"""
+    name = "onnx"
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_tokens: int = 256, workers: int = 1,
+                 batch_size: int = 64):
+        super().__init__(workers, batch_size)
+        if not model_path or not os.path.exists(model_path):
+            raise RuntimeError(f"ONNX embedding model not found: {model_path!r}")
+        if not tokenizer_path or not os.path.exists(tokenizer_path):
+            raise RuntimeError(f"ONNX tokenizer not found: {tokenizer_path!r}")
+        self.model_path = model_path
+        self.tokenizer_path = tokenizer_path
+        self.max_tokens = max_tokens
+        # Output width comes from the model itself; probe once if the graph leaves it symbolic
+        session, _ = load_onnx_model(model_path, tokenizer_path, max_tokens, threads=1)
+        width = session.get_outputs()[0].shape[-1]
+        self.dimensions = width if isinstance(width, int) else len(self.embed(["probe"])[0])
+
+    def batch_function(self):
+        # One intra-op thread per worker so the pool size is the core budget
+        return partial(run_onnx, model_path=self.model_path, tokenizer_path=self.tokenizer_path,
+                       max_tokens=self.max_tokens, threads=1 if self.workers > 1 else 0)
@@ -1,24 +1,96 @@
-from openai import OpenAI
 import os
+import threading
 from dotenv import load_dotenv
 
+from services.observability import metrics, profiler
+from vector_db.utils.embedding_providers import (
+    EmbeddingProvider,
+    HashingEmbeddingProvider,
+    OnnxEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+)
+
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
-EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Embedding backend: "openai" (API), "hashing" (local n-gram projection) or
+# "onnx" (local model file). Collections are sized from the chosen provider.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))  # 0 = provider default
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", str(os.cpu_count() or 1)))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_ONNX_MODEL = os.getenv("EMBEDDING_ONNX_MODEL")
+EMBEDDING_ONNX_TOKENIZER = os.getenv("EMBEDDING_ONNX_TOKENIZER")
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "256"))
+
+EMBEDDING_SECONDS = metrics.histogram("embedding_request_seconds", "Time per embedding provider call", ["provider"])
+EMBEDDING_TEXTS = metrics.counter("embedding_texts_total", "Texts embedded", ["provider"])
+EMBEDDING_ERRORS = metrics.counter("embedding_errors_total", "Embedding provider calls that raised", ["provider", "error"])
+
+_client = None
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_openai_client():
+    """OpenAI client, created (and the openai package imported) on first use"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+def create_embedding_provider(name=EMBEDDING_PROVIDER) -> EmbeddingProvider:
+    """Build the provider configured by the EMBEDDING_* settings"""
+    if name == "openai":
+        return OpenAIEmbeddingProvider(get_openai_client, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+    if name == "hashing":
+        return HashingEmbeddingProvider(
+            dimensions=EMBEDDING_DIMENSIONS or 768, workers=EMBEDDING_WORKERS, batch_size=EMBEDDING_BATCH_SIZE
+        )
+    if name == "onnx":
+        return OnnxEmbeddingProvider(
+            EMBEDDING_ONNX_MODEL, EMBEDDING_ONNX_TOKENIZER, max_tokens=EMBEDDING_MAX_TOKENS,
+            workers=EMBEDDING_WORKERS, batch_size=EMBEDDING_BATCH_SIZE,
+        )
+    raise ValueError(f"Unknown embedding provider: {name!r}")
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Get the shared embedding provider instance"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_embedding_provider()
+    return _provider
+
+def close_embedding_provider():
+    """Stop the provider's worker processes, if any"""
+    global _provider
+    if _provider is not None:
+        _provider.close()
+        _provider = None
+
+def embed(texts):
+    """Embed texts with the shared provider, recording latency, volume and errors"""
+    provider = get_embedding_provider()
+    with metrics.track(EMBEDDING_SECONDS, EMBEDDING_ERRORS, provider=provider.name), profiler.span("embedding", provider.name):
+        vectors = provider.embed(texts)
+    EMBEDDING_TEXTS.inc(len(texts), provider=provider.name)
+    return vectors
 
 def get_embeddings(text):
-    """Get OpenAI embeddings for a text"""
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text
-    )
-    
-    return response.data[0].embedding
+    """Get the embedding for a text"""
+    return embed([text])[0]
+
+def get_embeddings_batch(texts):
+    """Get embeddings for several texts in one provider call"""
+    return embed(list(texts))
 
 def get_conversation_embedding(messages):
     """Get embedding for a full conversation"""
     # Concatenate all messages
     text = " ".join([f"{msg['role']}: {msg['content']}" for msg in messages])
-    return get_embeddings(text)
\ No newline at end of file
+    return get_embeddings(text)